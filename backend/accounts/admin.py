@@ -0,0 +1,50 @@
+from django.contrib import admin
+from mockbanking.admin_performance import AdminPerformanceMixin
+from mockbanking.sharded_admin import ShardedAdminMixin
+from .models import Account, AccountDirectory, QueuedTransfer, TransferOutbox
+
+@admin.register(Account)
+class AccountAdmin(AdminPerformanceMixin, ShardedAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'account_number', 'user', 'balance', 'balance_shards', 'is_active', 'created_at')
+    list_select_related = ('user',)
+    search_fields = ('account_number', 'user__username')
+    list_filter = ('is_active',)
+    # Ids grow with creation time, and the primary key needs no extra index
+    ordering = ('-id',)
+    list_per_page = 20
+
+    # ADMIN_PERFORMANCE_MODE
+    keyset_ordering = ('-id',)
+    changelist_only = (
+        'id', 'account_number', 'user', 'user__username', 'user__first_name', 'user__last_name',
+        'balance', 'balance_shards', 'is_active', 'created_at',
+    )
+    performance_search_fields = ('=account_number', '=user__username')
+
+
+@admin.register(AccountDirectory)
+class AccountDirectoryAdmin(admin.ModelAdmin):
+    list_display = ('account_number', 'user')
+    search_fields = ('account_number',)
+    list_per_page = 20
+
+
+@admin.register(TransferOutbox)
+class TransferOutboxAdmin(ShardedAdminMixin, admin.ModelAdmin):
+    list_display = (
+        'transfer_id', 'sender_account_number', 'recipient_account_number',
+        'amount', 'status', 'attempts', 'created_at'
+    )
+    search_fields = ('sender_account_number', 'recipient_account_number')
+    list_filter = ('status',)
+    ordering = ('-created_at',)
+    list_per_page = 20
+
+
+@admin.register(QueuedTransfer)
+class QueuedTransferAdmin(ShardedAdminMixin, admin.ModelAdmin):
+    list_display = ('transfer_id', 'sender', 'recipient_account_number', 'amount', 'status', 'created_at', 'processed_at')
+    search_fields = ('recipient_account_number', 'sender__username')
+    list_filter = ('status',)
+    ordering = ('-created_at',)
+    list_per_page = 20
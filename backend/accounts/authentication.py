@@ -0,0 +1,17 @@
+# backend/accounts/authentication.py
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .revocation import is_revoked
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that also rejects access tokens revoked by logout."""
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_revoked(token.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken('Token has been revoked')
+        return token
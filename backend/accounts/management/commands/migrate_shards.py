@@ -0,0 +1,16 @@
+# backend/accounts/management/commands/migrate_shards.py
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from mockbanking.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    help = "Apply migrations to every database shard."
+
+    def handle(self, *args, **options):
+        for alias in shard_aliases():
+            if options['verbosity']:
+                self.stdout.write(f"Migrating {alias}...")
+            call_command('migrate', database=alias, interactive=False, verbosity=options['verbosity'])
@@ -0,0 +1,34 @@
+# backend/accounts/management/commands/process_transfer_queue.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from mockbanking.sharding import shard_aliases
+from accounts.transfers import process_queue
+
+
+class Command(BaseCommand):
+    help = "Apply queued (async) transfers, one batch per shard at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--loop', type=float, default=0,
+            help="Keep draining, sleeping this many seconds whenever the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = 0
+            for alias in shard_aliases():
+                while True:
+                    count = process_queue(alias, options['batch_size'])
+                    if not count:
+                        break
+                    processed += count
+            if not options['loop']:
+                self.stdout.write(f"Processed {processed} queued transfer(s).")
+                return
+            if not processed:
+                time.sleep(options['loop'])
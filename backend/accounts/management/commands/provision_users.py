@@ -0,0 +1,69 @@
+# backend/accounts/management/commands/provision_users.py
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from accounts.provisioning import PASSWORD_MODES, provision, read_records
+
+
+def _init_worker():
+    # Spawned workers start with a fresh interpreter; forked ones are already set up
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users with funded accounts from a CSV (with a header row) or "
+        "NDJSON file of username, email, first_name, last_name, password and "
+        "optional balance. Passwords are hashed in parallel and rows are "
+        "inserted in batches; invalid or already registered users are skipped "
+        "and reported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or - for stdin.")
+        parser.add_argument('--format', choices=('csv', 'ndjson'),
+                            help="Input format (default: from the file extension, else ndjson).")
+        parser.add_argument('--password-mode', choices=PASSWORD_MODES, default='plain',
+                            help="plain: hash the given passwords; hashed: they are already "
+                                 "Django password hashes; unusable: create users without one.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Process pool size for password hashing; 1 hashes inline.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        try:
+            stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(str(e))
+
+        total = 0
+
+        def progress(count):
+            nonlocal total
+            total += count
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  {total} user(s) created so far")
+
+        with stream:
+            records = read_records(stream, fmt)
+            if options['workers'] > 1 and options['password_mode'] == 'plain':
+                # Never share open database connections with child processes
+                connections.close_all()
+                with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+                    created, errors = provision(
+                        records, options['password_mode'], options['batch_size'], executor=pool, progress=progress
+                    )
+            else:
+                created, errors = provision(records, options['password_mode'], options['batch_size'], progress=progress)
+
+        for line_number, error in errors:
+            self.stderr.write(f"line {line_number}: {error}")
+        self.stdout.write(f"Created {created} user(s); skipped {len(errors)}.")
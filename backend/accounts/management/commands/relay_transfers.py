@@ -0,0 +1,42 @@
+# backend/accounts/management/commands/relay_transfers.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from mockbanking.sharding import shard_aliases
+from accounts.models import TransferOutbox
+from accounts.transfers import deliver
+
+
+class Command(BaseCommand):
+    help = "Deliver cross-shard transfers still pending in the shard outboxes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--loop', type=float, default=0,
+            help="Keep relaying, sleeping this many seconds between passes.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            delivered = self.relay_once(options['batch_size'])
+            if not options['loop']:
+                self.stdout.write(f"Relayed {delivered} transfer(s).")
+                return
+            time.sleep(options['loop'])
+
+    def relay_once(self, batch_size):
+        delivered = 0
+        for alias in shard_aliases():
+            pending = TransferOutbox.objects.using(alias).filter(
+                status=TransferOutbox.PENDING
+            ).order_by('created_at')[:batch_size]
+            for outbox in pending:
+                try:
+                    deliver(outbox)
+                    delivered += 1
+                except Exception as e:
+                    self.stderr.write(f"Transfer {outbox.transfer_id} failed: {e}")
+        return delivered
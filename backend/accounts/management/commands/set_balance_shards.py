@@ -0,0 +1,41 @@
+# backend/accounts/management/commands/set_balance_shards.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.models import Account, AccountBalanceShard, AccountDirectory
+from mockbanking.sharding import shard_for_user_id
+
+
+class Command(BaseCommand):
+    help = (
+        "Split a high-traffic account's balance across K sub-balance rows so "
+        "incoming transfers don't contend on one row lock. K=0 folds it back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('account_number')
+        parser.add_argument('shards', type=int)
+
+    def handle(self, *args, **options):
+        shards = options['shards']
+        if shards < 0:
+            raise CommandError("shards must be zero or positive")
+
+        entry = AccountDirectory.objects.filter(account_number=options['account_number']).first()
+        if entry is None:
+            raise CommandError("Account not found")
+        db = shard_for_user_id(entry.user_id)
+
+        with transaction.atomic(using=db):
+            account = Account.objects.using(db).select_for_update().get(account_number=entry.account_number)
+            list(account.sub_balances.select_for_update())
+            account.fold_sub_balances()
+            account.sub_balances.all().delete()
+            AccountBalanceShard.objects.using(db).bulk_create(
+                [AccountBalanceShard(account=account, slot=slot) for slot in range(shards)]
+            )
+            account.balance_shards = shards
+            account.save()
+
+        self.stdout.write(f"{account.account_number} now has {shards} sub-balance(s); total ${account.total_balance}.")
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:42
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_directory(apps, schema_editor):
+    # Existing accounts all live on the default database
+    if schema_editor.connection.alias != 'default':
+        return
+    Account = apps.get_model('accounts', 'Account')
+    AccountDirectory = apps.get_model('accounts', 'AccountDirectory')
+    AccountDirectory.objects.bulk_create(
+        [
+            AccountDirectory(account_number=account_number, user_id=user_id)
+            for account_number, user_id in Account.objects.values_list('account_number', 'user_id')
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransferInbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transfer_id', models.UUIDField(unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'transfer_inbox',
+            },
+        ),
+        migrations.CreateModel(
+            name='AccountDirectory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account_number', models.CharField(max_length=12, unique=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='directory_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'account directory',
+                'db_table': 'account_directory',
+            },
+        ),
+        migrations.CreateModel(
+            name='TransferOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transfer_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('sender_account_number', models.CharField(max_length=12)),
+                ('recipient_account_number', models.CharField(max_length=12)),
+                ('recipient_user_id', models.BigIntegerField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('description', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('DELIVERED', 'Delivered'), ('REFUNDED', 'Refunded')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_transfers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'transfer_outbox',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='transfer_ou_status_c1be9e_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_directory, migrations.RunPython.noop),
+    ]
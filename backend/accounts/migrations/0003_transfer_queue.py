@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:46
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_sharding_directory_and_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedTransfer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transfer_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('recipient_account_number', models.CharField(max_length=12)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('description', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('batch_id', models.UUIDField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queued_transfers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'transfer_queue',
+                'indexes': [models.Index(fields=['status', 'id'], name='transfer_qu_status_7e57a2_idx'), models.Index(fields=['batch_id'], name='transfer_qu_batch_i_a0c46f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:20
+
+from decimal import Decimal
+
+import mockbanking.money
+from django.db import migrations, models
+from django.db.models import F, Value
+from django.db.models.functions import Round
+
+# (model, field, extra field options) for every money column in this app
+MONEY_FIELDS = [
+    ('account', 'balance', {'default': 0}),
+    ('accountbalanceshard', 'balance', {'default': 0}),
+    ('transferoutbox', 'amount', {}),
+    ('queuedtransfer', 'amount', {}),
+]
+
+
+def to_cents(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    for model_name, field_name, _ in MONEY_FIELDS:
+        model = apps.get_model('accounts', model_name)
+        model.objects.using(alias).update(**{field_name: Round(F(field_name) * 100)})
+
+
+def to_units(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    for model_name, field_name, _ in MONEY_FIELDS:
+        model = apps.get_model('accounts', model_name)
+        model.objects.using(alias).update(**{field_name: F(field_name) * Value(Decimal('0.01'))})
+
+
+# Widen each column so the amounts still fit once multiplied by 100, scale
+# them to cents, then switch the columns to BIGINT.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_balance_shards'),
+    ]
+
+    operations = [
+        *[
+            migrations.AlterField(
+                model_name=model_name,
+                name=field_name,
+                field=models.DecimalField(max_digits=20, decimal_places=2, **options),
+            )
+            for model_name, field_name, options in MONEY_FIELDS
+        ],
+        migrations.RunPython(to_cents, to_units),
+        *[
+            migrations.AlterField(
+                model_name=model_name,
+                name=field_name,
+                field=mockbanking.money.MoneyField(**options),
+            )
+            for model_name, field_name, options in MONEY_FIELDS
+        ],
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_provisioning_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='provisioningjob',
+            name='runner',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
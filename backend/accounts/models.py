@@ -1,9 +1,12 @@
 # backend/accounts/models.py
 
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.db.models import F, Sum, Value
+from mockbanking.money import Money, MoneyField
 import random
 import string
+import uuid
 
 
 class User(AbstractUser):
@@ -21,24 +24,224 @@ class User(AbstractUser):
 class Account(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='account')
     account_number = models.CharField(max_length=12, unique=True, blank=True)
-    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    balance = MoneyField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Hot accounts (e.g. merchants) spread incoming credits over this many
+    # AccountBalanceShard rows so concurrent transfers don't queue on one row
+    # lock. 0 keeps the whole balance in `balance`.
+    balance_shards = models.PositiveSmallIntegerField(default=0)
 
     def save(self, *args, **kwargs):
-        if not self.account_number:
+        reserved = not self.account_number
+        if reserved:
             self.account_number = self.generate_account_number()
-        super().save(*args, **kwargs)
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            if reserved:
+                # The directory row sits on the default database, usually
+                # outside this write's transaction: give the number back,
+                # unless a rollback there is about to remove it anyway.
+                if not transaction.get_connection(DEFAULT_DB_ALIAS).needs_rollback:
+                    AccountDirectory.objects.filter(
+                        account_number=self.account_number, user_id=self.user_id
+                    ).delete()
+                self.account_number = ''
+            raise
 
     def generate_account_number(self):
+        # Account numbers are unique across every shard, so reserve them in
+        # the global directory rather than checking the local accounts table.
         while True:
             account_number = ''.join(random.choices(string.digits, k=12))
-            if not Account.objects.filter(account_number=account_number).exists():
+            _, created = AccountDirectory.objects.get_or_create(
+                account_number=account_number,
+                defaults={'user_id': self.user_id},
+            )
+            if created:
                 return account_number
 
+    @property
+    def total_balance(self):
+        """`balance` plus whatever is parked in the sub-balance rows."""
+        if not self.balance_shards:
+            return self.balance
+        parked = self.sub_balances.aggregate(total=Sum('balance'))['total']
+        return self.balance + (parked or 0)
+
+    def credit_sub_balance(self, amount):
+        """
+        Credit a random sub-balance row without touching (or locking) the
+        account row itself. Only valid when `balance_shards` is set.
+        """
+        slot = random.randrange(self.balance_shards)
+        amount = Value(Money(amount), output_field=MoneyField())
+        if not self.sub_balances.filter(slot=slot).update(balance=F('balance') + amount):
+            # Slot vanished under a concurrent re-split: credit the main balance
+            Account.objects.using(self._state.db).filter(pk=self.pk).update(balance=F('balance') + amount)
+
+    def fold_sub_balances(self):
+        """
+        Move every sub-balance back into `balance`. Call with the account row
+        locked, before a debit; the account is saved by the caller.
+        """
+        if not self.balance_shards:
+            return
+        shards = list(self.sub_balances.select_for_update().exclude(balance=0))
+        if shards:
+            self.balance += sum(shard.balance for shard in shards)
+            self.sub_balances.filter(pk__in=[shard.pk for shard in shards]).update(balance=0)
+
     def __str__(self):
         return f"{self.user.username} - {self.account_number} - ${self.balance}"
 
     class Meta:
         db_table = 'accounts'
+
+
+class AccountBalanceShard(models.Model):
+    """One of `account.balance_shards` slices of a hot account's balance."""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='sub_balances')
+    slot = models.PositiveSmallIntegerField()
+    balance = MoneyField(default=0)
+
+    class Meta:
+        db_table = 'account_balance_shards'
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'slot'], name='unique_account_balance_slot'),
+        ]
+
+
+
+class AccountDirectory(models.Model):
+    """
+    Global account_number -> user lookup, kept on the default database. The
+    owning user id picks the shard that holds the account itself.
+    """
+    account_number = models.CharField(max_length=12, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='directory_entries')
+
+    def __str__(self):
+        return f"{self.account_number} -> user {self.user_id}"
+
+    class Meta:
+        db_table = 'account_directory'
+        verbose_name_plural = 'account directory'
+
+
+class TransferOutbox(models.Model):
+    """
+    Cross-shard transfer that has been debited on the sender's shard and is
+    waiting to be credited on the recipient's shard.
+    """
+    PENDING = 'PENDING'
+    DELIVERED = 'DELIVERED'
+    REFUNDED = 'REFUNDED'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (DELIVERED, 'Delivered'),
+        (REFUNDED, 'Refunded'),
+    ]
+
+    transfer_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='outgoing_transfers')
+    sender_account_number = models.CharField(max_length=12)
+    recipient_account_number = models.CharField(max_length=12)
+    recipient_user_id = models.BigIntegerField()
+    amount = MoneyField()
+    description = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.transfer_id} {self.sender_account_number} -> {self.recipient_account_number} ({self.status})"
+
+    class Meta:
+        db_table = 'transfer_outbox'
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+
+class TransferInbox(models.Model):
+    """Idempotency record: a cross-shard transfer already credited on this shard."""
+    transfer_id = models.UUIDField(unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'transfer_inbox'
+
+
+class QueuedTransfer(models.Model):
+    """
+    Transfer accepted in async mode. Lives on the sender's shard until a
+    `process_transfer_queue` worker applies it together with the rest of the
+    sender's pending transfers.
+    """
+    PENDING = 'PENDING'
+    COMPLETED = 'COMPLETED'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    transfer_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='queued_transfers')
+    recipient_account_number = models.CharField(max_length=12)
+    amount = MoneyField()
+    description = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    error = models.CharField(max_length=255, blank=True)
+    batch_id = models.UUIDField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.transfer_id} -> {self.recipient_account_number} ${self.amount} ({self.status})"
+
+    class Meta:
+        db_table = 'transfer_queue'
+        indexes = [
+            models.Index(fields=['status', 'id']),
+            models.Index(fields=['batch_id']),
+        ]
+
+
+class ProvisioningJob(models.Model):
+    """
+    A staff bulk registration from `/auth/provision/`, run in the background
+    by the web process that accepted it. Passwords are never stored here.
+    """
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    COMPLETED = 'COMPLETED'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='provisioning_jobs')
+    password_mode = models.CharField(max_length=10)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    total = models.PositiveIntegerField()
+    created = models.PositiveIntegerField(default=0)
+    # [{"index": position in the request, "error": message}, ...]
+    errors = models.JSONField(default=list, blank=True)
+    # host:pid of the web process running the job
+    runner = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.job_id} {self.created}/{self.total} ({self.status})"
+
+    class Meta:
+        db_table = 'provisioning_jobs'
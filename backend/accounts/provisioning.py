@@ -0,0 +1,344 @@
+# backend/accounts/provisioning.py
+
+import csv
+import json
+import logging
+import os
+import random
+import socket
+import string
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from mockbanking.money import Money
+from mockbanking.sharding import shard_for_user_id
+from .models import Account, AccountDirectory, ProvisioningJob, User
+from .recipients import account_numbers
+
+logger = logging.getLogger(__name__)
+
+# plain: `password` is plaintext and gets hashed here
+# hashed: `password` is already an encoded Django hash (e.g. from an export)
+# unusable: no password; users sign in once one is set for them
+PASSWORD_MODES = ('plain', 'hashed', 'unusable')
+DEFAULT_BALANCE = Money(5000)
+
+# Passwords handed to each pool task; large enough to amortise the IPC
+HASH_CHUNK_SIZE = 50
+# Threads share no IPC, so jobs hand out smaller chunks to use every core
+JOB_HASH_CHUNK_SIZE = 10
+
+_validate_username = UnicodeUsernameValidator()
+
+
+def read_records(stream, fmt):
+    """Yield (line number, record) from a CSV file with a header row, or NDJSON."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+
+def clean_record(record, password_mode):
+    """Normalise one input record, raising ValueError with a message if it is unusable."""
+    if not isinstance(record, dict):
+        raise ValueError('not a JSON object')
+    cleaned = {}
+    for name, max_length in (('username', 150), ('email', 254), ('first_name', 30), ('last_name', 30)):
+        value = str(record.get(name) or '').strip()
+        if not value:
+            raise ValueError(f'{name} is required')
+        if len(value) > max_length:
+            raise ValueError(f'{name} is longer than {max_length} characters')
+        cleaned[name] = value
+    try:
+        _validate_username(cleaned['username'])
+        validate_email(cleaned['email'])
+    except ValidationError as e:
+        raise ValueError(' '.join(e.messages))
+
+    password = record.get('password') or ''
+    if password_mode == 'plain' and not password:
+        raise ValueError('password is required')
+    if password_mode == 'hashed':
+        try:
+            identify_hasher(password)
+        except ValueError:
+            raise ValueError('password is not a recognised password hash')
+    cleaned['password'] = password if password_mode != 'unusable' else None
+
+    balance = record.get('balance')
+    if balance is None or balance == '':
+        balance = DEFAULT_BALANCE
+    try:
+        balance = Money(str(balance))
+    except ValueError:
+        raise ValueError('balance is not an amount with at most two decimal places')
+    if balance < 0:
+        raise ValueError('balance must not be negative')
+    cleaned['balance'] = balance
+    return cleaned
+
+
+def hash_passwords(passwords):
+    """Runs in pool workers."""
+    return [make_password(password) for password in passwords]
+
+
+def allocate_account_numbers(user_ids):
+    """
+    Reserve one fresh account number per user in the global directory, a
+    whole batch at a time: generate candidates, drop the ones already taken
+    in a single lookup, bulk insert the rest. Returns {user id: number}.
+    """
+    numbers = {}
+    pending = list(user_ids)
+    while pending:
+        candidates = {''.join(random.choices(string.digits, k=12)) for _ in pending}
+        taken = set(
+            AccountDirectory.objects.filter(account_number__in=candidates).values_list('account_number', flat=True)
+        )
+        assigned = dict(zip(pending, (number for number in candidates if number not in taken)))
+        AccountDirectory.objects.bulk_create(
+            [AccountDirectory(account_number=number, user_id=user_id) for user_id, number in assigned.items()]
+        )
+        account_numbers.update(assigned.values())
+        numbers.update(assigned)
+        pending = pending[len(assigned):]
+    return numbers
+
+
+def _mirror(user):
+    return User(**{field.attname: getattr(user, field.attname) for field in User._meta.concrete_fields})
+
+
+def create_batch(records, batch_size=1000):
+    """
+    Create users, their account directory entries, shard mirrors and
+    accounts for already-cleaned records whose `password` holds the final
+    encoded hash. Each database is written in one transaction, and none of
+    them commits until all of the writes have gone through.
+    """
+    with ExitStack() as stack:
+        stack.enter_context(transaction.atomic(using=DEFAULT_DB_ALIAS))
+        users = User.objects.bulk_create([
+            User(
+                username=record['username'], email=record['email'], first_name=record['first_name'],
+                last_name=record['last_name'], password=record['password'],
+            )
+            for record in records
+        ], batch_size=batch_size)
+        if any(user.pk is None for user in users):
+            # Backends that can't return ids from a bulk insert
+            ids = dict(User.objects.filter(username__in=[user.username for user in users]).values_list('username', 'id'))
+            for user in users:
+                user.pk = ids[user.username]
+
+        numbers = allocate_account_numbers([user.pk for user in users])
+
+        by_shard = {}
+        for user, record in zip(users, records):
+            by_shard.setdefault(shard_for_user_id(user.pk), []).append((user, record))
+        for alias, members in by_shard.items():
+            if alias != DEFAULT_DB_ALIAS:
+                stack.enter_context(transaction.atomic(using=alias))
+                User.objects.using(alias).bulk_create([_mirror(user) for user, _ in members], batch_size=batch_size)
+            Account.objects.using(alias).bulk_create([
+                Account(user_id=user.pk, account_number=numbers[user.pk], balance=record['balance'])
+                for user, record in members
+            ], batch_size=batch_size)
+    return len(users)
+
+
+def provision(records, password_mode='plain', batch_size=1000, executor=None, progress=None,
+              hash_chunk_size=HASH_CHUNK_SIZE):
+    """
+    Bulk-create users with funded accounts from (line number, record) pairs.
+
+    Plaintext passwords are hashed on `executor` (a process pool, or a
+    thread pool: PBKDF2 runs without the GIL) when one is given, in chunks
+    of `hash_chunk_size`. Batch N+1 is hashed while batch N is written. Records that
+    are invalid or clash with an existing or earlier username or email are
+    skipped. Password validators are not run. Returns (created, [(line number, error)]).
+    """
+    if password_mode not in PASSWORD_MODES:
+        raise ValueError(f"password_mode must be one of: {', '.join(PASSWORD_MODES)}")
+
+    errors = []
+    seen_usernames, seen_emails = set(), set()
+    created = 0
+
+    def prepare(chunk):
+        valid = []
+        for line_number, record in chunk:
+            try:
+                cleaned = clean_record(record, password_mode)
+            except ValueError as e:
+                errors.append((line_number, str(e)))
+                continue
+            if cleaned['username'] in seen_usernames or cleaned['email'] in seen_emails:
+                errors.append((line_number, 'duplicate username or email in input'))
+                continue
+            seen_usernames.add(cleaned['username'])
+            seen_emails.add(cleaned['email'])
+            valid.append((line_number, cleaned))
+
+        existing_usernames = set(User.objects.filter(
+            username__in=[cleaned['username'] for _, cleaned in valid]
+        ).values_list('username', flat=True))
+        existing_emails = set(User.objects.filter(
+            email__in=[cleaned['email'] for _, cleaned in valid]
+        ).values_list('email', flat=True))
+        batch = []
+        for line_number, cleaned in valid:
+            if cleaned['username'] in existing_usernames or cleaned['email'] in existing_emails:
+                errors.append((line_number, 'username or email already registered'))
+            else:
+                batch.append(cleaned)
+
+        passwords = [cleaned['password'] for cleaned in batch]
+        if password_mode == 'hashed':
+            return batch, None
+        if executor is None or password_mode == 'unusable':
+            return batch, hash_passwords(passwords)
+        return batch, [
+            executor.submit(hash_passwords, passwords[i:i + hash_chunk_size])
+            for i in range(0, len(passwords), hash_chunk_size)
+        ]
+
+    def finish(batch, hashed):
+        if hashed is not None:
+            if executor is not None and password_mode == 'plain':
+                hashed = [encoded for future in hashed for encoded in future.result()]
+            for cleaned, encoded in zip(batch, hashed):
+                cleaned['password'] = encoded
+        count = create_batch(batch, batch_size) if batch else 0
+        if progress:
+            progress(count)
+        return count
+
+    in_flight = None
+    chunk = []
+    for item in records:
+        chunk.append(item)
+        if len(chunk) == batch_size:
+            prepared = prepare(chunk)
+            if in_flight:
+                created += finish(*in_flight)
+            in_flight, chunk = prepared, []
+    if chunk:
+        prepared = prepare(chunk)
+        if in_flight:
+            created += finish(*in_flight)
+        in_flight = prepared
+    if in_flight:
+        created += finish(*in_flight)
+    return created, errors
+
+
+# Jobs run one at a time per process; each hashes on every core
+_job_runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix='provisioning')
+_hash_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='password-hash')
+
+
+def _runner():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def start_job(records, password_mode, requested_by=None):
+    """
+    Record a provisioning job and run it in the background once the current
+    transaction commits. Passwords stay in memory only, so the job can't
+    outlive this process; see `fail_orphaned_jobs`.
+    """
+    job = ProvisioningJob.objects.create(
+        requested_by=requested_by, password_mode=password_mode, total=len(records), runner=_runner()
+    )
+    transaction.on_commit(lambda: _job_runner.submit(_run_in_thread, job.pk, records, password_mode))
+    return job
+
+
+def _process_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def fail_orphaned_jobs():
+    """
+    Mark FAILED the unfinished jobs of web processes on this host that have
+    exited, which took the jobs' passwords with them. Runs as a web process
+    starts, when a job recorded under its own pid can only be a predecessor's.
+    Returns the number of jobs marked.
+    """
+    host, pid = socket.gethostname(), os.getpid()
+    unfinished = ProvisioningJob.objects.filter(status__in=[ProvisioningJob.PENDING, ProvisioningJob.RUNNING])
+    try:
+        orphaned = []
+        for job_pk, runner in unfinished.filter(Q(runner__startswith=f'{host}:') | Q(runner='')).values_list(
+            'pk', 'runner'
+        ):
+            runner_pid = int(runner.rpartition(':')[2] or 0)
+            if not runner_pid or runner_pid == pid or not _process_exists(runner_pid):
+                orphaned.append(job_pk)
+        return unfinished.filter(pk__in=orphaned).update(
+            status=ProvisioningJob.FAILED,
+            errors=[{'index': None, 'error': 'The server stopped before the job finished; submit it again'}],
+            finished_at=timezone.now(),
+        )
+    except DatabaseError as e:
+        # Not migrated yet
+        logger.warning("Could not check for orphaned provisioning jobs: %s", e)
+        return 0
+
+
+def _run_in_thread(job_pk, records, password_mode):
+    try:
+        run_job(job_pk, records, password_mode)
+    finally:
+        # Connections opened by this thread aren't closed by any request cycle
+        connections.close_all()
+
+
+def run_job(job_pk, records, password_mode):
+    jobs = ProvisioningJob.objects.filter(pk=job_pk)
+    jobs.update(status=ProvisioningJob.RUNNING)
+
+    def progress(count):
+        jobs.update(created=F('created') + count)
+
+    try:
+        _, errors = provision(
+            enumerate(records, 1), password_mode, executor=_hash_pool, progress=progress,
+            hash_chunk_size=JOB_HASH_CHUNK_SIZE,
+        )
+    except Exception:
+        logger.exception("Provisioning job %s failed", job_pk)
+        jobs.update(status=ProvisioningJob.FAILED, finished_at=timezone.now())
+        return
+    jobs.update(
+        status=ProvisioningJob.COMPLETED,
+        errors=[{'index': index, 'error': error} for index, error in errors],
+        finished_at=timezone.now(),
+    )
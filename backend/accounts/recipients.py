@@ -0,0 +1,62 @@
+# backend/accounts/recipients.py
+
+from django.db.models import Q
+
+from mockbanking.bloom import SyncedBloomFilter
+from .models import AccountDirectory
+
+ACCOUNT_NUMBER_LENGTH = 12
+
+
+class AccountNumberFilter(SyncedBloomFilter):
+    """
+    Per-process Bloom filter of every account number in the directory. A
+    miss means the number certainly doesn't exist, so mistyped recipients
+    are turned away without a query; a hit still needs the directory to
+    confirm it. Numbers reserved by this process are added as they are
+    created. Accounts opened by other processes are pulled in every
+    ACCOUNT_NUMBER_FILTER_SYNC_SECONDS; until then this process answers
+    for them as for a mistyped number.
+    """
+
+    min_capacity = 100000
+    sync_setting, sync_default = 'ACCOUNT_NUMBER_FILTER_SYNC_SECONDS', 5
+    rebuild_setting = 'ACCOUNT_NUMBER_FILTER_REBUILD_SECONDS'
+
+    def load(self):
+        return AccountDirectory.objects.values_list('id', 'account_number')
+
+    def load_since(self, last_id, holes):
+        return AccountDirectory.objects.filter(
+            Q(id__gt=last_id) | Q(id__in=holes)
+        ).order_by('id').values_list('id', 'account_number')
+
+
+account_numbers = AccountNumberFilter()
+
+
+def might_exist(account_number):
+    """False if `account_number` is certainly not an account; checks no database."""
+    return (
+        isinstance(account_number, str)
+        and len(account_number) == ACCOUNT_NUMBER_LENGTH
+        and account_number.isascii()
+        and account_number.isdigit()
+        and account_numbers.might_contain(account_number)
+    )
+
+
+def mask_name(first_name, last_name):
+    """'Jane Doe' -> 'J*** D***'"""
+    return ' '.join(f'{part[0]}***' for part in (first_name, last_name) if part)
+
+
+def lookup(numbers):
+    """{account number: masked holder name} for the numbers that exist, in one query."""
+    candidates = [number for number in dict.fromkeys(numbers) if might_exist(number)]
+    if not candidates:
+        return {}
+    rows = AccountDirectory.objects.filter(account_number__in=candidates).values_list(
+        'account_number', 'user__first_name', 'user__last_name'
+    )
+    return {number: mask_name(first_name, last_name) for number, first_name, last_name in rows}
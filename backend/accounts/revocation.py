@@ -0,0 +1,61 @@
+# backend/accounts/revocation.py
+
+from django.db.models import Case, F, Q, When
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from mockbanking.bloom import SyncedBloomFilter
+
+
+class RevocationFilter(SyncedBloomFilter):
+    """
+    Per-process Bloom filter of revoked token JTIs. A miss means the token
+    is certainly not revoked, so access checks skip the database; a hit is
+    confirmed against the blacklist table. Revocations made by other
+    processes are pulled in every TOKEN_REVOCATION_SYNC_SECONDS, and the
+    filter is rebuilt (dropping expired tokens, resizing) every
+    TOKEN_REVOCATION_REBUILD_SECONDS.
+    """
+
+    sync_setting = 'TOKEN_REVOCATION_SYNC_SECONDS'
+    rebuild_setting = 'TOKEN_REVOCATION_REBUILD_SECONDS'
+
+    def _rows(self, queryset):
+        # Expired tokens stay in the result with no jti: their ids still
+        # count as seen, so they are neither re-read as holes nor added back
+        return queryset.annotate(
+            live_jti=Case(When(token__expires_at__gt=timezone.now(), then=F('token__jti')))
+        ).values_list('id', 'live_jti')
+
+    def load(self):
+        return self._rows(BlacklistedToken.objects.all())
+
+    def load_since(self, last_id, holes):
+        return self._rows(BlacklistedToken.objects.filter(Q(id__gt=last_id) | Q(id__in=holes)).order_by('id'))
+
+
+revocations = RevocationFilter()
+
+
+def is_revoked(jti):
+    if not jti or not revocations.might_contain(jti):
+        return False
+    return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+def revoke(token, user):
+    """Blacklist an access or refresh token and add it to this process's filter."""
+    jti = token[api_settings.JTI_CLAIM]
+    outstanding, _ = OutstandingToken.objects.get_or_create(
+        jti=jti,
+        defaults={
+            'user': user,
+            'token': str(token),
+            'created_at': token.current_time,
+            'expires_at': datetime_from_epoch(token['exp']),
+        },
+    )
+    BlacklistedToken.objects.get_or_create(token=outstanding)
+    revocations.add(jti)
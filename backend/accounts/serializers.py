@@ -3,7 +3,9 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
-from .models import User, Account
+from mockbanking.money import Money, MoneySerializerField
+from mockbanking.sharding import db_for_user
+from .models import User, Account, ProvisioningJob, QueuedTransfer
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -24,7 +26,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         user = User.objects.create_user(**validated_data)
 
         # Create account for the user with initial balance of $5000
-        Account.objects.create(user=user, balance=5000.00)
+        Account.objects.db_manager(db_for_user(user)).create(user=user, balance=Money(5000))
 
         return user
 
@@ -50,6 +52,8 @@ class UserLoginSerializer(serializers.Serializer):
 
 
 class AccountSerializer(serializers.ModelSerializer):
+    # Includes any sub-balances of a hot account
+    balance = MoneySerializerField(source='total_balance', read_only=True)
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     username = serializers.CharField(source='user.username', read_only=True)
 
@@ -65,4 +69,23 @@ class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'account')
-        read_only_fields = ('id', 'username')
\ No newline at end of file
+        read_only_fields = ('id', 'username')
+
+
+class QueuedTransferSerializer(serializers.ModelSerializer):
+    amount = MoneySerializerField(read_only=True)
+
+    class Meta:
+        model = QueuedTransfer
+        fields = (
+            'transfer_id', 'recipient_account_number', 'amount', 'description',
+            'status', 'error', 'created_at', 'processed_at'
+        )
+        read_only_fields = fields
+
+
+class ProvisioningJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProvisioningJob
+        fields = ('job_id', 'status', 'total', 'created', 'errors', 'created_at', 'finished_at')
+        read_only_fields = fields
\ No newline at end of file
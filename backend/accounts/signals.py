@@ -0,0 +1,41 @@
+# backend/accounts/signals.py
+
+import copy
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+
+from mockbanking.sharding import shard_for_user_id
+from .models import AccountDirectory, User
+from .recipients import account_numbers
+
+
+def mirror_user_to_shard(sender, instance, using, raw=False, **kwargs):
+    """
+    Keep a copy of every user row on the user's home shard so that the
+    account and transaction foreign keys (and joins on them) stay local.
+    """
+    shard = shard_for_user_id(instance.pk)
+    if raw or using != DEFAULT_DB_ALIAS or shard == DEFAULT_DB_ALIAS:
+        return
+    mirror = copy.copy(instance)
+    mirror.save_base(using=shard, raw=True)
+
+
+def delete_user_mirror(sender, instance, using, **kwargs):
+    shard = shard_for_user_id(instance.pk)
+    if using != DEFAULT_DB_ALIAS or shard == DEFAULT_DB_ALIAS:
+        return
+    # Cascades to the user's account and transactions on that shard
+    User.objects.using(shard).filter(pk=instance.pk).delete()
+
+
+def add_account_number(sender, instance, created, raw=False, **kwargs):
+    # Lets this process accept transfers to the new account straight away
+    if created and not raw:
+        account_numbers.add(instance.account_number)
+
+
+post_save.connect(mirror_user_to_shard, sender=User, dispatch_uid='mirror_user_to_shard')
+post_delete.connect(delete_user_mirror, sender=User, dispatch_uid='delete_user_mirror')
+post_save.connect(add_account_number, sender=AccountDirectory, dispatch_uid='add_account_number')
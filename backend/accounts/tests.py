@@ -1,3 +1,627 @@
-from django.test import TestCase
+# backend/accounts/tests.py
 
-# Create your tests here.
+import json
+import os
+import socket
+import subprocess
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from itertools import count
+from unittest import mock, skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connections, transaction
+from django.db.models import QuerySet, Sum
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from mockbanking.money import Money
+from mockbanking.sharding import is_sharded, shard_aliases, shard_for_user_id
+from transactions.models import Transaction
+from . import provisioning, recipients, transfers
+from .models import (
+    Account, AccountBalanceShard, AccountDirectory, ProvisioningJob, QueuedTransfer, TransferInbox, TransferOutbox,
+    User,
+)
+from .recipients import AccountNumberFilter
+from .revocation import RevocationFilter, is_revoked, revoke
+
+_usernames = count()
+
+
+def make_account(balance=1000, shard=None):
+    """A funded account, optionally on a given shard (users are created until one lands there)."""
+    while True:
+        n = next(_usernames)
+        user = User.objects.create(
+            username=f'user{n}', email=f'user{n}@example.com', first_name='Test', last_name=str(n),
+        )
+        if shard is None or shard_for_user_id(user.pk) == shard:
+            break
+        user.delete()
+    account = Account(user=user, balance=balance)
+    account.save(using=shard_for_user_id(user.pk))
+    return account
+
+
+def total_money():
+    total = 0
+    for alias in shard_aliases():
+        total += Account.objects.using(alias).aggregate(total=Sum('balance'))['total'] or 0
+        total += AccountBalanceShard.objects.using(alias).aggregate(total=Sum('balance'))['total'] or 0
+    return total
+
+
+def balance_of(account):
+    return Account.objects.using(account._state.db).get(pk=account.pk).total_balance
+
+
+class ShardPlacementTests(TestCase):
+    databases = '__all__'
+
+    def test_shard_for_user_id_is_stable(self):
+        self.assertEqual(shard_for_user_id(42), shard_for_user_id(42))
+        self.assertIn(shard_for_user_id(42), shard_aliases())
+
+    @skipUnless(is_sharded(), "needs MOCKBANKING_SHARD_COUNT >= 2")
+    def test_account_and_user_mirror_live_on_home_shard(self):
+        other = shard_aliases()[1]
+        account = make_account(shard=other)
+        self.assertEqual(account._state.db, other)
+        self.assertTrue(User.objects.using(other).filter(pk=account.user_id).exists())
+        self.assertTrue(AccountDirectory.objects.filter(account_number=account.account_number).exists())
+
+        account.user.delete()
+        self.assertFalse(User.objects.using(other).filter(pk=account.user_id).exists())
+        self.assertFalse(Account.objects.using(other).filter(pk=account.pk).exists())
+
+
+class TransferTests(TestCase):
+    databases = '__all__'
+
+    def _pending_outbox(self, sender, recipient, amount):
+        """Debit `sender` into an outbox entry for `recipient` without delivering it."""
+        entry = AccountDirectory.objects.get(account_number=recipient.account_number)
+        with mock.patch.object(transfers, '_deliver_all'):
+            transfers._transfer_cross_shard(sender._state.db, sender.user, entry, amount, '')
+        return TransferOutbox.objects.using(sender._state.db).get(recipient_account_number=recipient.account_number)
+
+    def test_same_shard_transfer_keeps_total(self):
+        sender = make_account(1000)
+        recipient = make_account(500, shard=sender._state.db)
+        before = total_money()
+
+        result = transfers.transfer(sender.user, recipient.account_number, 250)
+
+        self.assertEqual(result['new_balance'], 750)
+        self.assertEqual(balance_of(sender), 750)
+        self.assertEqual(balance_of(recipient), 750)
+        self.assertEqual(total_money(), before)
+
+    @skipUnless(is_sharded(), "needs MOCKBANKING_SHARD_COUNT >= 2")
+    def test_cross_shard_transfer_keeps_total(self):
+        sender = make_account(1000, shard=shard_aliases()[0])
+        recipient = make_account(500, shard=shard_aliases()[1])
+        before = total_money()
+
+        transfers.transfer(sender.user, recipient.account_number, 250)
+
+        self.assertEqual(balance_of(sender), 750)
+        self.assertEqual(balance_of(recipient), 750)
+        self.assertEqual(total_money(), before)
+        outbox = TransferOutbox.objects.using(sender._state.db).get()
+        self.assertEqual(outbox.status, TransferOutbox.DELIVERED)
+
+    def test_deliver_is_idempotent(self):
+        sender = make_account(1000)
+        recipient = make_account(500)
+        before = total_money()
+        outbox = self._pending_outbox(sender, recipient, 100)
+
+        transfers.deliver(outbox)
+        # A relay retrying the same entry, e.g. after losing the status update
+        TransferOutbox.objects.using(sender._state.db).filter(pk=outbox.pk).update(status=TransferOutbox.PENDING)
+        transfers.deliver(TransferOutbox.objects.using(sender._state.db).get(pk=outbox.pk))
+
+        recipient_db = recipient._state.db
+        self.assertEqual(balance_of(recipient), 600)
+        self.assertEqual(total_money(), before)
+        self.assertEqual(TransferInbox.objects.using(recipient_db).filter(transfer_id=outbox.transfer_id).count(), 1)
+        self.assertEqual(
+            Transaction.objects.using(recipient_db).filter(user_id=recipient.user_id, transaction_type='CREDIT').count(), 1
+        )
+
+    def test_refund_when_recipient_is_missing(self):
+        sender = make_account(1000)
+        recipient = make_account(500)
+        outbox = self._pending_outbox(sender, recipient, 100)
+        self.assertEqual(balance_of(sender), 900)
+        Account.objects.using(recipient._state.db).filter(pk=recipient.pk).delete()
+
+        transfers.deliver(outbox)
+
+        outbox.refresh_from_db()
+        self.assertEqual(outbox.status, TransferOutbox.REFUNDED)
+        self.assertEqual(balance_of(sender), 1000)
+        refund = Transaction.objects.using(sender._state.db).filter(user_id=sender.user_id).order_by('-id').first()
+        self.assertEqual(refund.transaction_type, 'CREDIT')
+        self.assertEqual(refund.amount, 100)
+
+        # Redelivering a refunded entry changes nothing
+        transfers.refund(outbox)
+        self.assertEqual(balance_of(sender), 1000)
+
+    def test_insufficient_funds_takes_no_lock_and_writes_nothing(self):
+        sender = make_account(100)
+        recipient = make_account(500)
+        rows_before = sum(Transaction.objects.using(alias).count() for alias in shard_aliases())
+
+        with mock.patch.object(QuerySet, 'select_for_update', autospec=True) as select_for_update:
+            with self.assertRaisesMessage(transfers.TransferError, 'Insufficient balance'):
+                transfers.transfer(sender.user, recipient.account_number, 250)
+        select_for_update.assert_not_called()
+
+        self.assertEqual(balance_of(sender), 100)
+        self.assertEqual(balance_of(recipient), 500)
+        self.assertEqual(sum(Transaction.objects.using(alias).count() for alias in shard_aliases()), rows_before)
+        self.assertFalse(any(TransferOutbox.objects.using(alias).exists() for alias in shard_aliases()))
+        self.assertFalse(any(connections[alias].in_atomic_block and connections[alias].needs_rollback
+                             for alias in shard_aliases()))
+
+    def test_unknown_recipient_is_rejected(self):
+        sender = make_account(100)
+        with self.assertRaises(transfers.TransferError) as raised:
+            transfers.transfer(sender.user, '000000000000', 10)
+        self.assertEqual(raised.exception.status_code, 404)
+        self.assertEqual(balance_of(sender), 100)
+
+
+class TransferQueueTests(TestCase):
+    databases = '__all__'
+
+    def test_batch_applies_transfers_in_arrival_order(self):
+        sender = make_account(100)
+        first = make_account(0, shard=sender._state.db)
+        second = make_account(0, shard=sender._state.db)
+        before = total_money()
+        queued = [
+            transfers.enqueue(sender.user, first.account_number, 60),
+            transfers.enqueue(sender.user, second.account_number, 60),
+            transfers.enqueue(sender.user, second.account_number, 30),
+        ]
+
+        self.assertEqual(transfers.process_queue(sender._state.db), 3)
+
+        for entry in queued:
+            entry.refresh_from_db()
+        self.assertEqual([entry.status for entry in queued],
+                         [QueuedTransfer.COMPLETED, QueuedTransfer.FAILED, QueuedTransfer.COMPLETED])
+        self.assertEqual(queued[1].error, 'Insufficient balance')
+        self.assertEqual(len({entry.batch_id for entry in queued}), 1)
+        self.assertEqual(balance_of(sender), 10)
+        self.assertEqual(balance_of(first), 60)
+        self.assertEqual(balance_of(second), 30)
+        self.assertEqual(total_money(), before)
+
+    def test_batch_size_limits_the_claim(self):
+        sender = make_account(100)
+        recipient = make_account(0, shard=sender._state.db)
+        queued = [transfers.enqueue(sender.user, recipient.account_number, 10) for _ in range(3)]
+        db = sender._state.db
+
+        self.assertEqual(transfers.process_queue(db, batch_size=2), 2)
+        queued[2].refresh_from_db()
+        self.assertEqual(queued[2].status, QueuedTransfer.PENDING)
+        self.assertIsNone(queued[2].batch_id)
+
+        self.assertEqual(transfers.process_queue(db, batch_size=2), 1)
+        # Nothing left to claim, and finished entries are never applied twice
+        self.assertEqual(transfers.process_queue(db), 0)
+        self.assertEqual(balance_of(recipient), 30)
+        self.assertEqual(balance_of(sender), 70)
+
+    def test_failed_entries_are_not_reclaimed(self):
+        sender = make_account(100)
+        entry = transfers.enqueue(sender.user, '000000000000', 10)
+
+        self.assertEqual(transfers.process_queue(sender._state.db), 1)
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.error), (QueuedTransfer.FAILED, 'Recipient account not found'))
+        self.assertEqual(transfers.process_queue(sender._state.db), 0)
+        self.assertEqual(balance_of(sender), 100)
+
+    def test_hot_recipient_is_credited_through_sub_balances(self):
+        sender = make_account(100)
+        recipient = make_account(0, shard=sender._state.db)
+        call_command('set_balance_shards', recipient.account_number, 4, stdout=StringIO())
+        for _ in range(3):
+            transfers.enqueue(sender.user, recipient.account_number, 10)
+
+        self.assertEqual(transfers.process_queue(sender._state.db), 3)
+
+        account = Account.objects.using(recipient._state.db).get(pk=recipient.pk)
+        self.assertEqual(account.balance, 0)
+        self.assertEqual(account.total_balance, 30)
+        credits = Transaction.objects.using(recipient._state.db).filter(
+            user_id=recipient.user_id, transaction_type='CREDIT'
+        ).order_by('id')
+        self.assertEqual([t.balance_after_transaction for t in credits], [10, 20, 30])
+
+    @skipUnless(is_sharded(), "needs MOCKBANKING_SHARD_COUNT >= 2")
+    def test_cross_shard_entries_go_through_the_outbox(self):
+        sender = make_account(100, shard=shard_aliases()[0])
+        recipient = make_account(0, shard=shard_aliases()[1])
+        before = total_money()
+        entry = transfers.enqueue(sender.user, recipient.account_number, 40)
+
+        self.assertEqual(transfers.process_queue(sender._state.db), 1)
+
+        outbox = TransferOutbox.objects.using(sender._state.db).get(transfer_id=entry.transfer_id)
+        self.assertEqual(outbox.status, TransferOutbox.DELIVERED)
+        self.assertEqual(balance_of(recipient), 40)
+        self.assertEqual(total_money(), before)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class SubBalanceTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        # The last shard is not 'default' when sharded, so sub-balance rows must follow the account there
+        self.account = make_account(1000, shard=shard_aliases()[-1])
+        self.db = self.account._state.db
+
+    def split(self, shards):
+        out = StringIO()
+        call_command('set_balance_shards', self.account.account_number, shards, stdout=out)
+        return out.getvalue()
+
+    def reload(self):
+        return Account.objects.using(self.db).get(pk=self.account.pk)
+
+    def parked(self):
+        return list(AccountBalanceShard.objects.using(self.db).filter(account_id=self.account.pk)
+                    .order_by('slot').values_list('balance', flat=True))
+
+    def test_credits_land_in_sub_balances(self):
+        self.split(3)
+        before = total_money()
+        account = self.reload()
+
+        account.credit_sub_balance(50)
+        account.credit_sub_balance('0.25')
+
+        self.assertEqual(self.reload().balance, 1000)
+        self.assertEqual(sum(self.parked()), Money('50.25'))
+        self.assertEqual(self.reload().total_balance, Money('1050.25'))
+        self.assertEqual(total_money(), before + Money('50.25'))
+
+    def test_credit_without_a_slot_goes_to_the_balance(self):
+        self.split(2)
+        account = self.reload()
+        # As if a concurrent re-split had removed the slots
+        AccountBalanceShard.objects.using(self.db).filter(account_id=account.pk).delete()
+
+        account.credit_sub_balance(30)
+
+        self.assertEqual(self.reload().balance, 1030)
+
+    def test_fold_moves_sub_balances_into_the_balance(self):
+        self.split(3)
+        account = self.reload()
+        for _ in range(4):
+            account.credit_sub_balance(10)
+        before = total_money()
+
+        with transaction.atomic(using=self.db):
+            account = Account.objects.using(self.db).select_for_update().get(pk=account.pk)
+            account.fold_sub_balances()
+            account.save()
+
+        self.assertEqual(self.reload().balance, 1040)
+        self.assertEqual(self.parked(), [0, 0, 0])
+        self.assertEqual(total_money(), before)
+
+    def test_command_splits_and_folds_back(self):
+        before = total_money()
+
+        self.assertIn('now has 4 sub-balance(s); total $1000.00', self.split(4))
+        self.assertEqual((self.reload().balance_shards, self.parked()), (4, [0, 0, 0, 0]))
+        self.reload().credit_sub_balance(75)
+
+        # Re-splitting folds first, then resetting to 0 folds everything back
+        self.split(2)
+        self.assertEqual((self.reload().balance, self.parked()), (1075, [0, 0]))
+        self.reload().credit_sub_balance(25)
+        self.assertIn('now has 0 sub-balance(s); total $1100.00', self.split(0))
+
+        account = self.reload()
+        self.assertEqual((account.balance_shards, account.balance, self.parked()), (0, 1100, []))
+        self.assertEqual(total_money(), before + 100)
+
+    def test_command_rejects_bad_input(self):
+        with self.assertRaisesMessage(CommandError, 'shards must be zero or positive'):
+            self.split(-1)
+        with self.assertRaisesMessage(CommandError, 'Account not found'):
+            call_command('set_balance_shards', '000000000000', 2, stdout=StringIO())
+
+    def test_transfers_through_a_hot_account_conserve_money(self):
+        self.split(4)
+        payer = make_account(500, shard=self.db)
+        payee = make_account(0, shard=shard_aliases()[0])
+        before = total_money()
+
+        transfers.transfer(payer.user, self.account.account_number, 300)
+        self.assertEqual((self.reload().balance, balance_of(self.account)), (1000, 1300))
+        # More than the main balance: the debit folds the sub-balances first
+        transfers.transfer(self.account.user, payee.account_number, 1200)
+
+        self.assertEqual(balance_of(self.account), 100)
+        self.assertEqual(balance_of(payer), 200)
+        self.assertEqual(balance_of(payee), 1200)
+        self.assertEqual(total_money(), before)
+
+    def test_balance_endpoint_includes_sub_balances(self):
+        self.split(2)
+        self.reload().credit_sub_balance('12.50')
+        client = APIClient()
+        client.force_authenticate(self.account.user)
+
+        response = client.get('/api/auth/balance/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['balance'], '1012.50')
+
+
+class ProvisioningTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.staff = make_account().user
+        self.staff.is_staff = True
+        self.staff.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def records(self, count, prefix='new'):
+        return [
+            {'username': f'{prefix}{i}', 'email': f'{prefix}{i}@example.com', 'first_name': 'New',
+             'last_name': 'User', 'password': f'secret-{i}'}
+            for i in range(count)
+        ]
+
+    def test_request_returns_a_job_and_runs_it_after_commit(self):
+        users = self.records(3) + [{'username': 'broken'}]
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post('/api/auth/provision/', {'users': users}, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        job = response.json()['job']
+        self.assertEqual((job['status'], job['total'], job['created']), ('PENDING', 4, 0))
+        self.assertFalse(User.objects.filter(username='new0').exists())
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(
+            ProvisioningJob.objects.get(job_id=job['job_id']).runner, f'{socket.gethostname()}:{os.getpid()}'
+        )
+
+        # What the background thread does, run here so it shares the test transaction
+        provisioning.run_job(ProvisioningJob.objects.get(job_id=job['job_id']).pk, users, 'plain')
+
+        job = self.client.get(f"/api/auth/provision/{job['job_id']}/").json()
+        self.assertEqual((job['status'], job['created']), ('COMPLETED', 3))
+        self.assertEqual(job['errors'], [{'index': 4, 'error': 'email is required'}])
+        self.assertIsNotNone(job['finished_at'])
+        user = User.objects.get(username='new2')
+        self.assertTrue(user.check_password('secret-2'))
+        self.assertTrue(Account.objects.using(shard_for_user_id(user.pk)).filter(user_id=user.pk).exists())
+
+    def test_limits_and_unknown_job(self):
+        response = self.client.post('/api/auth/provision/', {'users': self.records(101)}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ProvisioningJob.objects.exists())
+        response = self.client.get('/api/auth/provision/00000000-0000-0000-0000-000000000000/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_command_reports_a_running_total(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as stream:
+            stream.write('\n'.join(json.dumps(record) for record in self.records(5, prefix='cmd')))
+        self.addCleanup(os.unlink, stream.name)
+        out = StringIO()
+
+        call_command('provision_users', stream.name, batch_size=2, workers=1, verbosity=2, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[:3], ['  2 user(s) created so far', '  4 user(s) created so far',
+                                     '  5 user(s) created so far'])
+        self.assertEqual(lines[-1], 'Created 5 user(s); skipped 0.')
+
+
+    def test_explicit_zero_balance_is_kept(self):
+        record = self.records(1)[0]
+        self.assertEqual(provisioning.clean_record({**record, 'balance': 0}, 'plain')['balance'], 0)
+        self.assertEqual(provisioning.clean_record({**record, 'balance': '0.00'}, 'plain')['balance'], 0)
+        for missing in (None, ''):
+            with self.subTest(balance=missing):
+                cleaned = provisioning.clean_record({**record, 'balance': missing}, 'plain')
+                self.assertEqual(cleaned['balance'], provisioning.DEFAULT_BALANCE)
+
+    def test_jobs_of_exited_processes_are_failed(self):
+        host = socket.gethostname()
+        exited = subprocess.Popen(['true'])
+        exited.wait()
+
+        def job(runner, status=ProvisioningJob.RUNNING):
+            return ProvisioningJob.objects.create(password_mode='plain', total=1, runner=runner, status=status)
+
+        orphans = [job(f'{host}:{exited.pid}'), job(f'{host}:{os.getpid()}', ProvisioningJob.PENDING), job('')]
+        alive = job(f'{host}:{os.getppid()}')
+        elsewhere = job(f'other-host:{exited.pid}')
+        finished = job(f'{host}:{exited.pid}', ProvisioningJob.COMPLETED)
+
+        self.assertEqual(provisioning.fail_orphaned_jobs(), 3)
+
+        statuses = dict(ProvisioningJob.objects.values_list('pk', 'status'))
+        self.assertEqual([statuses[j.pk] for j in orphans], ['FAILED'] * 3)
+        self.assertEqual([statuses[j.pk] for j in (alive, elsewhere, finished)], ['RUNNING', 'RUNNING', 'COMPLETED'])
+        self.assertIsNotNone(ProvisioningJob.objects.get(pk=orphans[0].pk).finished_at)
+
+
+class RevocationFilterTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = make_account().user
+
+    def blacklist(self, jti, expires_in=timedelta(hours=1), **fields):
+        now = timezone.now()
+        outstanding = OutstandingToken.objects.create(
+            user=self.user, jti=jti, token=jti, created_at=now, expires_at=now + expires_in,
+        )
+        return BlacklistedToken.objects.create(token=outstanding, **fields)
+
+    def test_rebuild_counts_expired_rows_as_seen(self):
+        live = self.blacklist('live')
+        expired = self.blacklist('expired', expires_in=-timedelta(minutes=1))
+        revocations = RevocationFilter()
+
+        self.assertTrue(revocations.might_contain('live'))
+        self.assertFalse(revocations.might_contain('expired'))
+        self.assertEqual(revocations._last_id, expired.pk)
+        self.assertNotIn(live.pk, revocations._holes)
+
+    def test_sync_picks_up_late_commits_below_the_last_id(self):
+        first = self.blacklist('first')
+        # A revocation whose transaction commits after a higher id is seen
+        self.blacklist('third', id=first.pk + 2)
+        revocations = RevocationFilter()
+        revocations._refresh()
+        self.assertEqual(revocations._holes, {first.pk + 1})
+
+        self.blacklist('second', id=first.pk + 1)
+        revocations._synced_at = 0
+        self.assertTrue(revocations.might_contain('second'))
+        self.assertEqual(revocations._holes, set())
+
+    def test_revoke(self):
+        token = AccessToken.for_user(self.user)
+        self.assertFalse(is_revoked(token['jti']))
+
+        revoke(token, self.user)
+
+        self.assertTrue(is_revoked(token['jti']))
+        self.assertFalse(is_revoked(AccessToken.for_user(self.user)['jti']))
+
+    def test_sync_leaves_out_tokens_that_expired(self):
+        revocations = RevocationFilter()
+        revocations._refresh()
+        expired = self.blacklist('expired', expires_in=-timedelta(minutes=1))
+        live = self.blacklist('live')
+
+        revocations._synced_at = 0
+        self.assertFalse(revocations.might_contain('expired'))
+        self.assertTrue(revocations.might_contain('live'))
+        self.assertEqual(revocations._last_id, live.pk)
+        self.assertNotIn(expired.pk, revocations._holes)
+
+
+class TokenEndpointTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = make_account().user
+        self.client = APIClient()
+
+    def login(self):
+        refresh = RefreshToken.for_user(self.user)
+        return str(refresh), str(refresh.access_token)
+
+    def refresh(self, refresh, access=None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {access}'} if access else {}
+        return self.client.post('/api/auth/token/refresh/', {'refresh': refresh}, format='json', **headers)
+
+    def test_refresh_ignores_an_expired_access_token_and_rotates(self):
+        refresh, _ = self.login()
+        expired = AccessToken.for_user(self.user)
+        expired.set_exp(lifetime=-timedelta(minutes=1))
+
+        response = self.refresh(refresh, access=str(expired))
+
+        self.assertEqual(response.status_code, 200)
+        tokens = response.json()
+        self.assertNotEqual(tokens['refresh'], refresh)
+        profile = self.client.get('/api/auth/profile/', HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(profile.status_code, 200)
+        # The rotated-out token is blacklisted
+        reused = self.refresh(refresh)
+        self.assertEqual(reused.status_code, 401)
+        self.assertEqual(reused.json(), {'error': 'Token is blacklisted'})
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 200)
+
+    def test_logout_revokes_both_tokens(self):
+        refresh, access = self.login()
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {access}'}
+
+        response = self.client.post('/api/auth/logout/', {'refresh': refresh}, format='json', **auth)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/auth/profile/', **auth).status_code, 401)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+    def test_logout_rejects_another_users_refresh_token(self):
+        _, access = self.login()
+        other = RefreshToken.for_user(make_account().user)
+
+        response = self.client.post(
+            '/api/auth/logout/', {'refresh': str(other)}, format='json', HTTP_AUTHORIZATION=f'Bearer {access}',
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Refresh token belongs to another user'})
+        self.assertFalse(is_revoked(other['jti']))
+        self.assertEqual(self.client.get('/api/auth/profile/', HTTP_AUTHORIZATION=f'Bearer {access}').status_code, 200)
+
+
+class AccountNumberFilterTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.filter = AccountNumberFilter()
+        self.filter._refresh()
+        # The filter lookups read, and the one new accounts are pushed into
+        for target in ('accounts.recipients.account_numbers', 'accounts.signals.account_numbers'):
+            patcher = mock.patch(target, self.filter)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_unknown_number_is_answered_without_a_query(self):
+        with self.assertNumQueries(0):
+            for number in ('000000000000', '111111111111', '222222222222', '12345', 'abcdefghijkl'):
+                self.assertFalse(recipients.might_exist(number))
+
+    def test_accounts_opened_here_are_known_at_once(self):
+        account = make_account()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(recipients.might_exist(account.account_number))
+
+    def test_accounts_opened_elsewhere_are_known_after_a_sync(self):
+        with mock.patch('accounts.signals.account_numbers'):
+            # Opened by another process: this filter isn't told about it
+            account = make_account()
+        self.assertFalse(recipients.might_exist(account.account_number))
+
+        self.filter._synced_at = 0
+        with self.assertNumQueries(1):
+            self.assertTrue(recipients.might_exist(account.account_number))
+
+    def test_lookup_queries_only_for_candidates(self):
+        account = make_account()
+
+        with self.assertNumQueries(1):
+            found = recipients.lookup(['000000000000', account.account_number, 'not-a-number'])
+
+        self.assertEqual(list(found), [account.account_number])
@@ -0,0 +1,397 @@
+# backend/accounts/transfers.py
+
+import logging
+import uuid
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+
+from mockbanking import events
+from mockbanking.sharding import db_for_user, shard_for_user_id
+from .models import Account, AccountDirectory, QueuedTransfer, TransferInbox, TransferOutbox, User
+
+logger = logging.getLogger(__name__)
+
+
+class TransferError(Exception):
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _describe(prefix, description):
+    return prefix + (f" - {description}" if description else "")
+
+
+def _record(db, **fields):
+    from transactions.models import Transaction
+    return Transaction.objects.using(db).create(moves_balance=True, **fields)
+
+
+def _deliver_all(outboxes):
+    for outbox in outboxes:
+        try:
+            deliver(outbox)
+        except Exception:
+            logger.exception("Delivery of transfer %s deferred to the relay", outbox.transfer_id)
+
+
+def transfer(sender_user, recipient_account_number, amount, description=''):
+    """
+    Move `amount` from `sender_user`'s account to `recipient_account_number`.
+
+    Accounts on the same shard are updated in one local transaction. Across
+    shards the sender is debited together with an outbox row, and the credit
+    is then applied idempotently on the recipient's shard; anything left
+    pending is retried by `manage.py relay_transfers`.
+    """
+    entry = AccountDirectory.objects.filter(account_number=recipient_account_number).first()
+    if entry is None:
+        raise TransferError('Recipient account not found', status.HTTP_404_NOT_FOUND)
+
+    sender_db = db_for_user(sender_user)
+    # Unlocked first look: a transfer that can't be covered fails here
+    # without opening a transaction or locking the sender's row. The
+    # balance is checked again under the lock below.
+    sender_account = Account.objects.using(sender_db).only('balance', 'balance_shards').get(user=sender_user)
+    if sender_account.total_balance < amount:
+        raise TransferError('Insufficient balance')
+
+    recipient_db = shard_for_user_id(entry.user_id)
+    if sender_db == recipient_db:
+        return _transfer_local(sender_db, sender_user, recipient_account_number, amount, description)
+    return _transfer_cross_shard(sender_db, sender_user, entry, amount, description)
+
+
+def _get_recipient(db, account_number):
+    """
+    Lock the recipient's account row, unless it is a hot account with
+    sub-balances: those are credited without taking the row lock at all.
+    """
+    try:
+        return Account.objects.using(db).select_for_update().get(
+            account_number=account_number, balance_shards=0
+        )
+    except Account.DoesNotExist:
+        pass
+    try:
+        return Account.objects.using(db).get(account_number=account_number)
+    except Account.DoesNotExist:
+        raise TransferError('Recipient account not found', status.HTTP_404_NOT_FOUND)
+
+
+def _credit(account, amount):
+    """Credit an account fetched by `_get_recipient` and return its new total balance."""
+    if account.balance_shards:
+        account.credit_sub_balance(amount)
+        return account.total_balance
+    account.balance += amount
+    account.save()
+    return account.balance
+
+
+def _transfer_local(db, sender_user, recipient_account_number, amount, description):
+    with transaction.atomic(using=db):
+        sender_account = Account.objects.using(db).select_for_update().get(user=sender_user)
+
+        recipient_account = _get_recipient(db, recipient_account_number)
+
+        if sender_account.balance < amount:
+            sender_account.fold_sub_balances()
+        if sender_account.balance < amount:
+            raise TransferError('Insufficient balance')
+
+        if sender_account == recipient_account:
+            raise TransferError('Cannot transfer money to your own account')
+
+        sender_account.balance -= amount
+        sender_account.save()
+        recipient_balance = _credit(recipient_account, amount)
+
+        _record(
+            db,
+            user=sender_user,
+            transaction_type='DEBIT',
+            amount=amount,
+            description=_describe(f"Transfer to {recipient_account.account_number}", description),
+            recipient_account_number=recipient_account_number,
+            balance_after_transaction=sender_account.balance,
+        )
+        _record(
+            db,
+            user=recipient_account.user,
+            transaction_type='CREDIT',
+            amount=amount,
+            description=_describe(f"Transfer from {sender_account.account_number}", description),
+            sender_account_number=sender_account.account_number,
+            balance_after_transaction=recipient_balance,
+        )
+
+    return {
+        'amount': amount,
+        'recipient': recipient_account.user.get_full_name(),
+        'recipient_account': recipient_account_number,
+        'new_balance': sender_account.balance,
+        'description': description,
+    }
+
+
+def _transfer_cross_shard(sender_db, sender_user, entry, amount, description):
+    with transaction.atomic(using=sender_db):
+        sender_account = Account.objects.using(sender_db).select_for_update().get(user=sender_user)
+
+        if sender_account.balance < amount:
+            sender_account.fold_sub_balances()
+        if sender_account.balance < amount:
+            raise TransferError('Insufficient balance')
+
+        sender_account.balance -= amount
+        sender_account.save()
+
+        _record(
+            sender_db,
+            user=sender_user,
+            transaction_type='DEBIT',
+            amount=amount,
+            description=_describe(f"Transfer to {entry.account_number}", description),
+            recipient_account_number=entry.account_number,
+            balance_after_transaction=sender_account.balance,
+        )
+        outbox = TransferOutbox.objects.using(sender_db).create(
+            sender=sender_user,
+            sender_account_number=sender_account.account_number,
+            recipient_account_number=entry.account_number,
+            recipient_user_id=entry.user_id,
+            amount=amount,
+            description=description,
+        )
+
+    # The debit is durable from here on; a failed delivery is retried later.
+    _deliver_all([outbox])
+
+    return {
+        'amount': amount,
+        'recipient': User.objects.get(pk=entry.user_id).get_full_name(),
+        'recipient_account': entry.account_number,
+        'new_balance': sender_account.balance,
+        'description': description,
+    }
+
+
+def deliver(outbox):
+    """
+    Apply a pending outbox entry on the recipient's shard. Safe to call any
+    number of times: the inbox row makes the credit happen at most once.
+    """
+    sender_db = outbox._state.db
+    recipient_db = shard_for_user_id(outbox.recipient_user_id)
+
+    TransferOutbox.objects.using(sender_db).filter(pk=outbox.pk).update(attempts=outbox.attempts + 1)
+
+    try:
+        with transaction.atomic(using=recipient_db):
+            _, created = TransferInbox.objects.using(recipient_db).get_or_create(
+                transfer_id=outbox.transfer_id
+            )
+            if created:
+                recipient_account = _get_recipient(recipient_db, outbox.recipient_account_number)
+                recipient_balance = _credit(recipient_account, outbox.amount)
+
+                _record(
+                    recipient_db,
+                    user_id=recipient_account.user_id,
+                    transaction_type='CREDIT',
+                    amount=outbox.amount,
+                    description=_describe(f"Transfer from {outbox.sender_account_number}", outbox.description),
+                    sender_account_number=outbox.sender_account_number,
+                    balance_after_transaction=recipient_balance,
+                )
+    except TransferError:
+        refund(outbox)
+        return
+
+    TransferOutbox.objects.using(sender_db).filter(
+        pk=outbox.pk, status=TransferOutbox.PENDING
+    ).update(status=TransferOutbox.DELIVERED)
+
+
+def refund(outbox):
+    """Compensate a transfer whose recipient account no longer exists."""
+    sender_db = outbox._state.db
+    with transaction.atomic(using=sender_db):
+        updated = TransferOutbox.objects.using(sender_db).filter(
+            pk=outbox.pk, status=TransferOutbox.PENDING
+        ).update(status=TransferOutbox.REFUNDED)
+        if not updated:
+            return
+
+        sender_account = Account.objects.using(sender_db).select_for_update().get(
+            account_number=outbox.sender_account_number
+        )
+        sender_account.balance += outbox.amount
+        sender_account.save()
+
+        _record(
+            sender_db,
+            user_id=sender_account.user_id,
+            transaction_type='CREDIT',
+            amount=outbox.amount,
+            description=f"Refund: transfer to {outbox.recipient_account_number} could not be delivered",
+            sender_account_number=outbox.recipient_account_number,
+            balance_after_transaction=sender_account.balance,
+        )
+
+
+def enqueue(sender_user, recipient_account_number, amount, description=''):
+    """Accept a transfer for asynchronous processing and return the queue entry."""
+    return QueuedTransfer.objects.db_manager(db_for_user(sender_user)).create(
+        sender=sender_user,
+        recipient_account_number=recipient_account_number,
+        amount=amount,
+        description=description,
+    )
+
+
+def process_queue(db, batch_size=500):
+    """
+    Apply up to `batch_size` pending queued transfers on shard `db` in one
+    database transaction. Every account involved is locked and saved once
+    for the whole batch, however many transfers touch it; the transfers
+    themselves are applied in arrival order. Returns the number processed.
+    """
+    from transactions.models import Transaction
+
+    batch_id = uuid.uuid4()
+    outboxes = []
+
+    with transaction.atomic(using=db):
+        # Claim the batch; a concurrent worker's claim only matches rows that
+        # are still pending, so no transfer is applied twice.
+        pending_ids = list(
+            QueuedTransfer.objects.using(db)
+            .filter(status=QueuedTransfer.PENDING)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        claimed = QueuedTransfer.objects.using(db).filter(
+            id__in=pending_ids, status=QueuedTransfer.PENDING
+        ).update(batch_id=batch_id)
+        if not claimed:
+            return 0
+        queued = list(QueuedTransfer.objects.using(db).filter(batch_id=batch_id).order_by('id'))
+
+        directory = dict(
+            AccountDirectory.objects.filter(
+                account_number__in={q.recipient_account_number for q in queued}
+            ).values_list('account_number', 'user_id')
+        )
+        local_numbers = [
+            number for number, user_id in directory.items() if shard_for_user_id(user_id) == db
+        ]
+
+        # Lock senders and local recipients once each, in a stable order. Hot
+        # recipients with sub-balances are read without a lock and credited
+        # once per batch below.
+        by_user, by_number = {}, {}
+        for account in Account.objects.using(db).select_for_update().filter(
+            Q(user_id__in={q.sender_id for q in queued}) | Q(account_number__in=local_numbers, balance_shards=0)
+        ).order_by('id'):
+            account.fold_sub_balances()
+            by_user[account.user_id] = account
+            by_number[account.account_number] = account
+        hot_accounts, hot_totals = {}, {}
+        for account in Account.objects.using(db).filter(account_number__in=local_numbers).exclude(
+            account_number__in=list(by_number)
+        ):
+            by_number[account.account_number] = account
+            hot_accounts[account.pk] = account
+            hot_totals[account.pk] = account.total_balance
+
+        touched = {}
+        hot_credits = {}
+        records = []
+        now = timezone.now()
+        for queued_transfer in queued:
+            sender_account = by_user.get(queued_transfer.sender_id)
+            recipient_user_id = directory.get(queued_transfer.recipient_account_number)
+            recipient_account = by_number.get(queued_transfer.recipient_account_number)
+            is_local = recipient_user_id is not None and shard_for_user_id(recipient_user_id) == db
+            amount = queued_transfer.amount
+            description = queued_transfer.description
+
+            if sender_account is None:
+                error = 'Account not found'
+            elif recipient_user_id is None or (is_local and recipient_account is None):
+                error = 'Recipient account not found'
+            elif sender_account.balance < amount:
+                error = 'Insufficient balance'
+            elif sender_account == recipient_account:
+                error = 'Cannot transfer money to your own account'
+            else:
+                error = ''
+
+            queued_transfer.processed_at = now
+            if error:
+                queued_transfer.status = QueuedTransfer.FAILED
+                queued_transfer.error = error
+                continue
+
+            sender_account.balance -= amount
+            touched[sender_account.pk] = sender_account
+            records.append(Transaction(
+                user_id=sender_account.user_id,
+                transaction_type='DEBIT',
+                amount=amount,
+                description=_describe(f"Transfer to {queued_transfer.recipient_account_number}", description),
+                recipient_account_number=queued_transfer.recipient_account_number,
+                balance_after_transaction=sender_account.balance,
+                moves_balance=True,
+            ))
+
+            if is_local:
+                if recipient_account.pk in hot_totals:
+                    hot_credits[recipient_account.pk] = hot_credits.get(recipient_account.pk, 0) + amount
+                    hot_totals[recipient_account.pk] += amount
+                    recipient_balance = hot_totals[recipient_account.pk]
+                else:
+                    recipient_account.balance += amount
+                    touched[recipient_account.pk] = recipient_account
+                    recipient_balance = recipient_account.balance
+                records.append(Transaction(
+                    user_id=recipient_account.user_id,
+                    transaction_type='CREDIT',
+                    amount=amount,
+                    description=_describe(f"Transfer from {sender_account.account_number}", description),
+                    sender_account_number=sender_account.account_number,
+                    balance_after_transaction=recipient_balance,
+                    moves_balance=True,
+                ))
+            else:
+                outboxes.append(TransferOutbox(
+                    transfer_id=queued_transfer.transfer_id,
+                    sender_id=sender_account.user_id,
+                    sender_account_number=sender_account.account_number,
+                    recipient_account_number=queued_transfer.recipient_account_number,
+                    recipient_user_id=recipient_user_id,
+                    amount=amount,
+                    description=description,
+                ))
+            queued_transfer.status = QueuedTransfer.COMPLETED
+
+        for account in touched.values():
+            account.save(update_fields=['balance', 'updated_at'])
+        for account_pk, amount in hot_credits.items():
+            hot_accounts[account_pk].credit_sub_balance(amount)
+        Transaction.objects.using(db).bulk_create(records)
+        events.publish_transactions(records, db)
+        TransferOutbox.objects.using(db).bulk_create(outboxes)
+        QueuedTransfer.objects.using(db).bulk_update(queued, ['status', 'error', 'processed_at'])
+
+    if outboxes:
+        _deliver_all(TransferOutbox.objects.using(db).filter(
+            transfer_id__in=[outbox.transfer_id for outbox in outboxes]
+        ))
+    return len(queued)
@@ -6,7 +6,14 @@ from . import views
 urlpatterns = [
     path('register/', views.register_user, name='register'),
     path('login/', views.login_user, name='login'),
+    path('logout/', views.logout_user, name='logout'),
+    path('token/refresh/', views.refresh_token, name='token_refresh'),
+    path('stream-ticket/', views.stream_ticket, name='stream_ticket'),
+    path('provision/', views.provision_users, name='provision'),
+    path('provision/<uuid:job_id>/', views.provisioning_status, name='provisioning_status'),
     path('profile/', views.get_user_profile, name='profile'),
     path('balance/', views.get_account_balance, name='balance'),
+    path('recipients/', views.lookup_recipients, name='recipient_lookup'),
     path('transfer/', views.transfer_money, name='transfer'),
+    path('transfer/<uuid:transfer_id>/', views.transfer_status, name='transfer_status'),
 ]
\ No newline at end of file
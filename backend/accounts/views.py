@@ -1,20 +1,33 @@
 # backend/accounts/views.py
-from decimal import Decimal
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.db import transaction
-from .models import Account
+from mockbanking.money import Money
+from mockbanking.sharding import db_for_user
+from mockbanking.sse import issue_ticket
+from . import provisioning, recipients, transfers
+from .revocation import revoke
+from .models import Account, ProvisioningJob, QueuedTransfer
 from .serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
     AccountSerializer,
-    UserProfileSerializer
+    UserProfileSerializer,
+    ProvisioningJobSerializer,
+    QueuedTransferSerializer
 )
 
 
+# Requests are provisioned in the background; larger imports belong to the command
+PROVISION_MAX_USERS = 100
+RECIPIENT_LOOKUP_MAX = 20
+
+
 def get_tokens_for_user(user):
     refresh = RefreshToken.for_user(user)
     return {
@@ -46,6 +59,48 @@ def register_user(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def provision_users(request):
+    # Bulk registration for staff: {"password_mode": "plain", "users": [{...}, ...]}
+    users = request.data.get('users')
+    password_mode = request.data.get('password_mode', 'plain')
+    if not isinstance(users, list) or not users:
+        return Response({
+            'error': 'users must be a non-empty list'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(users) > PROVISION_MAX_USERS:
+        return Response({
+            'error': f'At most {PROVISION_MAX_USERS} users per request; use manage.py provision_users for more'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if password_mode not in provisioning.PASSWORD_MODES:
+        return Response({
+            'error': f"password_mode must be one of: {', '.join(provisioning.PASSWORD_MODES)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # Hashing up to 100 passwords takes seconds, so answer right away and
+    # let the caller poll the job
+    job = provisioning.start_job(users, password_mode, request.user)
+    return Response({
+        'message': 'Provisioning started',
+        'job': ProvisioningJobSerializer(job).data,
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def provisioning_status(request, job_id):
+    try:
+        job = ProvisioningJob.objects.get(job_id=job_id)
+    except ProvisioningJob.DoesNotExist:
+        return Response({
+            'error': 'Provisioning job not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = ProvisioningJobSerializer(job)
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def login_user(request):
@@ -69,11 +124,53 @@ def login_user(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def refresh_token(request):
+    # Rotates the refresh token; the old one is blacklisted. The access token
+    # is usually expired by now, so a stale Authorization header is ignored.
+    serializer = TokenRefreshSerializer(data=request.data)
+    try:
+        serializer.is_valid(raise_exception=True)
+    except TokenError as e:
+        # Without an authenticator DRF would turn InvalidToken into a 403
+        return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+    return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def logout_user(request):
+    # Revokes the access token used for this request and, if given, the refresh token
+    refresh = request.data.get('refresh')
+    if refresh:
+        try:
+            refresh = RefreshToken(refresh)
+        except TokenError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if str(refresh.get(api_settings.USER_ID_CLAIM)) != str(request.user.pk):
+            return Response({
+                'error': 'Refresh token belongs to another user'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        revoke(refresh, request.user)
+
+    revoke(request.auth, request.user)
+    return Response({'message': 'Logged out successfully'}, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def stream_ticket(request):
+    # Single-use ticket for opening /api/events/; the stream lasts as long as this access token
+    return Response({'ticket': issue_ticket(request.user.pk, request.auth['exp'])}, status=status.HTTP_201_CREATED)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_account_balance(request):
     try:
-        account = Account.objects.get(user=request.user)
+        account = Account.objects.using(db_for_user(request.user)).get(user=request.user)
         serializer = AccountSerializer(account)
         return Response(serializer.data, status=status.HTTP_200_OK)
     except Account.DoesNotExist:
@@ -102,84 +199,37 @@ def transfer_money(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        amount = Decimal(str(amount))
-        if amount <= 0:
-            return Response({
-                'error': 'Amount must be greater than zero'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        # str() first: JSON numbers arrive as floats
+        amount = Money(str(amount))
     except ValueError:
         return Response({
             'error': 'Invalid amount'
         }, status=status.HTTP_400_BAD_REQUEST)
+    if amount <= 0:
+        return Response({
+            'error': 'Amount must be greater than zero'
+        }, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        with transaction.atomic():
-            # Get sender account
-            sender_account = Account.objects.select_for_update().get(user=request.user)
-
-            # Get recipient account
-            try:
-                recipient_account = Account.objects.select_for_update().get(
-                    account_number=recipient_account_number
-                )
-            except Account.DoesNotExist:
-                return Response({
-                    'error': 'Recipient account not found'
-                }, status=status.HTTP_404_NOT_FOUND)
-
-            # Check if sender has sufficient balance
-            if sender_account.balance < amount:
-                return Response({
-                    'error': 'Insufficient balance'
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            # Check if trying to transfer to own account
-            if sender_account == recipient_account:
-                return Response({
-                    'error': 'Cannot transfer money to your own account'
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            # Perform the transfer
-            sender_account.balance -= amount
-            recipient_account.balance += amount
-
-            sender_account.save()
-            recipient_account.save()
-
-            # Create transaction records (we'll import this from transactions app)
-            from transactions.models import Transaction
-
-            # Create debit transaction for sender
-            Transaction.objects.create(
-                user=request.user,
-                transaction_type='DEBIT',
-                amount=amount,
-                description=f"Transfer to {recipient_account.account_number}" + (
-                    f" - {description}" if description else ""),
-                recipient_account_number=recipient_account_number
-            )
-
-            # Create credit transaction for recipient
-            Transaction.objects.create(
-                user=recipient_account.user,
-                transaction_type='CREDIT',
-                amount=amount,
-                description=f"Transfer from {sender_account.account_number}" + (
-                    f" - {description}" if description else ""),
-                sender_account_number=sender_account.account_number
-            )
+    # Mistyped account numbers are rejected here, before any query or row lock
+    if not recipients.might_exist(str(recipient_account_number)):
+        return Response({
+            'error': 'Recipient account not found'
+        }, status=status.HTTP_404_NOT_FOUND)
 
-            return Response({
-                'message': 'Transfer successful',
-                'transaction': {
-                    'amount': amount,
-                    'recipient': recipient_account.user.get_full_name(),
-                    'recipient_account': recipient_account_number,
-                    'new_balance': float(sender_account.balance),
-                    'description': description
-                }
-            }, status=status.HTTP_200_OK)
+    # Async mode: accept into the transfer queue and let a worker apply it
+    if str(request.data.get('async', '')).lower() in ('1', 'true', 'yes'):
+        queued = transfers.enqueue(request.user, recipient_account_number, amount, description)
+        return Response({
+            'message': 'Transfer queued',
+            'transfer': QueuedTransferSerializer(queued).data
+        }, status=status.HTTP_202_ACCEPTED)
 
+    try:
+        result = transfers.transfer(request.user, recipient_account_number, amount, description)
+    except transfers.TransferError as e:
+        return Response({
+            'error': e.message
+        }, status=e.status_code)
     except Account.DoesNotExist:
         return Response({
             'error': 'Account not found'
@@ -188,3 +238,52 @@ def transfer_money(request):
         return Response({
             'error': f'Transfer failed: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response({
+        'message': 'Transfer successful',
+        'transaction': result
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def lookup_recipients(request):
+    # ?account_number=123456789012&account_number=... (or comma-separated)
+    numbers = list(dict.fromkeys(
+        number.strip()
+        for value in request.query_params.getlist('account_number')
+        for number in value.split(',')
+        if number.strip()
+    ))
+    if not numbers:
+        return Response({
+            'error': 'account_number is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if len(numbers) > RECIPIENT_LOOKUP_MAX:
+        return Response({
+            'error': f'At most {RECIPIENT_LOOKUP_MAX} account numbers per request'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    holders = recipients.lookup(numbers)
+    return Response({
+        'results': [
+            {'account_number': number, 'exists': number in holders, 'holder_name': holders.get(number)}
+            for number in numbers
+        ]
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def transfer_status(request, transfer_id):
+    try:
+        queued = QueuedTransfer.objects.using(db_for_user(request.user)).get(
+            transfer_id=transfer_id, sender=request.user
+        )
+    except QueuedTransfer.DoesNotExist:
+        return Response({
+            'error': 'Transfer not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = QueuedTransferSerializer(queued)
+    return Response(serializer.data, status=status.HTTP_200_OK)
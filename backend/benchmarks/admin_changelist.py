@@ -0,0 +1,115 @@
+# backend/benchmarks/admin_changelist.py
+#
+# Admin changelist response times on a seeded transactions table, with
+# ADMIN_PERFORMANCE_MODE on and off.
+#
+#   cd backend && python -m benchmarks.admin_changelist [--rows 200000] [--users 1000]
+#
+# Absolute numbers on SQLite are small; what matters is how the "off" column
+# grows with --rows (COUNT(*) and deep OFFSETs) while "on" stays flat.
+
+import argparse
+import random
+from datetime import timedelta
+from decimal import Decimal
+from urllib.parse import quote
+
+from .common import create_users, setup_django, timed
+
+
+def seed(accounts, rows, batch_size=5000):
+    from django.utils import timezone
+    from mockbanking.sharding import shard_for_user_id
+    from transactions.models import Transaction
+
+    # Spread timestamps over the last year instead of "now"
+    field = Transaction._meta.get_field('timestamp')
+    field.auto_now_add = False
+    now = timezone.now()
+    rng = random.Random(0)
+    try:
+        batches = {}
+        for i in range(rows):
+            sender, recipient = rng.sample(accounts, 2)
+            db = shard_for_user_id(sender.user_id)
+            batch = batches.setdefault(db, [])
+            batch.append(Transaction(
+                user_id=sender.user_id,
+                transaction_type='DEBIT',
+                amount=Decimal(rng.randint(100, 100000)) / 100,
+                description=f'Transfer to {recipient.account_number}',
+                recipient_account_number=recipient.account_number,
+                timestamp=now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600)),
+                balance_after_transaction=Decimal('1000.00'),
+            ))
+            if len(batch) >= batch_size:
+                Transaction.objects.using(db).bulk_create(batch)
+                batch.clear()
+        for db, batch in batches.items():
+            Transaction.objects.using(db).bulk_create(batch)
+    finally:
+        field.auto_now_add = True
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--shards', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django(shards=args.shards)
+
+    from django.conf import settings
+    from django.db import connections
+    from django.test import Client, override_settings
+    from django.utils import timezone
+    from accounts.models import User
+    from mockbanking.sharding import shard_aliases
+    from transactions.models import Transaction
+
+    settings.ALLOWED_HOSTS = ['testserver']
+    accounts = create_users(args.users)
+    seed(accounts, args.rows)
+    for alias in shard_aliases():
+        with connections[alias].cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    admin = User.objects.create_superuser('bench-admin', 'admin@example.com', 'x')
+    client = Client()
+    client.force_login(admin)
+
+    url = '/admin/transactions/transaction/'
+    per_page = 20
+    depth = min(args.rows // 2, 5000 * per_page)
+    # The row just before the deep page, to start a cursor page at the same depth
+    last = (
+        Transaction.objects.using(shard_aliases()[0])
+        .order_by('-timestamp', '-id').values_list('timestamp', 'id')[depth // len(shard_aliases()) - 1]
+    )
+    since = (timezone.now() - timedelta(days=30)).isoformat()
+
+    scenarios = [
+        ('first page', url, url),
+        (f'page at row ~{depth}', f'{url}?p={depth // per_page + 1}', f'{url}?cursor={quote(str(last[0]))}|{last[1]}'),
+        ('search by account number', f'{url}?q={accounts[0].account_number}', f'{url}?q={accounts[0].account_number}'),
+        ('last 30 days', f'{url}?timestamp__gte={quote(since)}', f'{url}?timestamp__gte={quote(since)}'),
+        ('accounts, first page', '/admin/accounts/account/', '/admin/accounts/account/'),
+    ]
+
+    print(f"{args.rows} transactions, {args.users} accounts, {args.shards} shard(s)")
+    for mode in (False, True):
+        with override_settings(ADMIN_PERFORMANCE_MODE=mode):
+            print(f"ADMIN_PERFORMANCE_MODE={mode}")
+            for label, off_url, on_url in scenarios:
+                target = on_url if mode else off_url
+                client.get(target)  # warm caches
+                with timed(f'  {label}', args.repeat):
+                    for _ in range(args.repeat):
+                        response = client.get(target)
+                        assert response.status_code == 200, (target, response.status_code)
+
+
+if __name__ == '__main__':
+    main()
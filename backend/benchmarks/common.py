@@ -0,0 +1,63 @@
+# backend/benchmarks/common.py
+#
+# Shared setup for the benchmark scripts. Each run gets throwaway SQLite
+# databases in a temporary directory, so benchmarks never touch db.sqlite3.
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+def setup_django(shards=1, use_sqlite=True):
+    """
+    Configure Django against throwaway databases. With `use_sqlite` each
+    shard gets a SQLite file in a temp directory; otherwise the configured
+    databases are used as-is, so only point them at scratch databases.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mockbanking.settings')
+    os.environ['MOCKBANKING_SHARD_COUNT'] = str(shards)
+
+    from django.conf import settings
+
+    workdir = tempfile.mkdtemp(prefix='mockbanking-bench-')
+    if use_sqlite:
+        for alias, database in settings.DATABASES.items():
+            database['NAME'] = os.path.join(workdir, f'{alias}.sqlite3')
+            # Concurrent benchmarks queue on SQLite's write lock instead of
+            # failing when a reader tries to upgrade mid-transaction
+            database.setdefault('OPTIONS', {}).update(timeout=60, transaction_mode='IMMEDIATE')
+    # Cheap hashing: benchmarks measure the banking paths, not PBKDF2
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate_shards', verbosity=0)
+    return workdir
+
+
+def create_users(count, balance=5000, prefix='bench'):
+    """Create `count` users with funded accounts; returns the accounts."""
+    from accounts.models import Account, User
+    from mockbanking.sharding import shard_for_user_id
+
+    accounts = []
+    for i in range(count):
+        user = User.objects.create(
+            username=f'{prefix}{i}', email=f'{prefix}{i}@example.com',
+            first_name='Bench', last_name=str(i),
+        )
+        account = Account(user=user, balance=balance)
+        account.save(using=shard_for_user_id(user.pk))
+        accounts.append(account)
+    return accounts
+
+
+@contextmanager
+def timed(label, operations):
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {operations:>8} ops  {elapsed:8.3f}s  {operations / elapsed:10.1f} ops/s")
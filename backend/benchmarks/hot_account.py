@@ -0,0 +1,62 @@
+# backend/benchmarks/hot_account.py
+#
+# Many concurrent senders paying one merchant account, with the merchant's
+# balance split over K sub-balance rows.
+#
+#   cd backend && python -m benchmarks.hot_account [--threads 8] [--shards-list 0,1,4,16]
+#
+# SQLite takes a database-wide write lock, so with the default throwaway
+# SQLite files the numbers mostly show the overhead of the sub-balance path.
+# Row-lock contention (and K scaling) shows up on PostgreSQL: point
+# DATABASES['default'] at a scratch Postgres database and pass --no-sqlite.
+
+import argparse
+import threading
+from decimal import Decimal
+
+from .common import create_users, setup_django, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--transfers-per-thread', type=int, default=100)
+    parser.add_argument('--shards-list', default='0,1,4,16')
+    parser.add_argument('--no-sqlite', action='store_true',
+                        help="Use the configured database instead of throwaway SQLite files.")
+    args = parser.parse_args()
+
+    setup_django(use_sqlite=not args.no_sqlite)
+
+    from django.core.management import call_command
+    from django.db import connections
+    from accounts import transfers
+    from accounts.models import Account
+
+    for k in [int(value) for value in args.shards_list.split(',')]:
+        prefix = f'hot{k}_'
+        accounts = create_users(args.threads + 1, balance=10 ** 6, prefix=prefix)
+        merchant, senders = accounts[0], accounts[1:]
+        call_command('set_balance_shards', merchant.account_number, str(k), stdout=open('/dev/null', 'w'))
+
+        def pay(sender):
+            try:
+                for _ in range(args.transfers_per_thread):
+                    transfers.transfer(sender.user, merchant.account_number, Decimal('1.00'))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=pay, args=(sender,)) for sender in senders]
+        with timed(f'credits to hot account, K={k}', args.threads * args.transfers_per_thread):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        expected = 10 ** 6 + args.threads * args.transfers_per_thread
+        total = Account.objects.using(merchant._state.db).get(pk=merchant.pk).total_balance
+        assert total == expected, (total, expected)
+
+
+if __name__ == '__main__':
+    main()
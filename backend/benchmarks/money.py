@@ -0,0 +1,76 @@
+# backend/benchmarks/money.py
+#
+# Money stored as integer cents: summing a user's history in Python versus
+# in SQL, Decimal versus integer arithmetic, and plain transfer throughput.
+#
+#   cd backend && python -m benchmarks.money [--transactions 50000] [--transfers 2000]
+
+import argparse
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from .common import create_users, setup_django, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--transactions', type=int, default=50000)
+    parser.add_argument('--transfers', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.db.models import Q, Sum
+    from django.utils import timezone
+    from accounts import transfers
+    from mockbanking.money import Money
+    from transactions.models import Transaction
+
+    sender, recipient = create_users(2, balance=10 ** 9)
+    rng = random.Random(7)
+    now = timezone.now()
+    Transaction.objects.bulk_create([
+        Transaction(
+            user_id=sender.user_id,
+            transaction_type=rng.choice(('CREDIT', 'DEBIT')),
+            amount=Money.from_cents(rng.randint(1, 10 ** 7)),
+            timestamp=now - timedelta(minutes=i),
+            balance_after_transaction=Money(1000),
+        )
+        for i in range(args.transactions)
+    ], batch_size=2000)
+    history = Transaction.objects.filter(user_id=sender.user_id)
+
+    with timed('summary: Python sum() over rows', args.repeat):
+        for _ in range(args.repeat):
+            python_totals = [
+                sum((t.amount for t in history.filter(transaction_type=kind)), Money(0))
+                for kind in ('CREDIT', 'DEBIT')
+            ]
+    with timed('summary: SQL aggregate', args.repeat):
+        for _ in range(args.repeat):
+            totals = history.order_by().aggregate(
+                credits=Sum('amount', filter=Q(transaction_type='CREDIT')),
+                debits=Sum('amount', filter=Q(transaction_type='DEBIT')),
+            )
+    assert python_totals == [totals['credits'], totals['debits']], (python_totals, totals)
+
+    cents = list(history.values_list('amount', flat=True))
+    decimals = [amount.to_decimal() for amount in cents]
+    with timed('add amounts as Decimal', len(decimals) * args.repeat):
+        for _ in range(args.repeat):
+            decimal_total = sum(decimals, Decimal('0.00'))
+    with timed('add amounts as integer cents', len(cents) * args.repeat):
+        for _ in range(args.repeat):
+            cent_total = sum(amount.cents for amount in cents)
+    assert Money.from_cents(cent_total) == decimal_total
+
+    with timed('transfers', args.transfers):
+        for _ in range(args.transfers):
+            transfers.transfer(sender.user, recipient.account_number, Money('1.25'))
+
+
+if __name__ == '__main__':
+    main()
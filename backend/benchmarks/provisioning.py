@@ -0,0 +1,82 @@
+# backend/benchmarks/provisioning.py
+#
+# Bulk provisioning (manage.py provision_users) against one-at-a-time
+# registration through UserRegistrationSerializer, with Django's default
+# PBKDF2 hasher.
+#
+#   cd backend && python -m benchmarks.provisioning [--users 2000] [--workers 8] [--shards 1]
+
+import argparse
+import json
+import os
+
+from .common import setup_django, timed
+
+
+def write_input(path, prefix, count):
+    with open(path, 'w') as f:
+        for i in range(count):
+            f.write(json.dumps({
+                'username': f'{prefix}{i}', 'email': f'{prefix}{i}@example.com',
+                'first_name': 'Bulk', 'last_name': str(i), 'password': f'Pw-{prefix}-{i}-x9!',
+            }) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--serial-users', type=int, default=50,
+                        help="Users registered one at a time for the baseline.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--shards', type=int, default=1)
+    args = parser.parse_args()
+
+    workdir = setup_django(shards=args.shards)
+
+    from django.conf import global_settings, settings
+    from django.core.management import call_command
+    from accounts.models import Account
+    from accounts.serializers import UserRegistrationSerializer
+    from mockbanking.sharding import shard_aliases
+
+    settings.PASSWORD_HASHERS = global_settings.PASSWORD_HASHERS
+
+    with timed('register one at a time', args.serial_users):
+        for i in range(args.serial_users):
+            password = f'Pw-serial-{i}-x9!'
+            serializer = UserRegistrationSerializer(data={
+                'username': f'serial{i}', 'email': f'serial{i}@example.com', 'first_name': 'Serial',
+                'last_name': str(i), 'password': password, 'password_confirm': password,
+            })
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+    for workers in sorted({1, args.workers}):
+        path = os.path.join(workdir, f'users-{workers}.ndjson')
+        write_input(path, f'bulk{workers}_', args.users)
+        with timed(f'provision_users, {workers} worker(s)', args.users):
+            call_command('provision_users', path, workers=workers, verbosity=0, stdout=open(os.devnull, 'w'))
+
+    for mode in ('hashed', 'unusable'):
+        path = os.path.join(workdir, f'users-{mode}.ndjson')
+        write_input(path, f'{mode}_', args.users)
+        if mode == 'hashed':
+            # Low-iteration PBKDF2 hashes stand in for ones exported from another system
+            from django.contrib.auth.hashers import PBKDF2PasswordHasher
+            hasher = PBKDF2PasswordHasher()
+            with open(path) as f:
+                rows = [json.loads(line) for line in f]
+            with open(path, 'w') as f:
+                for row in rows:
+                    row['password'] = hasher.encode(row['password'], hasher.salt(), iterations=1000)
+                    f.write(json.dumps(row) + '\n')
+        with timed(f'provision_users, {mode} passwords', args.users):
+            call_command('provision_users', path, password_mode=mode, verbosity=0, stdout=open(os.devnull, 'w'))
+
+    expected = args.serial_users + args.users * (len({1, args.workers}) + 2)
+    total = sum(Account.objects.using(alias).count() for alias in shard_aliases())
+    assert total == expected, (total, expected)
+
+
+if __name__ == '__main__':
+    main()
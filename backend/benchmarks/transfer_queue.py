@@ -0,0 +1,52 @@
+# backend/benchmarks/transfer_queue.py
+#
+# Synchronous transfer_money path vs. queued transfers drained by the batch
+# worker, with many senders paying a small set of recipients.
+#
+#   cd backend && python -m benchmarks.transfer_queue [--transfers 2000] [--shards 1]
+
+import argparse
+import random
+from decimal import Decimal
+
+from .common import create_users, setup_django, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--transfers', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--recipients', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--shards', type=int, default=1)
+    args = parser.parse_args()
+
+    setup_django(args.shards)
+
+    from accounts import transfers
+    from mockbanking.sharding import shard_aliases
+
+    accounts = create_users(args.users)
+    senders, recipients = accounts[args.recipients:], accounts[:args.recipients]
+    rng = random.Random(0)
+    plan = [
+        (rng.choice(senders).user, rng.choice(recipients).account_number, Decimal('1.25'))
+        for _ in range(args.transfers)
+    ]
+
+    with timed('sync transfer()', len(plan)):
+        for user, recipient, amount in plan:
+            transfers.transfer(user, recipient, amount)
+
+    with timed('enqueue()', len(plan)):
+        for user, recipient, amount in plan:
+            transfers.enqueue(user, recipient, amount)
+
+    with timed(f'process_queue(batch_size={args.batch_size})', len(plan)):
+        for alias in shard_aliases():
+            while transfers.process_queue(alias, args.batch_size):
+                pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+# backend/mockbanking/admin_performance.py
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .sharded_admin import ShardedChangeList
+from .sharding import ShardedResults, is_sharded, shard_aliases
+
+CURSOR_VAR = 'cursor'
+
+
+def performance_mode():
+    return getattr(settings, 'ADMIN_PERFORMANCE_MODE', True)
+
+
+def table_row_estimate(alias, table):
+    """Row count from the planner's statistics, or None when there are none."""
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+                row = cursor.fetchone()
+                return row[0] if row and row[0] >= 0 else None
+            if connection.vendor == 'mysql':
+                cursor.execute(
+                    "SELECT table_rows FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name = %s", [table]
+                )
+                row = cursor.fetchone()
+                return row[0] if row else None
+            if connection.vendor == 'sqlite':
+                # Populated by ANALYZE; otherwise the rowid span is a cheap
+                # (index-only) stand-in as long as few rows are deleted.
+                try:
+                    cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+                    row = cursor.fetchone()
+                    if row:
+                        return int(row[0].split()[0])
+                except DatabaseError:
+                    pass
+                quoted = connection.ops.quote_name(table)
+                cursor.execute(f"SELECT MAX(rowid) - MIN(rowid) + 1 FROM {quoted}")
+                row = cursor.fetchone()
+                return row[0] or 0
+    except DatabaseError:
+        return None
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids COUNT(*) over large tables. Unfiltered lists use the
+    planner's row estimate; filtered lists and small tables use an exact count
+    cached for `cache_timeout` seconds.
+    """
+    exact_count_threshold = 10000
+    cache_timeout = 60
+
+    def _count_queryset(self, queryset):
+        # A UNION has no WHERE of its own but is filtered all the same
+        if not queryset.query.where and not queryset.query.combinator:
+            estimate = table_row_estimate(queryset.db, queryset.model._meta.db_table)
+            if estimate is not None and estimate >= self.exact_count_threshold:
+                return estimate
+        try:
+            sql = str(queryset.query)
+        except Exception:
+            return queryset.count()
+        key = 'admin-count:' + hashlib.md5(f'{queryset.db}:{sql}'.encode()).hexdigest()
+        return cache.get_or_set(key, queryset.count, self.cache_timeout)
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, ShardedResults):
+            return sum(
+                self._count_queryset(self.object_list.queryset.using(alias)) for alias in shard_aliases()
+            )
+        return self._count_queryset(self.object_list)
+
+
+class KeysetChangeList(ShardedChangeList):
+    """
+    ChangeList that pages with a cursor (`?cursor=...`, the sort key of the
+    last row shown) instead of OFFSET while the list is in the admin's
+    `keyset_ordering`. Any other ordering falls back to numbered pages.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def _keyset_fields(self, ordering):
+        keyset_ordering = list(getattr(self.model_admin, 'keyset_ordering', ()) or ())
+        # The admin's default ordering can appear twice (params and queryset)
+        ordering = list(dict.fromkeys(ordering))
+        if not keyset_ordering or ordering != keyset_ordering:
+            return None
+        fields = []
+        for name in keyset_ordering:
+            name = name.lstrip('-')
+            field = self.opts.pk if name == 'pk' else self.opts.get_field(name)
+            fields.append((name, field))
+        return fields
+
+    def _decode_cursor(self, fields, value):
+        parts = value.split('|')
+        if len(parts) != len(fields):
+            return None
+        try:
+            return [field.to_python(part) for (_, field), part in zip(fields, parts)]
+        except Exception:
+            return None
+
+    def get_queryset(self, request, exclude_parameters=None):
+        # Keep the cursor out of sort and filter links: those start over
+        cursor = self.params.pop(CURSOR_VAR, None)
+        self.filter_params.pop(CURSOR_VAR, None)
+        cursor = cursor or request.GET.get(CURSOR_VAR)
+
+        queryset = super().get_queryset(request, exclude_parameters)
+        self.keyset = self._keyset_fields(self.get_ordering(request, queryset))
+        self.cursor_values = self.keyset and cursor and self._decode_cursor(self.keyset, cursor)
+        self.uncursored_queryset = queryset
+
+        only = getattr(self.model_admin, 'changelist_only', None)
+        if only:
+            queryset = queryset.only(*only)
+
+        if self.cursor_values:
+            # Newest first: (f1, f2, ...) < cursor, lexicographically. Written
+            # as f1 <= v1 AND (f1 < v1 OR ...) so the leading column bounds an
+            # index range scan.
+            names = [name for name, _ in self.keyset]
+            condition = Q(**{f'{names[-1]}__lt': self.cursor_values[-1]})
+            for name, value in reversed(list(zip(names[:-1], self.cursor_values[:-1]))):
+                condition = Q(**{f'{name}__lte': value}) & (Q(**{f'{name}__lt': value}) | condition)
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def get_results(self, request):
+        if not self.keyset or self.show_all:
+            return super().get_results(request)
+
+        wrap = ShardedResults if is_sharded() else (lambda queryset: queryset)
+        paginator = self.model_admin.get_paginator(request, wrap(self.uncursored_queryset), self.list_per_page)
+        rows = list(wrap(self.queryset)[:self.list_per_page + 1])
+        has_next = len(rows) > self.list_per_page
+        rows = rows[:self.list_per_page]
+
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = rows
+        self.can_show_all = False
+        self.multi_page = has_next or bool(self.cursor_values)
+        self.paginator = paginator
+
+        self.first_page_url = self.get_query_string(remove=[CURSOR_VAR])
+        self.next_page_url = None
+        if has_next:
+            last = rows[-1]
+            cursor = '|'.join(
+                str(last.pk if name == 'pk' else getattr(last, field.attname))
+                for name, field in self.keyset
+            )
+            self.next_page_url = self.get_query_string({CURSOR_VAR: cursor})
+
+
+class AdminPerformanceMixin:
+    """
+    Changelist tuned for very large tables, on while ADMIN_PERFORMANCE_MODE
+    is set: estimated counts, keyset paging in `keyset_ordering`, only the
+    `changelist_only` columns, and index-friendly `performance_search_fields`.
+    """
+    keyset_ordering = None
+    changelist_only = None
+    performance_search_fields = None
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        if performance_mode():
+            return KeysetChangeList
+        return super().get_changelist(request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        if performance_mode():
+            return EstimatedCountPaginator(queryset, per_page, orphans, allow_empty_first_page)
+        return super().get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+
+    def get_search_fields(self, request):
+        if performance_mode() and self.performance_search_fields is not None:
+            return self.performance_search_fields
+        return super().get_search_fields(request)
@@ -0,0 +1,132 @@
+# backend/mockbanking/bloom.py
+
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+
+
+class BloomFilter:
+    """
+    Fixed-size set of strings with no false negatives and roughly
+    `error_rate` false positives once `capacity` items have been added.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, keys):
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def full(self):
+        return self.count > self.capacity
+
+
+class SyncedBloomFilter:
+    """
+    Per-process BloomFilter mirroring keys from a table that grows by id.
+    Rows added since the last look are pulled in every `sync_setting`
+    seconds. The filter is rebuilt from scratch, which drops deleted keys
+    and resizes it, every `rebuild_setting` seconds. Ids skipped between
+    two syncs may belong to transactions that had not committed yet, so
+    they are looked at again on later syncs until the next rebuild.
+    Subclasses implement `load()` and `load_since()`; a row whose key is
+    None counts as seen but is left out of the filter.
+    """
+
+    min_capacity = 10000
+    sync_setting, sync_default = None, 30
+    rebuild_setting, rebuild_default = None, 600
+    # Ids this far below the highest one loaded at a rebuild count as possibly in flight
+    recheck_window = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._holes = set()
+        self._synced_at = self._built_at = 0
+
+    def load(self):
+        """(id, key) for every row, read in one query."""
+        raise NotImplementedError
+
+    def load_since(self, last_id, holes):
+        """(id, key) for ids above `last_id` or in `holes`, in id order."""
+        raise NotImplementedError
+
+    def _rebuild(self):
+        rows = list(self.load())
+        keys = [key for _, key in rows if key is not None]
+        bloom = BloomFilter(max(self.min_capacity, 2 * len(keys)))
+        bloom.update(keys)
+        # The high-water mark comes from the same rows, so nothing committed
+        # between reading the rows and reading the mark can be skipped
+        ids = {row_id for row_id, _ in rows}
+        self._last_id = max(ids, default=0)
+        self._holes = set(range(max(self._last_id - self.recheck_window, 0) + 1, self._last_id)) - ids
+        self._bloom = bloom
+        self._built_at = time.monotonic()
+
+    def _sync(self):
+        seen = set()
+        for row_id, key in self.load_since(self._last_id, self._holes):
+            if key is not None:
+                self._bloom.add(key)
+            seen.add(row_id)
+        newest = max(seen, default=self._last_id)
+        self._holes = (self._holes | set(range(self._last_id + 1, newest))) - seen
+        self._last_id = max(self._last_id, newest)
+        if self._bloom.full:
+            self._rebuild()
+
+    def _refresh(self):
+        now = time.monotonic()
+        sync_every = getattr(settings, self.sync_setting, self.sync_default)
+        rebuild_every = getattr(settings, self.rebuild_setting, self.rebuild_default)
+        if self._bloom is not None and now - self._synced_at < sync_every:
+            return
+        with self._lock:
+            if self._bloom is not None and now - self._synced_at < sync_every:
+                return
+            if self._bloom is None or now - self._built_at >= rebuild_every:
+                self._rebuild()
+            else:
+                self._sync()
+            self._synced_at = now
+
+    def add(self, key):
+        self._refresh()
+        self._bloom.add(key)
+
+    def update(self, keys):
+        self._refresh()
+        self._bloom.update(keys)
+
+    def might_contain(self, key):
+        self._refresh()
+        return key in self._bloom
@@ -0,0 +1,26 @@
+# backend/mockbanking/dates.py
+
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def parse_date_param(params, name):
+    """
+    The aware datetime in query parameter `name`, or None when it's missing.
+    YYYY-MM-DD means the start of that day. A full datetime is taken as is,
+    since the admin's date filters write those. Raises ValueError otherwise.
+    """
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value) or parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError(f'Invalid {name}, expected YYYY-MM-DD')
+    if not isinstance(parsed, datetime):
+        parsed = datetime.combine(parsed, time.min)
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
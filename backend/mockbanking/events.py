@@ -0,0 +1,126 @@
+# backend/mockbanking/events.py
+
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """
+    One connected client: a bounded queue owned by the ASGI event loop. When
+    a slow client falls `maxsize` events behind, its backlog is replaced by a
+    single `resync` event telling it to reload over the REST API, so memory
+    per client never grows past the bound.
+    """
+
+    def __init__(self, user_id, loop, maxsize):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, message):
+        # Runs on the subscription's event loop
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(('resync', {}))
+
+
+class Broker:
+    """In-process pub/sub of per-user events. `publish` may be called from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id, maxsize=None):
+        subscription = Subscription(
+            user_id, asyncio.get_running_loop(), maxsize or getattr(settings, 'EVENTS_CLIENT_QUEUE_SIZE', 100)
+        )
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id, event, data):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, (event, data))
+            except RuntimeError:
+                # The client's event loop has shut down
+                self.unsubscribe(subscription)
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+
+broker = Broker()
+
+
+class LocalBackend:
+    """
+    Fan-out transport between processes. This stand-in only reaches the
+    current process. A networked backend (e.g. Redis pub/sub) would send
+    the JSON message to every worker, and each worker would hand it to
+    `broker.publish` on receipt.
+    """
+
+    def send(self, user_id, event, data):
+        message = json.loads(json.dumps(data, default=str))
+        broker.publish(user_id, event, message)
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(getattr(settings, 'EVENTS_BACKEND', 'mockbanking.events.LocalBackend'))()
+    return _backend
+
+
+def publish(user_id, event, data):
+    get_backend().send(user_id, event, data)
+
+
+def publish_transactions(transactions, using):
+    """Announce newly created transactions (and the resulting balances) once `using` commits."""
+    events = [
+        (txn.user_id, {
+            'id': txn.id,
+            'transaction_type': txn.transaction_type,
+            'amount': txn.amount,
+            'description': txn.description,
+            'recipient_account_number': txn.recipient_account_number,
+            'sender_account_number': txn.sender_account_number,
+            'timestamp': txn.timestamp.isoformat() if txn.timestamp else None,
+            'balance_after_transaction': txn.balance_after_transaction,
+        })
+        for txn in transactions
+    ]
+
+    def send():
+        for user_id, data in events:
+            publish(user_id, 'transaction', data)
+            if data['balance_after_transaction'] is not None:
+                publish(user_id, 'balance', {'balance': data['balance_after_transaction']})
+
+    transaction.on_commit(send, using=using)
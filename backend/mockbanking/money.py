@@ -0,0 +1,209 @@
+# backend/mockbanking/money.py
+
+from decimal import Decimal, InvalidOperation
+
+from django import forms
+from django.core import exceptions, validators
+from django.db import connection, models
+from django.utils.functional import cached_property
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class Money:
+    """
+    An exact amount of money, held as an integer number of cents. Money can
+    be built from an int, a Decimal or a numeric string, but not a float.
+    Arithmetic with another Money, an int or a Decimal gives Money and runs
+    on ints. An amount with more than two decimal places raises ValueError
+    rather than being rounded.
+    """
+
+    __slots__ = ('cents',)
+
+    def __init__(self, amount=0):
+        if isinstance(amount, Money):
+            self.cents = amount.cents
+            return
+        if isinstance(amount, (bool, float)):
+            raise TypeError(f'Money needs an int, Decimal or string, not {type(amount).__name__}')
+        if isinstance(amount, int):
+            self.cents = amount * 100
+            return
+        try:
+            value = amount if isinstance(amount, Decimal) else Decimal(str(amount).strip())
+        except InvalidOperation:
+            raise ValueError(f'{amount!r} is not a valid amount')
+        if not value.is_finite():
+            raise ValueError(f'{amount!r} is not a valid amount')
+        cents = value.scaleb(2)
+        if cents != cents.to_integral_value():
+            raise ValueError(f'{amount} has more than two decimal places')
+        self.cents = int(cents)
+
+    @classmethod
+    def from_cents(cls, cents):
+        money = cls.__new__(cls)
+        money.cents = int(cents)
+        return money
+
+    def to_decimal(self):
+        return Decimal(str(self))
+
+    def _cents_of(self, other):
+        if isinstance(other, Money):
+            return other.cents
+        if isinstance(other, (int, Decimal)) and not isinstance(other, bool):
+            return Money(other).cents
+        return None
+
+    def __add__(self, other):
+        cents = self._cents_of(other)
+        return NotImplemented if cents is None else Money.from_cents(self.cents + cents)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        cents = self._cents_of(other)
+        return NotImplemented if cents is None else Money.from_cents(self.cents - cents)
+
+    def __rsub__(self, other):
+        cents = self._cents_of(other)
+        return NotImplemented if cents is None else Money.from_cents(cents - self.cents)
+
+    def __mul__(self, other):
+        if isinstance(other, int) and not isinstance(other, bool):
+            return Money.from_cents(self.cents * other)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money.from_cents(-self.cents)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return Money.from_cents(abs(self.cents))
+
+    def __bool__(self):
+        return self.cents != 0
+
+    def _compare(self, other, op):
+        if isinstance(other, Money):
+            return op(self.cents, other.cents)
+        if isinstance(other, (int, Decimal)) and not isinstance(other, bool):
+            # Exact even when `other` has fractions of a cent
+            return op(self.to_decimal(), other)
+        return NotImplemented
+
+    def __eq__(self, other):
+        return self._compare(other, lambda a, b: a == b)
+
+    def __lt__(self, other):
+        return self._compare(other, lambda a, b: a < b)
+
+    def __le__(self, other):
+        return self._compare(other, lambda a, b: a <= b)
+
+    def __gt__(self, other):
+        return self._compare(other, lambda a, b: a > b)
+
+    def __ge__(self, other):
+        return self._compare(other, lambda a, b: a >= b)
+
+    def __hash__(self):
+        # Equal to the hash of the same amount as a Decimal or int
+        return hash(self.to_decimal())
+
+    def __str__(self):
+        units, cents = divmod(abs(self.cents), 100)
+        return f"{'-' if self.cents < 0 else ''}{units}.{cents:02d}"
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    def __format__(self, spec):
+        return format(self.to_decimal(), spec) if spec else str(self)
+
+    def __reduce__(self):
+        return (Money.from_cents, (self.cents,))
+
+
+class MoneyField(models.BigIntegerField):
+    """
+    Money stored as a BIGINT number of cents. Values are read as Money, and
+    sums computed in SQL come back as Money too. Any value accepted by Money
+    can be assigned or used in a lookup; ints mean whole units, not cents.
+    """
+
+    description = "Amount of money, stored in cents"
+
+    def from_db_value(self, value, expression, connection):
+        # Some backends return SUM() over a bigint as a Decimal
+        return None if value is None else Money.from_cents(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Money):
+            return value
+        try:
+            return Money(value)
+        except (TypeError, ValueError):
+            raise exceptions.ValidationError(
+                '“%(value)s” is not a valid amount of money.', code='invalid', params={'value': value},
+            )
+
+    def get_prep_value(self, value):
+        if value is None or hasattr(value, 'resolve_expression'):
+            return value
+        try:
+            return Money(value).cents
+        except (TypeError, ValueError) as e:
+            raise e.__class__(f"Field '{self.name}' expected an amount of money but got {value!r}.") from e
+
+    @cached_property
+    def validators(self):
+        # The column's integer range, in cents
+        min_cents, max_cents = connection.ops.integer_field_range(self.get_internal_type())
+        return [
+            *self._validators,
+            validators.MinValueValidator(Money.from_cents(min_cents)),
+            validators.MaxValueValidator(Money.from_cents(max_cents)),
+        ]
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{
+            'form_class': forms.DecimalField,
+            'decimal_places': 2,
+            **kwargs,
+        })
+
+
+class MoneySerializerField(serializers.DecimalField):
+    """Accepts a number or numeric string with at most two decimal places and renders e.g. "12.34"."""
+
+    def __init__(self, **kwargs):
+        super().__init__(max_digits=kwargs.pop('max_digits', 18), decimal_places=2, **kwargs)
+
+    def to_internal_value(self, data):
+        return Money(super().to_internal_value(data))
+
+    def to_representation(self, value):
+        return str(Money(value))
+
+
+class MoneyJSONEncoder(JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Money):
+            return str(obj)
+        return super().default(obj)
+
+
+class MoneyJSONRenderer(JSONRenderer):
+    """
+    DRF's JSON renderer, extended to write Money found outside a serializer
+    (e.g. in a hand-built response dict) as an exact string.
+    """
+    encoder_class = MoneyJSONEncoder
@@ -0,0 +1,300 @@
+# backend/mockbanking/ratelimit.py
+
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+
+class LocalStore:
+    """
+    Per-process limiter state. Each entry expires `ttl` seconds after its
+    last use, once it would behave exactly like a missing one (a refilled
+    bucket, a window with nothing left in it). Entries are kept in last-use
+    order, so expired keys usually come off the front in amortised O(1).
+    The table never holds more than `max_keys` entries and never drops one
+    that hasn't expired: when it is full of live entries a new key is
+    refused, and the result is the seconds until one expires, so callers
+    fail closed.
+    """
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._entries = OrderedDict()
+        self._next_expiry = 0
+        self._lock = threading.Lock()
+
+    def _sweep(self, now):
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        self._next_expiry = min((expires_at for expires_at, _ in self._entries.values()), default=now)
+
+    def update(self, key, apply, now, ttl):
+        """Replace the state for `key` with apply(state)[0] and return apply(state)[1]."""
+        with self._lock:
+            while self._entries:
+                expires_at, _ = next(iter(self._entries.values()))
+                if expires_at > now:
+                    break
+                self._entries.popitem(last=False)
+            entry = self._entries.pop(key, None)
+            if entry is None and len(self._entries) >= self.max_keys:
+                # Only rescan once something is due to expire
+                if now >= self._next_expiry:
+                    self._sweep(now)
+                if len(self._entries) >= self.max_keys:
+                    return self._next_expiry - now
+            state, result = apply(entry[1] if entry and entry[0] > now else None)
+            if state is not None:
+                self._entries[key] = (now + ttl, state)
+                self._next_expiry = min(self._next_expiry, now + ttl)
+        return result
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CacheStore:
+    """
+    State kept in a Django cache shared by the workers on a host (e.g. a
+    file-based cache or a local memcached). Read-modify-write isn't atomic,
+    so concurrent requests for the same key can slightly overshoot a limit.
+    """
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def update(self, key, apply, now, ttl):
+        key = f'ratelimit:{key}'
+        state, result = apply(self.cache.get(key))
+        if state is not None:
+            self.cache.set(key, state, math.ceil(ttl))
+        return result
+
+
+def token_bucket(capacity, per_second, now, cost=1):
+    """Token bucket as an `update` callback; the result is the seconds to wait (0 when allowed)."""
+    def apply(state):
+        tokens, last = state or (capacity, now)
+        tokens = min(capacity, tokens + (now - last) * per_second)
+        if tokens >= cost:
+            return (tokens - cost, now), 0
+        return (tokens, now), (cost - tokens) / per_second
+    return apply
+
+
+def sliding_window(window, max_count, max_amount, amount, now):
+    """
+    Sliding-window count and amount limits as an `update` callback, using
+    the two-bucket approximation: the previous fixed window's totals are
+    weighted by how much of it still overlaps the sliding window. State is
+    (window index, previous count, previous amount, count, amount).
+    """
+    index = int(now // window)
+    overlap = 1 - (now % window) / window
+
+    def apply(state):
+        start, prev_count, prev_amount, count, total = state or (index, 0, Decimal(0), 0, Decimal(0))
+        if start != index:
+            if start == index - 1:
+                prev_count, prev_amount = count, total
+            else:
+                prev_count, prev_amount = 0, Decimal(0)
+            count, total = 0, Decimal(0)
+        state = (index, prev_count, prev_amount, count, total)
+        if (prev_count * overlap + count + 1 > max_count
+                or prev_amount * Decimal(overlap) + total + amount > max_amount):
+            return state, window - now % window
+        return (index, prev_count, prev_amount, count + 1, total + amount), 0
+    return apply
+
+
+def release_window(window, amount, now):
+    """Give back a transfer counted by `sliding_window` in the current window."""
+    index = int(now // window)
+
+    def apply(state):
+        if not state or state[0] != index:
+            return state, None
+        start, prev_count, prev_amount, count, total = state
+        return (start, prev_count, prev_amount, max(count - 1, 0), max(total - amount, Decimal(0))), None
+    return apply
+
+
+class RateLimiter:
+    """Login and transfer limits from the RATE_LIMITS and TRANSFER_VELOCITY_RULES settings."""
+
+    def __init__(self):
+        if getattr(settings, 'RATE_LIMIT_BACKEND', 'local') == 'cache':
+            self.store = CacheStore(getattr(settings, 'RATE_LIMIT_CACHE_ALIAS', 'default'))
+        else:
+            self.store = LocalStore(getattr(settings, 'RATE_LIMIT_MAX_KEYS', 100000))
+
+    def hit(self, name, key):
+        """Take a token from the `name` bucket for `key`; returns seconds to wait, 0 if allowed."""
+        burst, per_minute = settings.RATE_LIMITS[name]
+        per_second = per_minute / 60
+        now = time.time()
+        # An untouched bucket is full again after burst / rate seconds
+        return self.store.update(f'{name}:{key}', token_bucket(burst, per_second, now), now, burst / per_second)
+
+    def transfer_amount_limit(self, amount):
+        """The (max amount, window) of the tightest velocity rule `amount` exceeds on its own, or None."""
+        over = [
+            (Decimal(max_amount), window)
+            for window, _, max_amount in settings.TRANSFER_VELOCITY_RULES
+            if amount > Decimal(max_amount)
+        ]
+        return min(over, default=None)
+
+    def reserve_transfer(self, user_id, amount):
+        """Count a transfer against every velocity rule; returns seconds to wait, 0 if allowed."""
+        now = time.time()
+        reserved = []
+        for window, max_count, max_amount in settings.TRANSFER_VELOCITY_RULES:
+            key = f'velocity:{window}:{user_id}'
+            # The previous window still weighs on the current one, so the
+            # state matters for two windows after its last change
+            wait = self.store.update(
+                key, sliding_window(window, max_count, Decimal(max_amount), amount, now), now, 2 * window
+            )
+            if wait:
+                for earlier in reserved:
+                    self.store.update(
+                        f'velocity:{earlier}:{user_id}', release_window(earlier, amount, now), now, 2 * earlier
+                    )
+                return wait
+            reserved.append(window)
+        return 0
+
+    def release_transfer(self, user_id, amount):
+        now = time.time()
+        for window, _, _ in settings.TRANSFER_VELOCITY_RULES:
+            self.store.update(f'velocity:{window}:{user_id}', release_window(window, amount, now), now, 2 * window)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
+
+
+def _payload(request):
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+    return request.POST
+
+
+def _user_id(request):
+    """User id from a valid Bearer access token, checked without touching the database."""
+    from rest_framework_simplejwt.exceptions import TokenError
+    from rest_framework_simplejwt.settings import api_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        return AccessToken(header[7:]).get(api_settings.USER_ID_CLAIM)
+    except TokenError:
+        return None
+
+
+def _too_many(wait):
+    response = JsonResponse({
+        'error': 'Too many requests, try again later',
+        'retry_after': math.ceil(wait),
+    }, status=429)
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+class RateLimitMiddleware:
+    """
+    Rejects abusive login and transfer calls with 429 before the view runs,
+    so they cost no password hash, row lock or database query. Logins are
+    limited per client IP and per username, and recipient lookups per user.
+    Transfers are limited per user, and also by count and amount over the
+    TRANSFER_VELOCITY_RULES windows. Transfers that then fail are given back
+    to the velocity windows; queued ones (202) stay counted whatever the
+    queue worker later makes of them.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        reservation = getattr(request, '_transfer_reservation', None)
+        if reservation and response.status_code >= 400:
+            get_limiter().release_transfer(*reservation)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+            return None
+        view_name = request.resolver_match.view_name
+        limiter = get_limiter()
+
+        if view_name == 'recipient_lookup':
+            # Throttles scraping account holders' names
+            user_id = _user_id(request)
+            wait = limiter.hit('recipient_lookup_user', user_id) if user_id is not None else 0
+            return _too_many(wait) if wait else None
+
+        if request.method != 'POST':
+            return None
+
+        if view_name == 'login':
+            username = str(_payload(request).get('username') or '').lower()
+            wait = limiter.hit('login_ip', request.META.get('REMOTE_ADDR', ''))
+            if not wait and username:
+                wait = limiter.hit('login_username', username)
+            return _too_many(wait) if wait else None
+
+        if view_name == 'transfer':
+            user_id = _user_id(request)
+            if user_id is None:
+                # Unauthenticated; DRF turns it away without touching an account
+                return None
+            wait = limiter.hit('transfer_user', user_id)
+            if wait:
+                return _too_many(wait)
+            try:
+                amount = Decimal(str(_payload(request).get('amount')))
+            except InvalidOperation:
+                return None
+            if not amount.is_finite() or amount <= 0:
+                return None
+            limit = limiter.transfer_amount_limit(amount)
+            if limit:
+                # No amount of waiting lets this one through
+                max_amount, window = limit
+                return JsonResponse({
+                    'error': f'Amount exceeds the limit of {max_amount} per {window} seconds',
+                    'limit': str(max_amount),
+                    'window_seconds': window,
+                }, status=400)
+            wait = limiter.reserve_transfer(user_id, amount)
+            if wait:
+                return _too_many(wait)
+            request._transfer_reservation = (user_id, amount)
+        return None
@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
     
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
 ]
 AUTH_USER_MODEL = 'accounts.User'
@@ -55,6 +57,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     "corsheaders.middleware.CorsMiddleware",
+    'mockbanking.ratelimit.RateLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'mockbanking.urls'
@@ -62,7 +65,7 @@ ROOT_URLCONF = 'mockbanking.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -87,6 +90,34 @@ DATABASES = {
     }
 }
 
+# Horizontal sharding
+# Accounts and transactions are spread across DATABASE_SHARDS by a stable hash
+# of the owning user's id. 'default' is always shard 0 and also holds the
+# global tables (users, auth, admin, the account directory). Extra shards are
+# local SQLite files; run `python manage.py migrate_shards` after changing the
+# count. Pick the shard count before loading data: rows are not moved when it
+# changes.
+SHARD_COUNT = int(os.environ.get('MOCKBANKING_SHARD_COUNT', '1'))
+
+for shard_index in range(1, SHARD_COUNT):
+    DATABASES[f'shard_{shard_index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db_shard_{shard_index}.sqlite3',
+    }
+
+DATABASE_SHARDS = ['default'] + [f'shard_{i}' for i in range(1, SHARD_COUNT)]
+DATABASE_ROUTERS = ['mockbanking.sharding.ShardRouter']
+
+# Transactions older than this are moved to the archive table by
+# `python manage.py archive_transactions`; history queries only reach into the
+# archive when they go past this window.
+TRANSACTION_HOT_WINDOW_DAYS = 365
+
+# Admin changelists for Transaction and Account: estimated counts, cursor
+# paging and exact-match search, so they stay fast on very large tables.
+# Set to False for Django's stock behaviour (exact counts, numbered pages).
+ADMIN_PERFORMANCE_MODE = True
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -131,11 +162,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.RevocableJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Writes Money in hand-built responses as exact strings, like serializers do
+    'DEFAULT_RENDERER_CLASSES': [
+        'mockbanking.money.MoneyJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
 }
@@ -166,6 +202,61 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Logged-out access tokens are kept in a per-process filter, pulled from the
+# token blacklist this often; other processes may accept a revoked token for
+# up to this many seconds. Refresh tokens are always checked in the database.
+TOKEN_REVOCATION_SYNC_SECONDS = 30
+TOKEN_REVOCATION_REBUILD_SECONDS = 600
+
+# Account numbers are kept in a per-process filter (accounts.recipients) so
+# mistyped recipients are rejected without a query. Accounts opened by other
+# processes become valid recipients here after at most this many seconds;
+# until then transfers to them from this process get 404. Lower it to narrow
+# that window at the cost of one small directory query per interval.
+ACCOUNT_NUMBER_FILTER_SYNC_SECONDS = 5
+ACCOUNT_NUMBER_FILTER_REBUILD_SECONDS = 600
+
+# Rate limiting (mockbanking.ratelimit): token buckets per
+# name: (burst, sustained requests per minute)
+RATE_LIMIT_ENABLED = True
+RATE_LIMITS = {
+    'login_ip': (20, 10),
+    'login_username': (5, 2),
+    'transfer_user': (10, 30),
+    'recipient_lookup_user': (20, 60),
+}
+# Transfer velocity per user: (window in seconds, max transfers, max total amount)
+TRANSFER_VELOCITY_RULES = [
+    (60, 20, '10000.00'),
+    (24 * 60 * 60, 200, '100000.00'),
+]
+# 'local' keeps limiter state per process; 'cache' shares it between the
+# workers on a host through RATE_LIMIT_CACHE_ALIAS (point that at a
+# file-based or memcached cache, not the per-process default).
+RATE_LIMIT_BACKEND = 'local'
+RATE_LIMIT_CACHE_ALIAS = 'default'
+# Most clients the 'local' backend tracks at once. A client's state is only
+# dropped once its limits have fully reset; while every slot is taken by a
+# live one, new clients get 429 rather than a fresh allowance.
+RATE_LIMIT_MAX_KEYS = 100000
+
+# Closed analytics buckets are cached per user. The default cache is per
+# process: with several workers, an edit or delete in one only drops that
+# worker's copy and the others serve the old totals for up to a day. Point
+# ANALYTICS_CACHE_ALIAS at a cache the workers share, or run one worker.
+ANALYTICS_CACHE_ALIAS = 'default'
+
+# Live updates (/api/events/, served by mockbanking.asgi). Each connected
+# client buffers at most EVENTS_CLIENT_QUEUE_SIZE events. LocalBackend only
+# reaches clients of the same process; run a single ASGI worker with it.
+EVENTS_BACKEND = 'mockbanking.events.LocalBackend'
+EVENTS_CLIENT_QUEUE_SIZE = 100
+# Browsers open the stream with a single-use ticket that is only valid for
+# EVENTS_TICKET_SECONDS. The worker that issues it and the one serving the
+# stream must share EVENTS_TICKET_CACHE_ALIAS; the default cache is per process.
+EVENTS_TICKET_SECONDS = 30
+EVENTS_TICKET_CACHE_ALIAS = 'default'
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
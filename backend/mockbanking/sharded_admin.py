@@ -0,0 +1,55 @@
+# backend/mockbanking/sharded_admin.py
+
+from django.contrib.admin.views.main import ChangeList
+
+from .sharding import ShardedResults, is_sharded, shard_aliases
+
+
+class ShardedChangeList(ChangeList):
+    """ChangeList whose counts and pages are scatter-gathered from every shard."""
+
+    def get_results(self, request):
+        if not is_sharded():
+            return super().get_results(request)
+        queryset, root_queryset = self.queryset, self.root_queryset
+        self.queryset = ShardedResults(queryset)
+        self.root_queryset = ShardedResults(root_queryset)
+        try:
+            super().get_results(request)
+        finally:
+            self.queryset, self.root_queryset = queryset, root_queryset
+
+
+class ShardedAdminMixin:
+    """
+    Admin for a sharded model. With a single database it behaves exactly like
+    a plain ModelAdmin; with several, list views fan out to every shard and
+    objects are looked up on whichever shard holds them.
+    """
+
+    def get_changelist(self, request, **kwargs):
+        if is_sharded():
+            return ShardedChangeList
+        return super().get_changelist(request, **kwargs)
+
+    def get_object(self, request, object_id, from_field=None):
+        if not is_sharded():
+            return super().get_object(request, object_id, from_field)
+        queryset = self.get_queryset(request)
+        field = self.model._meta.pk if from_field is None else self.model._meta.get_field(from_field)
+        try:
+            object_id = field.to_python(object_id)
+        except Exception:
+            return None
+        for alias in shard_aliases():
+            obj = queryset.using(alias).filter(**{field.name: object_id}).first()
+            if obj is not None:
+                return obj
+        return None
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Bulk actions run against a single database queryset
+        if is_sharded():
+            actions.pop('delete_selected', None)
+        return actions
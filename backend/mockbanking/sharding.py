@@ -0,0 +1,202 @@
+# backend/mockbanking/sharding.py
+
+import zlib
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Models whose rows live on their owner's shard. Everything else is global and
+# stays on the default database.
+SHARDED_MODELS = {
+    'accounts.account',
+    'accounts.accountbalanceshard',
+    'accounts.transferoutbox',
+    'accounts.transferinbox',
+    'accounts.queuedtransfer',
+    'transactions.transaction',
+    'transactions.archivedtransaction',
+    'transactions.monthlystatement',
+}
+
+# Each shard hands out primary keys from its own range so that ids stay unique
+# across the whole cluster (the admin looks objects up by id alone).
+SHARD_ID_SPAN = 10 ** 12
+
+
+def shard_aliases():
+    return list(getattr(settings, 'DATABASE_SHARDS', [DEFAULT_DB_ALIAS]))
+
+
+def is_sharded():
+    return len(shard_aliases()) > 1
+
+
+def shard_for_user_id(user_id):
+    """Stable user id -> database alias mapping."""
+    shards = shard_aliases()
+    if len(shards) == 1:
+        return shards[0]
+    return shards[zlib.crc32(str(user_id).encode()) % len(shards)]
+
+
+def db_for_user(user):
+    return shard_for_user_id(user.pk)
+
+
+def is_sharded_model(model):
+    return model._meta.label_lower in SHARDED_MODELS
+
+
+class ShardRouter:
+    """
+    Routes sharded models to their owner's shard whenever Django hands us an
+    instance hint (saves, deletes, related-object access). Plain manager
+    queries carry no hint, so views select the shard with `.using()`.
+    """
+
+    def _db_for(self, model, **hints):
+        if not is_sharded_model(model):
+            return DEFAULT_DB_ALIAS
+
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+
+        if is_sharded_model(type(instance)):
+            if instance._state.db:
+                return instance._state.db
+            user_id = getattr(instance, 'user_id', None)
+            if user_id is not None:
+                return shard_for_user_id(user_id)
+            return None
+
+        # Reverse access from a user, e.g. `user.account` or `user.transactions`
+        if instance._meta.label == settings.AUTH_USER_MODEL:
+            return shard_for_user_id(instance.pk)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, **hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Users are mirrored onto their home shard, so user <-> account and
+        # user <-> transaction relations are always resolvable.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Every database carries the full schema; unused tables stay empty.
+        return None
+
+
+def _ordering_fields(queryset):
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    fields = []
+    for field in ordering:
+        if not isinstance(field, str) or field == '?':
+            continue
+        descending = field.startswith('-')
+        name = field.lstrip('-+')
+        if name == 'pk':
+            name = queryset.model._meta.pk.attname
+        fields.append((name, descending))
+    return fields
+
+
+def _resolve(obj, name):
+    for part in name.split('__'):
+        obj = getattr(obj, part, None)
+        if obj is None:
+            break
+    return obj
+
+
+def _sort_key(name):
+    # NULLs sort first ascending and last descending, as SQLite does
+    def key(obj):
+        value = _resolve(obj, name)
+        return (value is not None, value if value is not None else 0)
+    return key
+
+
+def gather(queryset, start=0, stop=None):
+    """
+    Scatter `queryset` to every shard and merge the results in the
+    queryset's ordering. Each shard returns at most `stop` rows.
+    """
+    rows = []
+    for alias in shard_aliases():
+        shard_queryset = queryset.using(alias)
+        if stop is not None:
+            shard_queryset = shard_queryset[:stop]
+        rows.extend(shard_queryset)
+
+    # Stable sorts, least significant key first
+    for name, descending in reversed(_ordering_fields(queryset)):
+        rows.sort(key=_sort_key(name), reverse=descending)
+    return rows[start:stop]
+
+
+class ShardedResults:
+    """
+    Read-only, sliceable view of a queryset across every shard. Quacks enough
+    like a QuerySet for Paginator and the admin ChangeList.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    @property
+    def ordered(self):
+        return self.queryset.ordered
+
+    def count(self):
+        return sum(self.queryset.using(alias).count() for alias in shard_aliases())
+
+    def exists(self):
+        return any(self.queryset.using(alias).exists() for alias in shard_aliases())
+
+    def _clone(self):
+        return self
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return gather(self.queryset, k.start or 0, k.stop)
+        return gather(self.queryset, k, k + 1)[0]
+
+    def __iter__(self):
+        return iter(gather(self.queryset))
+
+    def __len__(self):
+        return self.count()
+
+
+def seed_shard_id_ranges(using, apps=None, **kwargs):
+    """
+    post_migrate hook: start each SQLite shard's AUTOINCREMENT sequences at
+    `index * SHARD_ID_SPAN` so sharded tables never reuse another shard's ids.
+    """
+    from django.apps import apps as global_apps
+    from django.db import connections
+
+    shards = shard_aliases()
+    if using not in shards or shards.index(using) == 0:
+        return
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+
+    start = shards.index(using) * SHARD_ID_SPAN
+    existing = set(connection.introspection.table_names())
+    with connection.cursor() as cursor:
+        for model in (apps or global_apps).get_models():
+            table = model._meta.db_table
+            if not is_sharded_model(model) or table not in existing:
+                continue
+            cursor.execute(
+                "INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s "
+                "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)",
+                [table, start, table],
+            )
@@ -0,0 +1,160 @@
+# backend/mockbanking/sse.py
+
+import asyncio
+import json
+import secrets
+import time
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from .events import broker
+
+HEARTBEAT_SECONDS = 15
+
+
+def _ticket_cache():
+    return caches[getattr(settings, 'EVENTS_TICKET_CACHE_ALIAS', 'default')]
+
+
+def _ticket_key(ticket):
+    return f'event-stream-ticket:{ticket}'
+
+
+def issue_ticket(user_id, expires_at):
+    """A random single-use ticket that opens one stream for `user_id` until `expires_at`."""
+    ticket = secrets.token_urlsafe(32)
+    _ticket_cache().set(_ticket_key(ticket), (user_id, expires_at), getattr(settings, 'EVENTS_TICKET_SECONDS', 30))
+    return ticket
+
+
+def redeem_ticket(ticket):
+    """(user id, stream expiry) for an unused ticket, else (None, None). A ticket works once."""
+    cache = _ticket_cache()
+    key = _ticket_key(ticket)
+    claim = cache.get(key)
+    # Of two concurrent redemptions only one gets to delete the key
+    if claim is None or not cache.delete(key):
+        return None, None
+    return claim
+
+
+def _authenticate(raw_token):
+    """(user id, token expiry) for a valid access token, else (None, None)."""
+    from rest_framework.exceptions import AuthenticationFailed
+    from accounts.authentication import RevocableJWTAuthentication
+
+    authentication = RevocableJWTAuthentication()
+    try:
+        token = authentication.get_validated_token(raw_token)
+        user = authentication.get_user(token)
+    except AuthenticationFailed:
+        return None, None
+    return user.pk, token['exp']
+
+
+def _ticket(scope):
+    # EventSource can't set headers, so browsers pass a ticket in the query string
+    ticket = parse_qs(scope.get('query_string', b'').decode()).get('ticket')
+    return ticket[0] if ticket else None
+
+
+def _raw_token(scope):
+    for name, value in scope.get('headers', []):
+        if name == b'authorization' and value.lower().startswith(b'bearer '):
+            return value[7:].decode()
+    return None
+
+
+def _cors_headers(scope):
+    origin = dict(scope.get('headers', [])).get(b'origin', b'').decode()
+    if origin and origin in getattr(settings, 'CORS_ALLOWED_ORIGINS', []):
+        return [(b'access-control-allow-origin', origin.encode()), (b'access-control-allow-credentials', b'true')]
+    return []
+
+
+async def _reply(send, status, body, headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), *headers],
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps(body).encode()})
+
+
+def _frame(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def event_stream(scope, receive, send):
+    """
+    GET /api/events/?ticket=<stream ticket>: a Server-Sent Events stream of
+    the user's `transaction` and `balance` events. Browsers get the ticket
+    from /api/auth/stream-ticket/ so no JWT ends up in a URL; other clients
+    may send `Authorization: Bearer <access token>` instead. It runs as a
+    bare ASGI app, bypassing Django's request cycle, so an idle connection
+    costs only a bounded queue and a waiting coroutine. The stream ends when
+    the access token it was opened with expires, and the client reconnects
+    with a new ticket.
+    """
+    cors = _cors_headers(scope)
+    if scope['method'] != 'GET':
+        await _reply(send, 405, {'error': 'Method not allowed'}, cors)
+        return
+    ticket, raw_token = _ticket(scope), _raw_token(scope)
+    if ticket:
+        user_id, expires_at = await sync_to_async(redeem_ticket)(ticket)
+    elif raw_token:
+        user_id, expires_at = await sync_to_async(_authenticate)(raw_token)
+    else:
+        user_id, expires_at = None, None
+    if user_id is None:
+        await _reply(send, 401, {'error': 'Authentication credentials were not provided or are invalid'}, cors)
+        return
+
+    subscription = broker.subscribe(user_id)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    next_event = None
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                *cors,
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+
+        while True:
+            timeout = min(HEARTBEAT_SECONDS, expires_at - time.time())
+            if timeout <= 0:
+                await send({'type': 'http.response.body', 'body': b''})
+                break
+            if next_event is None:
+                next_event = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait({next_event, disconnected}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                break
+            if next_event in done:
+                body = _frame(*next_event.result())
+                next_event = None
+            else:
+                body = b': keep-alive\n\n'
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+    finally:
+        broker.unsubscribe(subscription)
+        disconnected.cancel()
+        if next_event is not None:
+            next_event.cancel()
+
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
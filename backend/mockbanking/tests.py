@@ -0,0 +1,388 @@
+# backend/mockbanking/tests.py
+
+import asyncio
+import json
+import pickle
+import time
+from decimal import Decimal
+
+from asgiref.testing import ApplicationCommunicator
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import F, Sum, Value
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import Account, ProvisioningJob, QueuedTransfer, User
+from . import ratelimit
+from .asgi import application
+from .dates import parse_date_param
+from .events import broker
+from .money import Money, MoneyField, MoneyJSONRenderer, MoneySerializerField
+from .ratelimit import LocalStore, release_window, sliding_window, token_bucket
+from .sharding import shard_for_user_id
+from .sse import issue_ticket, redeem_ticket
+
+VELOCITY_RULES = [(60, 3, '100.00'), (3600, 10, '500.00')]
+
+
+class ParseDateParamTests(SimpleTestCase):
+    def test_date_is_start_of_day(self):
+        parsed = parse_date_param(QueryDict('start_date=2024-03-05'), 'start_date')
+        self.assertEqual(timezone.localtime(parsed).isoformat(), '2024-03-05T00:00:00+00:00')
+
+    def test_admin_datetime_is_kept(self):
+        parsed = parse_date_param(QueryDict('since=2024-03-05 12:30:00%2B00:00'), 'since')
+        self.assertEqual(parsed.isoformat(), '2024-03-05T12:30:00+00:00')
+
+    def test_missing_and_invalid(self):
+        self.assertIsNone(parse_date_param(QueryDict(), 'start_date'))
+        with self.assertRaisesMessage(ValueError, 'Invalid start_date, expected YYYY-MM-DD'):
+            parse_date_param(QueryDict('start_date=2024-13-40'), 'start_date')
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_burst_then_refill(self):
+        store = LocalStore(max_keys=10)
+
+        def hit(now):
+            return store.update('k', token_bucket(2, 1.0, now), now, 2)
+
+        self.assertEqual([hit(0), hit(0)], [0, 0])
+        self.assertEqual(hit(0), 1.0)
+        self.assertEqual(hit(1), 0)
+        self.assertEqual(hit(1), 1.0)
+
+
+class SlidingWindowTests(SimpleTestCase):
+    def setUp(self):
+        self.store = LocalStore(max_keys=10)
+
+    def reserve(self, now, amount=Decimal(1)):
+        return self.store.update('w', sliding_window(60, 2, Decimal(100), amount, now), now, 120)
+
+    def test_count_limit_weights_the_previous_window(self):
+        self.assertEqual([self.reserve(0), self.reserve(10)], [0, 0])
+        self.assertEqual(self.reserve(20), 40)
+        # Halfway into the next window the last one counts for half: 1 + 1 fits, 1 + 2 doesn't
+        self.assertEqual(self.reserve(90), 0)
+        self.assertEqual(self.reserve(90), 30)
+
+    def test_amount_limit_and_release(self):
+        self.assertEqual(self.reserve(0, Decimal(60)), 0)
+        self.assertEqual(self.reserve(1, Decimal(50)), 59)
+        self.store.update('w', release_window(60, Decimal(60), 2), 2, 120)
+        self.assertEqual(self.reserve(3, Decimal(50)), 0)
+
+    def test_state_is_forgotten_two_windows_later(self):
+        self.reserve(0)
+        self.reserve(0)
+        self.assertEqual(self.reserve(121), 0)
+        self.assertEqual(self.reserve(121), 0)
+
+
+class LocalStoreTests(SimpleTestCase):
+    def put(self, store, key, now, ttl):
+        calls = []
+
+        def apply(state):
+            calls.append(state)
+            return (state or 0) + 1, 0
+        return store.update(key, apply, now, ttl), calls
+
+    def test_each_key_expires_after_its_own_ttl(self):
+        store = LocalStore(max_keys=10)
+        self.put(store, 'long', 0, 100)
+        self.put(store, 'short', 0, 5)
+
+        _, seen = self.put(store, 'short', 10, 5)
+        self.assertEqual(seen, [None])
+        _, seen = self.put(store, 'long', 10, 100)
+        self.assertEqual(seen, [1])
+
+    def test_full_table_drops_only_expired_keys(self):
+        store = LocalStore(max_keys=2)
+        self.put(store, 'window', 0, 1000)
+        self.put(store, 'bucket', 0, 5)
+
+        # The refilled bucket behind the live window makes room
+        result, seen = self.put(store, 'new', 10, 5)
+        self.assertEqual((result, seen), (0, [None]))
+        self.assertEqual(len(store), 2)
+
+    def test_full_table_of_live_keys_fails_closed(self):
+        store = LocalStore(max_keys=2)
+        self.put(store, 'a', 0, 1000)
+        self.put(store, 'b', 0, 50)
+
+        wait, seen = self.put(store, 'c', 10, 5)
+        self.assertEqual((wait, seen), (40, []))
+        # Known keys keep working, and the new one gets in once a slot frees up
+        self.assertEqual(self.put(store, 'a', 10, 1000)[0], 0)
+        self.assertEqual(self.put(store, 'c', 50, 5)[0], 0)
+
+    def test_release_of_unknown_key_stores_nothing(self):
+        store = LocalStore(max_keys=10)
+        store.update('w', release_window(60, Decimal(1), 0), 0, 120)
+        self.assertEqual(len(store), 0)
+
+
+@override_settings(TRANSFER_VELOCITY_RULES=VELOCITY_RULES, RATE_LIMIT_ENABLED=True)
+class RateLimitMiddlewareTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        ratelimit._limiter = None
+        self.addCleanup(setattr, ratelimit, '_limiter', None)
+        user = User.objects.create(username='limited', email='limited@example.com', first_name='L', last_name='U')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+    def transfer(self, amount):
+        return self.client.post(
+            '/api/auth/transfer/', {'recipient_account_number': '000000000000', 'amount': amount},
+            content_type='application/json', **self.auth,
+        )
+
+    def test_amount_over_a_window_total_is_a_bad_request(self):
+        response = self.transfer('150.00')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {
+            'error': 'Amount exceeds the limit of 100.00 per 60 seconds', 'limit': '100.00', 'window_seconds': 60,
+        })
+        self.assertNotIn('Retry-After', response)
+
+    def test_window_limits_still_answer_429(self):
+        limiter = ratelimit.get_limiter()
+        user_id = User.objects.get(username='limited').pk
+        self.assertEqual(limiter.reserve_transfer(user_id, Decimal('80.00')), 0)
+
+        response = self.transfer('30.00')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_queued_transfer_stays_counted_when_the_worker_fails_it(self):
+        from accounts import transfers
+        from accounts.tests import make_account
+
+        sender = make_account(balance=0)
+        recipient = make_account(balance=0)
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(sender.user)}'}
+
+        def send(amount, async_=False):
+            return self.client.post(
+                '/api/auth/transfer/',
+                {'recipient_account_number': recipient.account_number, 'amount': amount, 'async': async_},
+                content_type='application/json', **auth,
+            )
+
+        self.assertEqual(send('60.00', async_=True).status_code, 202)
+        transfers.process_queue(sender._state.db)
+        self.assertEqual(QueuedTransfer.objects.using(sender._state.db).get().status, QueuedTransfer.FAILED)
+
+        self.assertEqual(send('50.00').status_code, 429)
+
+
+class MoneyTests(SimpleTestCase):
+    def test_construction_is_exact(self):
+        self.assertEqual(Money('12.34').cents, 1234)
+        self.assertEqual(Money(Decimal('0.1')).cents, 10)
+        self.assertEqual(Money(5).cents, 500)
+        self.assertEqual(Money.from_cents(-5).cents, -5)
+        with self.assertRaises(TypeError):
+            Money(0.1)
+        with self.assertRaises(TypeError):
+            Money(True)
+        for bad in ('1.005', 'abc', 'NaN', 'Infinity'):
+            with self.subTest(bad=bad), self.assertRaises(ValueError):
+                Money(bad)
+
+    def test_arithmetic_and_comparison(self):
+        total = sum([Money('0.10')] * 3, Money(0))
+        self.assertEqual(total, Money('0.30'))
+        self.assertEqual(total, Decimal('0.3'))
+        self.assertEqual(Money('1.50') * 3 - 1, Money('3.50'))
+        self.assertEqual(-Money('2.00'), Money(-2))
+        self.assertLess(Money('0.99'), 1)
+        self.assertNotEqual(Money('0.10'), Decimal('0.101'))
+        self.assertEqual(hash(Money('2.50')), hash(Decimal('2.5')))
+
+    def test_formatting(self):
+        self.assertEqual(str(Money.from_cents(-5)), '-0.05')
+        self.assertEqual(repr(Money('3')), "Money('3.00')")
+        self.assertEqual(f"{Money('1234.5'):,.2f}", '1,234.50')
+        self.assertEqual(pickle.loads(pickle.dumps(Money('7.07'))), Money('7.07'))
+
+    def test_serializer_field_round_trip(self):
+        field = MoneySerializerField()
+        self.assertEqual(field.to_internal_value('10.25'), Money('10.25'))
+        self.assertEqual(field.to_internal_value(3), Money(3))
+        self.assertEqual(field.to_representation(Money('10.2')), '10.20')
+        with self.assertRaises(ValidationError):
+            field.to_internal_value('1.234')
+
+    def test_renderer_writes_exact_strings(self):
+        rendered = MoneyJSONRenderer().render({'balance': Money('0.30'), 'count': 2})
+        self.assertEqual(json.loads(rendered), {'balance': '0.30', 'count': 2})
+
+
+class MoneyFieldTests(TestCase):
+    databases = '__all__'
+
+    def test_database_round_trip_in_cents(self):
+        user = User.objects.create(username='money', email='money@example.com', first_name='M', last_name='F')
+        db = shard_for_user_id(user.pk)
+        account = Account(user=user, balance=Money('1234.56'))
+        account.save(using=db)
+
+        with connections[db].cursor() as cursor:
+            cursor.execute('SELECT balance FROM accounts WHERE id = %s', [account.pk])
+            self.assertEqual(cursor.fetchone()[0], 123456)
+
+        loaded = Account.objects.using(db).get(pk=account.pk)
+        self.assertIsInstance(loaded.balance, Money)
+        self.assertEqual(loaded.balance, Money('1234.56'))
+
+        # Lookups and F() arithmetic stay in cents too
+        self.assertTrue(Account.objects.using(db).filter(balance='1234.56').exists())
+        Account.objects.using(db).filter(pk=account.pk).update(
+            balance=F('balance') + Value(Money('0.44'), output_field=MoneyField())
+        )
+        self.assertEqual(Account.objects.using(db).get(pk=account.pk).balance, Money(1235))
+        total = Account.objects.using(db).filter(pk=account.pk).aggregate(total=Sum('balance'))['total']
+        self.assertEqual((type(total), total), (Money, Money(1235)))
+
+    def test_invalid_values(self):
+        field = Account._meta.get_field('balance')
+        with self.assertRaises(DjangoValidationError):
+            field.clean('12.345', None)
+        with self.assertRaises(ValueError):
+            field.get_prep_value('1.001')
+
+
+def stream_scope(query_string=b'', headers=(), method='GET'):
+    return {
+        'type': 'http', 'method': method, 'path': '/api/events/',
+        'query_string': query_string, 'headers': list(headers),
+    }
+
+
+class BrokerTests(SimpleTestCase):
+    async def test_publish_reaches_every_subscription_of_the_user(self):
+        first, second, other = broker.subscribe(1), broker.subscribe(1), broker.subscribe(2)
+        try:
+            self.assertEqual(broker.connection_count(), 3)
+            broker.publish(1, 'balance', {'balance': '5.00'})
+            await asyncio.sleep(0)
+
+            self.assertEqual(first.queue.get_nowait(), ('balance', {'balance': '5.00'}))
+            self.assertEqual(second.queue.get_nowait(), ('balance', {'balance': '5.00'}))
+            self.assertTrue(other.queue.empty())
+        finally:
+            for subscription in (first, second, other):
+                broker.unsubscribe(subscription)
+        self.assertEqual(broker.connection_count(), 0)
+
+    async def test_full_queue_is_replaced_by_a_resync(self):
+        subscription = broker.subscribe(1, maxsize=2)
+        try:
+            for n in range(3):
+                broker.publish(1, 'transaction', {'id': n})
+            await asyncio.sleep(0)
+
+            self.assertEqual(subscription.queue.qsize(), 1)
+            self.assertEqual(subscription.queue.get_nowait(), ('resync', {}))
+        finally:
+            broker.unsubscribe(subscription)
+
+
+class EventStreamTests(SimpleTestCase):
+    async def open(self, scope):
+        communicator = ApplicationCommunicator(application, scope)
+        await communicator.send_input({'type': 'http.request'})
+        return communicator, await communicator.receive_output()
+
+    async def test_missing_or_bad_credentials_are_rejected(self):
+        bad_header = [(b'authorization', b'Bearer not-a-jwt')]
+        for scope in (stream_scope(), stream_scope(b'ticket=unknown'), stream_scope(headers=bad_header)):
+            with self.subTest(scope=scope):
+                communicator, start = await self.open(scope)
+                self.assertEqual(start['status'], 401)
+                body = await communicator.receive_output()
+                self.assertIn('error', json.loads(body['body']))
+
+    async def test_other_methods_are_not_allowed(self):
+        _, start = await self.open(stream_scope(method='POST'))
+        self.assertEqual(start['status'], 405)
+
+    async def test_ticket_opens_one_stream_of_the_users_events(self):
+        ticket = issue_ticket(7, time.time() + 60)
+        communicator, start = await self.open(stream_scope(f'ticket={ticket}'.encode()))
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+        self.assertEqual((await communicator.receive_output())['body'], b'retry: 5000\n\n')
+
+        while not broker.connection_count():
+            await asyncio.sleep(0)
+        broker.publish(8, 'balance', {'balance': '1.00'})
+        broker.publish(7, 'balance', {'balance': '2.00'})
+        message = await communicator.receive_output()
+        self.assertEqual(message['body'], b'event: balance\ndata: {"balance": "2.00"}\n\n')
+
+        await communicator.send_input({'type': 'http.disconnect'})
+        await communicator.wait()
+        self.assertEqual(broker.connection_count(), 0)
+
+        # The ticket is spent
+        _, start = await self.open(stream_scope(f'ticket={ticket}'.encode()))
+        self.assertEqual(start['status'], 401)
+
+    async def test_stream_ends_when_the_token_expires(self):
+        communicator, start = await self.open(stream_scope(f'ticket={issue_ticket(7, time.time())}'.encode()))
+        self.assertEqual(start['status'], 200)
+        await communicator.receive_output()
+        self.assertEqual(await communicator.receive_output(), {'type': 'http.response.body', 'body': b''})
+        await communicator.wait()
+
+    def test_ticket_can_only_be_redeemed_once(self):
+        ticket = issue_ticket(7, 123)
+        self.assertEqual(redeem_ticket(ticket), (7, 123))
+        self.assertEqual(redeem_ticket(ticket), (None, None))
+
+    @override_settings(EVENTS_TICKET_SECONDS=0)
+    def test_ticket_expires(self):
+        self.assertEqual(redeem_ticket(issue_ticket(7, 123)), (None, None))
+
+
+class StreamTicketEndpointTests(TestCase):
+    databases = '__all__'
+
+    def test_ticket_lasts_as_long_as_the_access_token(self):
+        user = User.objects.create(username='streamer', email='streamer@example.com', first_name='S', last_name='E')
+        token = AccessToken.for_user(user)
+
+        response = self.client.post('/api/auth/stream-ticket/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(redeem_ticket(response.json()['ticket']), (user.pk, token['exp']))
+        self.assertEqual(self.client.post('/api/auth/stream-ticket/').status_code, 401)
+
+
+class LifespanTests(TestCase):
+    databases = '__all__'
+
+    async def test_startup_fails_jobs_a_previous_process_left_behind(self):
+        job = await ProvisioningJob.objects.acreate(password_mode='plain', total=1, runner='')
+        communicator = ApplicationCommunicator(application, {'type': 'lifespan'})
+
+        await communicator.send_input({'type': 'lifespan.startup'})
+        self.assertEqual(await communicator.receive_output(), {'type': 'lifespan.startup.complete'})
+        await communicator.send_input({'type': 'lifespan.shutdown'})
+        self.assertEqual(await communicator.receive_output(), {'type': 'lifespan.shutdown.complete'})
+        await communicator.wait()
+
+        await job.arefresh_from_db()
+        self.assertEqual(job.status, ProvisioningJob.FAILED)
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mockbanking.settings')
 
 application = get_wsgi_application()
+
+# Provisioning jobs left unfinished by an earlier server process can't resume
+from accounts.provisioning import fail_orphaned_jobs  # noqa: E402
+
+fail_orphaned_jobs()
@@ -1,13 +1,124 @@
+from functools import cache
+
 from django.contrib import admin
-from .models import Transaction
+from django.shortcuts import redirect
+from mockbanking.admin_performance import AdminPerformanceMixin
+from mockbanking.dates import parse_date_param
+from mockbanking.sharded_admin import ShardedAdminMixin
+from mockbanking.sharding import shard_aliases
+from . import analytics
+from .archive import hot_cutoff
+from .models import ArchivedTransaction, Transaction
+
+
+def reaches_archive(request):
+    """Whether the changelist's date filter starts before the hot window."""
+    try:
+        since = parse_date_param(request.GET, 'timestamp__gte')
+    except ValueError:
+        return False
+    return since is not None and since < hot_cutoff()
+
+
+def _union(hot, archived):
+    ordering = hot.query.order_by
+    return hot.order_by().union(archived.order_by(), all=True).order_by(*ordering)
+
+
+class ArchiveChangeListMixin:
+    """
+    Lists archived transactions along with hot ones while the date filter
+    reaches past the hot window. The archive goes through the same filters,
+    search, ordering and cursor as the hot table (the columns match), and
+    the two are combined with UNION ALL, like the transactions API does.
+    """
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        if not reaches_archive(request):
+            return queryset
+        uncursored = getattr(self, 'uncursored_queryset', None)
+        root_queryset, self.root_queryset = self.root_queryset, ArchivedTransaction.objects.all()
+        try:
+            archived = super().get_queryset(request, exclude_parameters)
+        finally:
+            self.root_queryset = root_queryset
+        if uncursored is not None:
+            self.uncursored_queryset = _union(uncursored, self.uncursored_queryset)
+        return _union(queryset, archived)
+
+
+@cache
+def _with_archive(changelist_class):
+    return type(f'Archive{changelist_class.__name__}', (ArchiveChangeListMixin, changelist_class), {})
+
 
 @admin.register(Transaction)
-class TransactionAdmin(admin.ModelAdmin):
+class TransactionAdmin(AdminPerformanceMixin, ShardedAdminMixin, admin.ModelAdmin):
     list_display = (
         'id', 'user', 'transaction_type', 'amount',
         'description', 'timestamp', 'recipient_account_number', 'sender_account_number'
     )
+    list_select_related = ('user',)
     search_fields = ('user__username', 'recipient_account_number', 'sender_account_number', 'description')
     list_filter = ('transaction_type', 'timestamp')
     ordering = ('-timestamp',)
     list_per_page = 20
+
+    # ADMIN_PERFORMANCE_MODE
+    keyset_ordering = ('-timestamp', '-pk')
+    changelist_only = (
+        'id', 'user', 'user__username', 'user__first_name', 'user__last_name', 'transaction_type',
+        'amount', 'description', 'timestamp', 'recipient_account_number', 'sender_account_number',
+    )
+    performance_search_fields = ('=user__username', '=recipient_account_number', '=sender_account_number')
+
+    def get_changelist(self, request, **kwargs):
+        return _with_archive(super().get_changelist(request, **kwargs))
+
+    def get_actions(self, request):
+        # Archived rows are read-only, and actions can't run on a UNION
+        if reaches_archive(request):
+            return {}
+        return super().get_actions(request)
+
+    # Deleting a transaction can change analytics for buckets that have
+    # already closed, which are cached
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        analytics.invalidate(obj.user_id)
+
+    def delete_queryset(self, request, queryset):
+        user_ids = set(queryset.values_list('user_id', flat=True))
+        super().delete_queryset(request, queryset)
+        analytics.invalidate(*user_ids)
+
+    def change_view(self, request, object_id, form_url='', extra_context=None):
+        # Fall through to the archive for ids that have been moved out of the hot table
+        if object_id.isdigit() and self.get_object(request, object_id) is None:
+            for alias in shard_aliases():
+                if ArchivedTransaction.objects.using(alias).filter(pk=object_id).exists():
+                    return redirect('admin:transactions_archivedtransaction_change', object_id)
+        return super().change_view(request, object_id, form_url, extra_context)
+
+
+@admin.register(ArchivedTransaction)
+class ArchivedTransactionAdmin(ShardedAdminMixin, admin.ModelAdmin):
+    list_display = (
+        'id', 'user', 'transaction_type', 'amount',
+        'description', 'timestamp', 'recipient_account_number', 'sender_account_number'
+    )
+    search_fields = ('user__username', 'recipient_account_number', 'sender_account_number')
+    list_filter = ('transaction_type', 'timestamp')
+    ordering = ('-timestamp',)
+    list_per_page = 20
+
+    # Archived history is read-only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,238 @@
+# backend/transactions/analytics.py
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from mockbanking.money import Money
+
+from .statements import _net_since, _sources, next_month, signed_amount
+
+BUCKETS = {
+    'day': lambda field: TruncDate(field),
+    'week': lambda field: TruncWeek(field, output_field=DateField()),
+    'month': lambda field: TruncMonth(field, output_field=DateField()),
+}
+# Default range when no start_date is given, in days
+DEFAULT_SPAN = {'day': 30, 'week': 7 * 12, 'month': 365}
+MAX_BUCKETS = 400
+CACHE_TIMEOUT = 24 * 60 * 60
+# Transactions commit well within this long of their timestamp, so rows
+# older than it can be folded into the current bucket's cached totals
+SETTLE_TIME = timedelta(minutes=1)
+ZERO = Money(0)
+
+
+def _midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def bucket_after(start, bucket):
+    if bucket == 'week':
+        return start + timedelta(days=7)
+    if bucket == 'month':
+        return next_month(start)
+    return start + timedelta(days=1)
+
+
+def bucket_starts(first, stop, bucket):
+    starts = []
+    while first < stop:
+        starts.append(first)
+        first = bucket_after(first, bucket)
+    return starts
+
+
+def _bucket_span(first, stop, bucket):
+    """Number of buckets in [first, stop), without walking them."""
+    if bucket == 'month':
+        return (stop.year - first.year) * 12 + stop.month - first.month
+    days = (stop - first).days
+    return -(-days // 7) if bucket == 'week' else days
+
+
+def _sums():
+    return {
+        'credits': Sum('amount', filter=Q(transaction_type='CREDIT')),
+        'debits': Sum('amount', filter=Q(transaction_type='DEBIT')),
+        'credit_count': Count('id', filter=Q(transaction_type='CREDIT')),
+        'debit_count': Count('id', filter=Q(transaction_type='DEBIT')),
+        'moved': Sum(signed_amount(), filter=Q(moves_balance=True)),
+    }
+
+
+def _empty():
+    return [ZERO, ZERO, 0, 0, ZERO]
+
+
+def _add(entry, row):
+    entry[0] += row['credits'] or ZERO
+    entry[1] += row['debits'] or ZERO
+    entry[2] += row['credit_count']
+    entry[3] += row['debit_count']
+    entry[4] += row['moved'] or ZERO
+
+
+def _bucket_totals(db, user, bucket, first, stop):
+    """
+    {bucket start: [credits, debits, credit_count, debit_count, moved]} for
+    the buckets in [first, stop), one GROUP BY per table. `moved` is the net
+    change of the balance, which only transfers make.
+    """
+    totals = {}
+    if first >= stop:
+        return totals
+    since, until = _midnight(first), _midnight(stop)
+    for queryset in _sources(db, [user.pk], since, until):
+        for row in queryset.values(period=BUCKETS[bucket]('timestamp')).annotate(**_sums()):
+            _add(totals.setdefault(row['period'], _empty()), row)
+    return totals
+
+
+def _add_between(entry, db, user, since, until=None):
+    """Adds the totals of every transaction in [since, until) to `entry`."""
+    for queryset in _sources(db, [user.pk], since, until):
+        _add(entry, queryset.aggregate(**_sums()))
+
+
+def _cache():
+    return caches[getattr(settings, 'ANALYTICS_CACHE_ALIAS', 'default')]
+
+
+def _cache_key(user_id, bucket):
+    return f'transaction-analytics:v2:{user_id}:{bucket}'
+
+
+def _open_cache_key(user_id, bucket):
+    return f'transaction-analytics:v2:{user_id}:{bucket}:open'
+
+
+def invalidate(*user_ids):
+    _cache().delete_many([
+        key(user_id, bucket) for user_id in user_ids for bucket in BUCKETS for key in (_cache_key, _open_cache_key)
+    ])
+
+
+def closed_bucket_totals(db, user, bucket, first, stop):
+    """
+    Totals for buckets in [first, stop), all of which have ended. Closed
+    buckets never change (new transactions are always timestamped now), so
+    they are cached per user as one contiguous window that only the missing
+    edges are computed for. A window that would grow past MAX_BUCKETS is
+    started over from the requested range instead.
+    """
+    cache = _cache()
+    key = _cache_key(user.pk, bucket)
+    window = cache.get(key)
+    if (
+        window is None
+        or _bucket_span(min(first, window['first']), max(stop, window['stop']), bucket) > MAX_BUCKETS
+    ):
+        window = {'first': first, 'stop': first, 'totals': {}}
+    totals = window['totals']
+    changed = False
+    if first < window['first']:
+        totals.update(_bucket_totals(db, user, bucket, first, window['first']))
+        window['first'], changed = first, True
+    if stop > window['stop']:
+        totals.update(_bucket_totals(db, user, bucket, window['stop'], stop))
+        window['stop'], changed = stop, True
+    if changed:
+        cache.set(key, window, CACHE_TIMEOUT)
+    return totals
+
+
+def open_bucket_totals(db, user, bucket, current):
+    """
+    Totals for the bucket that started at `current` and is still running.
+    Transactions older than SETTLE_TIME are folded into a cached running
+    total, so each call only reads the rows that arrived since the last one.
+    """
+    cache = _cache()
+    key = _open_cache_key(user.pk, bucket)
+    state = cache.get(key)
+    if state is None or state['start'] != current:
+        state = {'start': current, 'until': _midnight(current), 'totals': _empty()}
+    settled = timezone.now() - SETTLE_TIME
+    if settled > state['until']:
+        _add_between(state['totals'], db, user, state['until'], settled)
+        state['until'] = settled
+        cache.set(key, state, CACHE_TIMEOUT)
+    totals = list(state['totals'])
+    _add_between(totals, db, user, state['until'])
+    return totals
+
+
+def series(db, user, bucket, first, stop, current_balance):
+    """
+    Per-bucket credits, debits and closing balance for buckets in [first,
+    stop). Credits and debits cover every transaction; the balance only
+    moves with transfers.
+    """
+    current = bucket_start(timezone.localdate(), bucket)
+    totals = dict(closed_bucket_totals(db, user, bucket, first, min(stop, current)))
+    if first <= current < stop:
+        totals[current] = open_bucket_totals(db, user, bucket, current)
+
+    # Walk back from the live balance to where the range starts
+    balance = current_balance - _net_since(db, [user.pk], _midnight(first)).get(user.pk, 0)
+    opening = balance
+
+    rows = []
+    for start in bucket_starts(first, stop, bucket):
+        credits, debits, credit_count, debit_count, moved = totals.get(start, _empty())
+        balance += moved
+        rows.append({
+            'period': start,
+            'credits': credits,
+            'debits': debits,
+            'credit_count': credit_count,
+            'debit_count': debit_count,
+            'net': credits - debits,
+            'balance': balance,
+        })
+    return opening, rows
+
+
+def top_counterparties(db, user, first, stop, limit):
+    """Accounts the user exchanged the most money with in [first, stop)."""
+    since, until = _midnight(first), _midnight(stop)
+    sources = _sources(db, [user.pk], since, until)
+    merged = {}
+    for queryset in sources:
+        rows = (
+            queryset.annotate(counterparty=Coalesce('recipient_account_number', 'sender_account_number'))
+            .filter(counterparty__gt='')
+            .values('counterparty')
+            .annotate(
+                total=Sum('amount'),
+                sent=Sum('amount', filter=Q(transaction_type='DEBIT')),
+                received=Sum('amount', filter=Q(transaction_type='CREDIT')),
+                count=Count('id'),
+            )
+            .order_by('-total', 'counterparty')
+        )
+        if len(sources) == 1:
+            rows = rows[:limit]
+        for row in rows:
+            entry = merged.setdefault(row['counterparty'], {
+                'account_number': row['counterparty'], 'total': ZERO, 'sent': ZERO, 'received': ZERO, 'count': 0,
+            })
+            entry['total'] += row['total']
+            entry['sent'] += row['sent'] or ZERO
+            entry['received'] += row['received'] or ZERO
+            entry['count'] += row['count']
+    ranked = sorted(merged.values(), key=lambda entry: (-entry['total'], entry['account_number']))
+    return ranked[:limit]
@@ -0,0 +1,65 @@
+# backend/transactions/archive.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedTransaction, Transaction
+
+# Columns shared by the hot and archive tables, in declaration order
+ARCHIVE_FIELDS = [field.attname for field in Transaction._meta.concrete_fields]
+
+
+def hot_cutoff():
+    """Transactions older than this live in the archive."""
+    days = getattr(settings, 'TRANSACTION_HOT_WINDOW_DAYS', 365)
+    return timezone.now() - timedelta(days=days)
+
+
+def history(db, user, include_archive=False, filters=None):
+    """
+    A user's transactions as one queryset, newest first. The archive is only
+    touched when `include_archive` is set; the two tables are then combined
+    with UNION ALL and `filters` (a callable taking and returning a queryset)
+    is applied to each side before the union.
+    """
+    filters = filters or (lambda queryset: queryset)
+    hot = filters(Transaction.objects.using(db).filter(user=user))
+    if not include_archive:
+        return hot
+    cold = filters(ArchivedTransaction.objects.using(db).filter(user=user))
+    return hot.order_by().union(cold.order_by(), all=True).order_by('-timestamp', '-id')
+
+
+def get_transaction(db, user, transaction_id):
+    """Look a transaction up in the hot table, falling back to the archive."""
+    try:
+        return Transaction.objects.using(db).get(id=transaction_id, user=user)
+    except Transaction.DoesNotExist:
+        return ArchivedTransaction.objects.using(db).get(id=transaction_id, user=user)
+
+
+def archive_batch(db, cutoff, batch_size=1000):
+    """
+    Move up to `batch_size` of the oldest transactions before `cutoff` into
+    the archive in one short transaction. Returns the number of rows moved.
+    """
+    with transaction.atomic(using=db):
+        rows = list(
+            Transaction.objects.using(db)
+            .filter(timestamp__lt=cutoff)
+            .order_by('timestamp', 'id')
+            .values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ArchivedTransaction.objects.using(db).bulk_create(
+            [ArchivedTransaction(**row) for row in rows],
+            ignore_conflicts=True,
+        )
+        # A single DELETE: nothing listens for Transaction deletes. Cached
+        # analytics read both tables, so moving rows needs no invalidation.
+        Transaction.objects.using(db).filter(id__in=[row['id'] for row in rows]).delete()
+    return len(rows)
@@ -0,0 +1,42 @@
+# backend/transactions/management/commands/archive_transactions.py
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from mockbanking.sharding import shard_aliases
+from transactions.archive import archive_batch, hot_cutoff
+
+
+class Command(BaseCommand):
+    help = "Move transactions older than the hot window into the archive table, in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help="Archive transactions older than this many days (default: TRANSACTION_HOT_WINDOW_DAYS).",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help="Seconds to sleep between batches to leave room for live traffic.",
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] is None:
+            cutoff = hot_cutoff()
+        else:
+            cutoff = timezone.now() - timedelta(days=options['days'])
+
+        for alias in shard_aliases():
+            moved = 0
+            while True:
+                count = archive_batch(alias, cutoff, options['batch_size'])
+                if not count:
+                    break
+                moved += count
+                if options['pause']:
+                    time.sleep(options['pause'])
+            self.stdout.write(f"{alias}: archived {moved} transaction(s) older than {cutoff:%Y-%m-%d}.")
@@ -0,0 +1,86 @@
+# backend/transactions/management/commands/generate_statements.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from mockbanking.sharding import shard_aliases
+from transactions.models import StatementCheckpoint
+from transactions.statements import generate_range, parse_month, plan_ranges, previous_month
+
+
+def _init_worker():
+    # Spawned workers start with a fresh interpreter; forked ones are already set up
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate monthly statements for every account. Accounts are split into "
+        "id ranges processed in parallel; finished ranges are checkpointed, so "
+        "an interrupted run picks up where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help="YYYY-MM (default: last month)")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Process pool size; 1 runs inline.")
+        parser.add_argument('--range-size', type=int, default=500, help="Accounts per work unit.")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Rows fetched per database round trip.")
+        parser.add_argument('--restart', action='store_true', help="Discard checkpoints and regenerate everything.")
+
+    def handle(self, *args, **options):
+        try:
+            if options['month']:
+                month = parse_month(options['month'])
+            else:
+                month = previous_month(timezone.localdate().replace(day=1))
+        except ValueError:
+            raise CommandError("--month must look like YYYY-MM")
+
+        if options['restart']:
+            StatementCheckpoint.objects.filter(month=month).delete()
+
+        for alias in shard_aliases():
+            if not StatementCheckpoint.objects.filter(month=month, shard=alias).exists():
+                StatementCheckpoint.objects.bulk_create([
+                    StatementCheckpoint(month=month, shard=alias, first_account_id=first, last_account_id=last)
+                    for first, last in plan_ranges(alias, options['range_size'])
+                ])
+
+        pending = list(
+            StatementCheckpoint.objects.filter(month=month, completed_at__isnull=True)
+            .order_by('shard', 'first_account_id')
+            .values_list('shard', 'first_account_id', 'last_account_id')
+        )
+        self.stdout.write(f"{month:%Y-%m}: {len(pending)} account range(s) to process.")
+
+        jobs = [
+            (month.isoformat(), alias, first, last, options['chunk_size'])
+            for alias, first, last in pending
+        ]
+        written = failed = 0
+
+        if options['workers'] <= 1:
+            for job in jobs:
+                written += generate_range(*job)
+        else:
+            # Never share open database connections with child processes
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+                futures = {pool.submit(generate_range, *job): job for job in jobs}
+                for future in as_completed(futures):
+                    try:
+                        written += future.result()
+                    except Exception as e:
+                        failed += 1
+                        alias, first, last = futures[future][1:4]
+                        self.stderr.write(f"{alias} accounts {first}-{last} failed: {e}")
+
+        self.stdout.write(f"Wrote {written} statement(s).")
+        if failed:
+            raise CommandError(f"{failed} range(s) failed; rerun the command to resume.")
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:02
+
+from django.db import migrations, models
+from django.db.models import Q
+
+# Transfers and refunds describe themselves like this and always name the
+# other account. Rows posted through the API before this migration can't be
+# told apart otherwise, so the few that copy the wording are taken as
+# transfers too.
+TRANSFER_ROWS = (
+    (Q(description__startswith='Transfer to ') & Q(recipient_account_number__isnull=False))
+    | (Q(description__startswith='Transfer from ') & Q(sender_account_number__isnull=False))
+    | (Q(description__startswith='Refund: transfer to ') & Q(sender_account_number__isnull=False))
+)
+
+
+def mark_transfers(apps, schema_editor):
+    db = schema_editor.connection.alias
+    for name in ('Transaction', 'ArchivedTransaction'):
+        apps.get_model('transactions', name).objects.using(db).filter(TRANSFER_ROWS).update(moves_balance=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_money_in_cents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtransaction',
+            name='moves_balance',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='moves_balance',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_transfers, migrations.RunPython.noop),
+    ]
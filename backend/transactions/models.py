@@ -2,6 +2,7 @@
 
 from django.db import models
 from django.contrib.auth import get_user_model
+from mockbanking.money import MoneyField
 
 User = get_user_model()
 
@@ -14,7 +15,7 @@ class Transaction(models.Model):
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions')
     transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
-    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    amount = MoneyField()
     description = models.TextField(blank=True)
 
     # Optional fields for transfer tracking
@@ -22,12 +23,15 @@ class Transaction(models.Model):
     sender_account_number = models.CharField(max_length=12, blank=True, null=True)
 
     timestamp = models.DateTimeField(auto_now_add=True)
-    balance_after_transaction = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    balance_after_transaction = MoneyField(null=True, blank=True)
+    # Set on rows written by transfers. Transactions posted through the API
+    # are records only: they leave Account.balance alone.
+    moves_balance = models.BooleanField(default=False)
 
     def save(self, *args, **kwargs):
         if not self.balance_after_transaction:
             # Get the current balance after this transaction
-            self.balance_after_transaction = self.user.account.balance
+            self.balance_after_transaction = self.user.account.total_balance
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -35,4 +39,88 @@ class Transaction(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
-        db_table = 'transactions'
\ No newline at end of file
+        db_table = 'transactions'
+        indexes = [
+            # Serves date filters, archiving and the admin's (timestamp, id) cursor
+            models.Index(fields=['timestamp', 'id'], name='transactions_timestamp_id_idx'),
+            # Per-user date ranges (history, statements, analytics)
+            models.Index(fields=['user', 'timestamp'], name='transactions_user_ts_idx'),
+            models.Index(fields=['recipient_account_number'], name='transactions_recipient_idx'),
+            models.Index(fields=['sender_account_number'], name='transactions_sender_idx'),
+        ]
+
+
+class ArchivedTransaction(models.Model):
+    """
+    Cold copy of a transaction older than the hot window, moved here by
+    `manage.py archive_transactions`. Columns mirror Transaction one for one
+    (same order, same ids) so the two tables can be UNIONed; the only index
+    is (user, timestamp), which is all that history lookups need.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_transactions', db_index=False)
+    transaction_type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    amount = MoneyField()
+    description = models.TextField(blank=True)
+    recipient_account_number = models.CharField(max_length=12, blank=True, null=True)
+    sender_account_number = models.CharField(max_length=12, blank=True, null=True)
+    timestamp = models.DateTimeField()
+    balance_after_transaction = MoneyField(null=True, blank=True)
+    moves_balance = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.transaction_type} - ${self.amount} on {self.timestamp} (archived)"
+
+    class Meta:
+        ordering = ['-timestamp']
+        db_table = 'transactions_archive'
+        indexes = [models.Index(fields=['user', 'timestamp'], name='transactions_archive_user_ts')]
+
+class MonthlyStatement(models.Model):
+    """
+    Precomputed monthly statement for one account, written by
+    `manage.py generate_statements` and served by the statement endpoint.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='statements')
+    account_number = models.CharField(max_length=12)
+    month = models.DateField(help_text="First day of the statement month")
+    opening_balance = MoneyField()
+    closing_balance = MoneyField()
+    total_credits = MoneyField(default=0)
+    total_debits = MoneyField(default=0)
+    credit_count = models.PositiveIntegerField(default=0)
+    debit_count = models.PositiveIntegerField(default=0)
+    line_items = models.JSONField(default=list)
+    generated_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.account_number} statement for {self.month:%Y-%m}"
+
+    class Meta:
+        ordering = ['-month']
+        db_table = 'monthly_statements'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='unique_statement_per_month'),
+        ]
+
+
+class StatementCheckpoint(models.Model):
+    """
+    Progress of a statement run: one row per (month, shard, account id range).
+    Ranges with `completed_at` set are skipped when a run is resumed.
+    """
+    month = models.DateField()
+    shard = models.CharField(max_length=100)
+    first_account_id = models.BigIntegerField()
+    last_account_id = models.BigIntegerField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.shard} [{self.first_account_id}, {self.last_account_id}]"
+
+    class Meta:
+        db_table = 'statement_checkpoints'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['month', 'shard', 'first_account_id'], name='unique_statement_checkpoint'
+            ),
+        ]
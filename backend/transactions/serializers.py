@@ -1,10 +1,14 @@
 # backend/transactions/serializers.py
 
 from rest_framework import serializers
-from .models import Transaction
+from mockbanking.money import MoneySerializerField
+from mockbanking.sharding import db_for_user
+from .models import MonthlyStatement, Transaction
 
 class TransactionSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
+    amount = MoneySerializerField()
+    balance_after_transaction = MoneySerializerField(allow_null=True, required=False)
     formatted_amount = serializers.SerializerMethodField()
     formatted_timestamp = serializers.SerializerMethodField()
 
@@ -35,6 +39,8 @@ class TransactionSerializer(serializers.ModelSerializer):
         return obj.timestamp.strftime('%b %d, %Y')
 
 class TransactionCreateSerializer(serializers.ModelSerializer):
+    amount = MoneySerializerField()
+
     class Meta:
         model = Transaction
         fields = [
@@ -45,7 +51,40 @@ class TransactionCreateSerializer(serializers.ModelSerializer):
             'sender_account_number'
         ]
 
+    def create(self, validated_data):
+        # Manager.create() carries no routing hint, so pick the owner's shard here
+        return Transaction.objects.db_manager(db_for_user(validated_data['user'])).create(**validated_data)
+
     def validate_amount(self, value):
         if value <= 0:
             raise serializers.ValidationError("Amount must be greater than zero")
-        return value
\ No newline at end of file
+        return value
+
+
+class MonthlyStatementSerializer(serializers.ModelSerializer):
+    month = serializers.DateField(format='%Y-%m')
+    opening_balance = MoneySerializerField(read_only=True)
+    closing_balance = MoneySerializerField(read_only=True)
+    total_credits = MoneySerializerField(read_only=True)
+    total_debits = MoneySerializerField(read_only=True)
+
+    class Meta:
+        model = MonthlyStatement
+        fields = [
+            'account_number',
+            'month',
+            'opening_balance',
+            'closing_balance',
+            'total_credits',
+            'total_debits',
+            'credit_count',
+            'debit_count',
+            'generated_at'
+        ]
+        read_only_fields = fields
+
+
+class MonthlyStatementDetailSerializer(MonthlyStatementSerializer):
+    class Meta(MonthlyStatementSerializer.Meta):
+        fields = MonthlyStatementSerializer.Meta.fields + ['line_items']
+        read_only_fields = fields
\ No newline at end of file
@@ -0,0 +1,30 @@
+# backend/transactions/signals.py
+
+from django.db.models.signals import post_save
+
+from mockbanking import events
+from . import analytics
+from .models import Transaction
+
+
+def invalidate_analytics(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Cached analytics only cover buckets that have ended and the settled
+    part of the current one, which new transactions never land in; edits
+    can change them. Deletions invalidate
+    explicitly where they happen: a post_delete receiver would stop
+    archive_batch's bulk delete from running as a single DELETE.
+    """
+    if raw or created:
+        return
+    analytics.invalidate(instance.user_id)
+
+
+def publish_new_transaction(sender, instance, created=False, raw=False, using=None, **kwargs):
+    # Live /api/events/ streams; bulk_create callers publish for themselves
+    if created and not raw:
+        events.publish_transactions([instance], using)
+
+
+post_save.connect(publish_new_transaction, sender=Transaction, dispatch_uid='publish_new_transaction')
+post_save.connect(invalidate_analytics, sender=Transaction, dispatch_uid='invalidate_analytics_on_save')
@@ -0,0 +1,195 @@
+# backend/transactions/statements.py
+
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Case, F, Sum, When
+from django.utils import timezone
+
+from accounts.models import Account, AccountBalanceShard
+from mockbanking.money import MoneyField
+from .archive import hot_cutoff
+from .models import ArchivedTransaction, MonthlyStatement, StatementCheckpoint, Transaction
+
+LINE_FIELDS = [
+    'id', 'user_id', 'transaction_type', 'amount', 'description',
+    'recipient_account_number', 'sender_account_number', 'timestamp', 'balance_after_transaction', 'moves_balance',
+]
+
+
+def parse_month(value):
+    """'YYYY-MM' -> date of the first day of that month."""
+    year, month = value.split('-')
+    return date(int(year), int(month), 1)
+
+
+def previous_month(month):
+    return (month - timedelta(days=1)).replace(day=1)
+
+
+def next_month(month):
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def month_bounds(month):
+    start = timezone.make_aware(datetime.combine(month, time.min))
+    end = timezone.make_aware(datetime.combine(next_month(month), time.min))
+    return start, end
+
+
+def plan_ranges(db, range_size):
+    """Split a shard's accounts into consecutive id ranges of `range_size` accounts."""
+    ranges = []
+    first = last = None
+    count = 0
+    account_ids = Account.objects.using(db).order_by('id').values_list('id', flat=True)
+    for account_id in account_ids.iterator(chunk_size=10000):
+        if first is None:
+            first = account_id
+        last = account_id
+        count += 1
+        if count == range_size:
+            ranges.append((first, last))
+            first, count = None, 0
+    if first is not None:
+        ranges.append((first, last))
+    return ranges
+
+
+def _sources(db, user_ids, since, until=None):
+    """Hot transactions for `user_ids` in [since, until), plus the archive if it reaches that far back."""
+    sources = [Transaction.objects.using(db)]
+    if since < hot_cutoff():
+        sources.append(ArchivedTransaction.objects.using(db))
+    filtered = []
+    for queryset in sources:
+        queryset = queryset.filter(user_id__in=user_ids, timestamp__gte=since)
+        if until is not None:
+            queryset = queryset.filter(timestamp__lt=until)
+        filtered.append(queryset.order_by())
+    return filtered
+
+
+def signed_amount():
+    """A transaction's effect on the balance: +amount for credits, -amount for debits."""
+    return Case(
+        When(transaction_type='CREDIT', then=F('amount')),
+        default=-F('amount'),
+        output_field=MoneyField(),
+    )
+
+
+def _net_since(db, user_ids, since):
+    """
+    Net change of each user's balance from `since` until now, aggregated in
+    SQL. Only transfers count: posted transactions never moved the balance.
+    """
+    net = {}
+    for queryset in _sources(db, user_ids, since):
+        rows = queryset.filter(moves_balance=True).values('user_id').annotate(net=Sum(signed_amount()))
+        for user_id, total in rows.values_list('user_id', 'net'):
+            net[user_id] = net.get(user_id, 0) + total
+    return net
+
+
+def _line_items(db, user_ids, start, end, chunk_size):
+    """Month's transactions for `user_ids`, streamed in (user, time) order."""
+    sources = [queryset.values(*LINE_FIELDS) for queryset in _sources(db, user_ids, start, end)]
+    rows = sources[0]
+    if len(sources) > 1:
+        rows = rows.union(*sources[1:], all=True)
+    return rows.order_by('user_id', 'timestamp', 'id').iterator(chunk_size=chunk_size)
+
+
+def _line_item(row):
+    return {
+        'id': row['id'],
+        'timestamp': row['timestamp'].isoformat(),
+        'transaction_type': row['transaction_type'],
+        'amount': str(row['amount']),
+        'description': row['description'],
+        'recipient_account_number': row['recipient_account_number'],
+        'sender_account_number': row['sender_account_number'],
+        'balance_after_transaction': (
+            str(row['balance_after_transaction']) if row['balance_after_transaction'] is not None else None
+        ),
+        'moves_balance': row['moves_balance'],
+    }
+
+
+def generate_range(month_iso, db, first_account_id, last_account_id, chunk_size=2000):
+    """
+    Build the statements for accounts with ids in [first, last] on shard `db`
+    and mark the matching checkpoint done. Runs inside pool workers, so it
+    takes only picklable arguments. Returns the number of statements written.
+    """
+    month = date.fromisoformat(month_iso)
+    start, end = month_bounds(month)
+
+    accounts = list(
+        Account.objects.using(db)
+        .filter(id__range=(first_account_id, last_account_id))
+        .values('id', 'user_id', 'account_number', 'balance', 'balance_shards')
+    )
+    user_ids = [account['user_id'] for account in accounts]
+
+    parked = dict(
+        AccountBalanceShard.objects.using(db)
+        .filter(account_id__in=[a['id'] for a in accounts if a['balance_shards']])
+        .values('account_id').annotate(total=Sum('balance'))
+        .values_list('account_id', 'total')
+    )
+    previous = dict(
+        MonthlyStatement.objects.using(db)
+        .filter(user_id__in=user_ids, month=previous_month(month))
+        .values_list('user_id', 'closing_balance')
+    )
+    # Without last month's statement, walk back from the live balance
+    net_since = _net_since(db, [uid for uid in user_ids if uid not in previous], start)
+
+    lines_by_user = {
+        user_id: list(rows)
+        for user_id, rows in groupby(_line_items(db, user_ids, start, end, chunk_size), key=lambda row: row['user_id'])
+    }
+
+    statements = []
+    for account in accounts:
+        user_id = account['user_id']
+        if user_id in previous:
+            opening = previous[user_id]
+        else:
+            current = account['balance'] + (parked.get(account['id']) or 0)
+            opening = current - net_since.get(user_id, 0)
+
+        # Every transaction is listed; the totals add up what moved the balance
+        rows = lines_by_user.get(user_id, [])
+        moved = [row for row in rows if row['moves_balance']]
+        credits = [row['amount'] for row in moved if row['transaction_type'] == 'CREDIT']
+        debits = [row['amount'] for row in moved if row['transaction_type'] == 'DEBIT']
+        total_credits = sum(credits, 0)
+        total_debits = sum(debits, 0)
+
+        statements.append(MonthlyStatement(
+            user_id=user_id,
+            account_number=account['account_number'],
+            month=month,
+            opening_balance=opening,
+            closing_balance=opening + total_credits - total_debits,
+            total_credits=total_credits,
+            total_debits=total_debits,
+            credit_count=len(credits),
+            debit_count=len(debits),
+            line_items=[_line_item(row) for row in rows],
+        ))
+
+    # Regenerating a range replaces its statements, so an interrupted run can
+    # simply redo the range.
+    with transaction.atomic(using=db):
+        MonthlyStatement.objects.using(db).filter(user_id__in=user_ids, month=month).delete()
+        MonthlyStatement.objects.using(db).bulk_create(statements, batch_size=500)
+
+    StatementCheckpoint.objects.filter(
+        month=month, shard=db, first_account_id=first_account_id
+    ).update(completed_at=timezone.now())
+    return len(statements)
@@ -1,3 +1,502 @@
-from django.test import TestCase
+# backend/transactions/tests.py
 
-# Create your tests here.
+from concurrent.futures import Future
+from datetime import datetime, time, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib import admin
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.tests import make_account
+from mockbanking.admin_performance import CURSOR_VAR, EstimatedCountPaginator
+from mockbanking.sharding import is_sharded
+from . import analytics
+from .archive import archive_batch, hot_cutoff
+from .management.commands import generate_statements
+from .models import ArchivedTransaction, MonthlyStatement, StatementCheckpoint, Transaction
+from .statements import next_month, previous_month
+
+
+def add_transactions(account, count, age=timedelta(0)):
+    db = account._state.db
+    created = Transaction.objects.using(db).bulk_create([
+        Transaction(user=account.user, transaction_type='CREDIT', amount=1, balance_after_transaction=1)
+        for _ in range(count)
+    ])
+    # `timestamp` is auto_now_add, so backdate after the insert
+    Transaction.objects.using(db).filter(pk__in=[t.pk for t in created]).update(timestamp=timezone.now() - age)
+
+
+def add_row(account, transaction_type, amount, when, moves_balance=True):
+    """One transaction at `when`; transfers move the balance, posted transactions don't."""
+    db = account._state.db
+    row = Transaction.objects.using(db).create(
+        user=account.user, transaction_type=transaction_type, amount=amount,
+        balance_after_transaction=1, moves_balance=moves_balance,
+    )
+    Transaction.objects.using(db).filter(pk=row.pk).update(timestamp=when)
+    return row
+
+
+def noon(day):
+    return timezone.make_aware(datetime.combine(day, time(12)))
+
+
+def month_day(month, day):
+    return noon(month.replace(day=day))
+
+
+class InlinePool:
+    """Stands in for the command's process pool: test databases live in this process's memory."""
+
+    def __init__(self, max_workers, initializer):
+        self.max_workers = max_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class TransactionListArchiveTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.account = make_account()
+        self.client = APIClient()
+        self.client.force_authenticate(self.account.user)
+
+    def get(self, **params):
+        response = self.client.get('/api/transactions/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def archive_old(self):
+        while archive_batch(self.account._state.db, hot_cutoff()):
+            pass
+
+    def test_archive_choice_is_the_same_on_every_page(self):
+        add_transactions(self.account, 5, age=timedelta(days=400))
+        add_transactions(self.account, 15)
+        self.archive_old()
+        self.assertEqual(ArchivedTransaction.objects.using(self.account._state.db).count(), 5)
+
+        pages = [self.get(page=page) for page in (1, 2)]
+
+        for page in pages:
+            self.assertEqual(page['count'], 20)
+            self.assertTrue(page['results']['summary']['includes_archive'])
+            self.assertEqual(page['results']['summary']['total_transactions'], 20)
+        self.assertEqual(len(pages[0]['results']['transactions']), 10)
+        self.assertEqual(len(pages[1]['results']['transactions']), 10)
+
+    def test_start_date_inside_hot_window_skips_the_archive(self):
+        add_transactions(self.account, 5, age=timedelta(days=400))
+        add_transactions(self.account, 3)
+        self.archive_old()
+        start = (timezone.localdate() - timedelta(days=7)).isoformat()
+
+        with CaptureQueriesContext(connections[self.account._state.db]) as queries:
+            body = self.get(start_date=start)
+        self.assertFalse([q for q in queries if 'transactions_archive' in q['sql']])
+        self.assertFalse(body['results']['summary']['includes_archive'])
+        self.assertEqual(body['count'], 3)
+
+    def test_no_matching_archived_rows_skips_the_union(self):
+        add_transactions(self.account, 3)
+
+        body = self.get()
+
+        self.assertFalse(body['results']['summary']['includes_archive'])
+        self.assertEqual(body['count'], 3)
+
+    def test_invalid_date_is_rejected(self):
+        response = self.client.get('/api/transactions/', {'start_date': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Invalid start_date, expected YYYY-MM-DD'})
+
+
+class TransactionAdminArchiveTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.account = make_account()
+        add_transactions(self.account, 2, age=timedelta(days=400))
+        while archive_batch(self.account._state.db, hot_cutoff()):
+            pass
+        add_transactions(self.account, 3)
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin_user)
+
+    def changelist(self, **params):
+        response = self.client.get('/admin/transactions/transaction/', params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_range_past_the_hot_window_lists_archived_rows(self):
+        since = timezone.now() - timedelta(days=500)
+        for mode in (True, False):
+            with self.subTest(performance_mode=mode), override_settings(ADMIN_PERFORMANCE_MODE=mode):
+                response = self.changelist(timestamp__gte=since.isoformat())
+
+                self.assertEqual(response.context['cl'].result_count, 5)
+                self.assertEqual(len(response.context['cl'].result_list), 5)
+                self.assertFalse(response.context['action_form'])
+
+    def test_range_inside_the_hot_window_lists_hot_rows_only(self):
+        since = timezone.now() - timedelta(days=7)
+        for params in ({}, {'timestamp__gte': since.isoformat()}):
+            with self.subTest(params=params):
+                self.assertEqual(len(self.changelist(**params).context['cl'].result_list), 3)
+
+    @override_settings(ADMIN_PERFORMANCE_MODE=True)
+    def test_keyset_pages_run_through_the_archive(self):
+        add_transactions(self.account, 20)
+        since = (timezone.now() - timedelta(days=500)).isoformat()
+
+        first = self.changelist(timestamp__gte=since).context['cl']
+        self.assertEqual(len(first.result_list), 20)
+        second = self.changelist(**QueryDict(first.next_page_url.lstrip('?')).dict()).context['cl']
+        self.assertEqual(len(second.result_list), 5)
+        self.assertFalse({t.pk for t in first.result_list} & {t.pk for t in second.result_list})
+        self.assertIsNone(second.next_page_url)
+
+
+@override_settings(ADMIN_PERFORMANCE_MODE=True)
+class TransactionAdminPagingTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.account = make_account()
+        add_transactions(self.account, 60)
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin_user)
+
+    def changelist(self, **params):
+        response = self.client.get('/admin/transactions/transaction/', params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_older_links_page_by_cursor(self):
+        seen, params, pages = [], {}, 0
+        while True:
+            cl = self.changelist(**params).context['cl']
+            pages += 1
+            self.assertIsInstance(cl.paginator, EstimatedCountPaginator)
+            self.assertEqual(len(cl.result_list), 20)
+            seen += [t.pk for t in cl.result_list]
+            if cl.next_page_url is None:
+                break
+            params = QueryDict(cl.next_page_url.lstrip('?')).dict()
+            self.assertIn(CURSOR_VAR, params)
+
+        self.assertEqual(pages, 3)
+        # Every row once, newest first (the timestamps tie, so by id)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(len(set(seen)), 60)
+
+    def test_other_orderings_fall_back_to_numbered_pages(self):
+        first = self.changelist(o='4').context['cl']
+        self.assertIsNone(first.keyset)
+        self.assertEqual((first.result_count, first.paginator.num_pages), (60, 3))
+
+        last = self.changelist(o='4', p='3').context['cl']
+        self.assertEqual(len(last.result_list), 20)
+        self.assertFalse({t.pk for t in first.result_list} & {t.pk for t in last.result_list})
+
+    def test_delete_selected_is_dropped_when_sharded(self):
+        response = self.changelist()
+        actions = admin.site._registry[Transaction].get_actions(response.wsgi_request)
+        self.assertEqual('delete_selected' in actions, not is_sharded())
+
+
+class StatementTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.this_month = timezone.localdate().replace(day=1)
+        self.last_month = previous_month(self.this_month)
+        self.account = make_account(balance=1000)
+        self.client = APIClient()
+        self.client.force_authenticate(self.account.user)
+
+    def generate(self, month, **options):
+        out = StringIO()
+        call_command('generate_statements', month=f'{month:%Y-%m}', stdout=out, **options)
+        return out.getvalue()
+
+    def statement(self, account, month):
+        return MonthlyStatement.objects.using(account._state.db).get(user=account.user, month=month)
+
+    def test_opening_and_closing_count_only_transfers(self):
+        add_row(self.account, 'CREDIT', 200, month_day(self.last_month, 3))
+        add_row(self.account, 'DEBIT', 30, month_day(self.last_month, 5))
+        add_row(self.account, 'CREDIT', 50, month_day(self.last_month, 7), moves_balance=False)
+        add_row(self.account, 'DEBIT', 100, timezone.now())
+        add_row(self.account, 'DEBIT', 999, timezone.now(), moves_balance=False)
+
+        self.generate(self.last_month, workers=1)
+
+        statement = self.statement(self.account, self.last_month)
+        # 1000 now, after -100 this month and +200 -30 last month
+        self.assertEqual(statement.opening_balance, 930)
+        self.assertEqual(statement.closing_balance, 1100)
+        self.assertEqual((statement.total_credits, statement.total_debits), (200, 30))
+        self.assertEqual((statement.credit_count, statement.debit_count), (1, 1))
+        self.assertEqual([line['moves_balance'] for line in statement.line_items], [True, True, False])
+
+    def test_opening_is_the_previous_closing(self):
+        MonthlyStatement.objects.using(self.account._state.db).create(
+            user=self.account.user, account_number=self.account.account_number,
+            month=previous_month(self.last_month), opening_balance=0, closing_balance=777,
+        )
+        add_row(self.account, 'CREDIT', 23, month_day(self.last_month, 2))
+
+        self.generate(self.last_month, workers=1)
+
+        statement = self.statement(self.account, self.last_month)
+        self.assertEqual((statement.opening_balance, statement.closing_balance), (777, 800))
+
+    def test_rerun_resumes_unfinished_ranges(self):
+        other = make_account(balance=500, shard=self.account._state.db)
+        self.generate(self.last_month, workers=1, range_size=1)
+        kept = self.statement(self.account, self.last_month)
+        # As if the run had stopped before the second range
+        self.statement(other, self.last_month).delete()
+        StatementCheckpoint.objects.filter(first_account_id=other.pk).update(completed_at=None)
+
+        out = self.generate(self.last_month, workers=1, range_size=1)
+
+        self.assertIn('1 account range(s) to process', out)
+        self.assertEqual(self.statement(self.account, self.last_month).generated_at, kept.generated_at)
+        self.assertEqual(self.statement(other, self.last_month).closing_balance, 500)
+
+    @mock.patch.object(generate_statements, 'ProcessPoolExecutor', InlinePool)
+    def test_worker_pool_reports_failed_ranges(self):
+        other = make_account(balance=500, shard=self.account._state.db)
+        real = generate_statements.generate_range
+
+        def flaky(month_iso, db, first, last, chunk_size):
+            if first == other.pk:
+                raise RuntimeError('worker died')
+            return real(month_iso, db, first, last, chunk_size)
+
+        with mock.patch.object(generate_statements, 'generate_range', flaky):
+            with self.assertRaisesMessage(CommandError, '1 range(s) failed'):
+                self.generate(self.last_month, workers=2, range_size=1, stderr=StringIO())
+        self.assertFalse(MonthlyStatement.objects.using(other._state.db).filter(user=other.user).exists())
+
+        out = self.generate(self.last_month, workers=2, range_size=1)
+        self.assertIn('Wrote 1 statement(s).', out)
+        self.assertEqual(self.statement(other, self.last_month).closing_balance, 500)
+
+    def test_statement_endpoints(self):
+        add_row(self.account, 'CREDIT', 10, month_day(self.last_month, 4))
+        self.generate(self.last_month, workers=1)
+
+        listed = self.client.get('/api/statements/')
+        self.assertEqual(listed.status_code, 200)
+        self.assertEqual([row['month'] for row in listed.json()], [f'{self.last_month:%Y-%m}'])
+
+        detail = self.client.get(f'/api/statements/{self.last_month.year}/{self.last_month.month}/')
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(len(detail.json()['line_items']), 1)
+
+        for url in ('/api/statements/2024/13/', f'/api/statements/{self.this_month.year}/{self.this_month.month}/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json(), {'error': 'Statement not found'})
+
+
+class AnalyticsSeriesTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.account = make_account(balance=1000)
+        self.client = APIClient()
+        self.client.force_authenticate(self.account.user)
+        caches['default'].clear()
+
+    def analytics(self, **params):
+        response = self.client.get('/api/transactions/analytics/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_running_balance_moves_only_with_transfers(self):
+        today = timezone.localdate()
+        add_row(self.account, 'CREDIT', 200, timezone.now() - timedelta(days=2))
+        add_row(self.account, 'DEBIT', 75, timezone.now() - timedelta(days=2), moves_balance=False)
+        add_row(self.account, 'DEBIT', 50, timezone.now() - timedelta(days=1))
+
+        body = self.analytics(bucket='day', start_date=(today - timedelta(days=3)).isoformat())
+
+        balances = [(row['period'], row['balance']) for row in body['series']]
+        self.assertEqual(balances, [
+            ((today - timedelta(days=3)).isoformat(), '850.00'),
+            ((today - timedelta(days=2)).isoformat(), '1050.00'),
+            ((today - timedelta(days=1)).isoformat(), '1000.00'),
+            (today.isoformat(), '1000.00'),
+        ])
+        self.assertEqual(body['series'][1]['debits'], '75.00')
+
+    def test_day_buckets(self):
+        today = timezone.localdate()
+        add_row(self.account, 'CREDIT', 40, noon(today - timedelta(days=1)))
+        add_row(self.account, 'CREDIT', 10, noon(today - timedelta(days=1)))
+        add_row(self.account, 'DEBIT', 15, noon(today - timedelta(days=1)))
+        add_row(self.account, 'DEBIT', 5, timezone.now())
+
+        body = self.analytics(bucket='day', start_date=(today - timedelta(days=1)).isoformat())
+
+        self.assertEqual(body['series'], [
+            {
+                'period': (today - timedelta(days=1)).isoformat(), 'credits': '50.00', 'debits': '15.00',
+                'credit_count': 2, 'debit_count': 1, 'net': '35.00', 'balance': '1005.00',
+            },
+            {
+                'period': today.isoformat(), 'credits': '0.00', 'debits': '5.00',
+                'credit_count': 0, 'debit_count': 1, 'net': '-5.00', 'balance': '1000.00',
+            },
+        ])
+        self.assertEqual((body['opening_balance'], body['closing_balance']), ('970.00', '1000.00'))
+
+    def test_week_buckets(self):
+        monday = analytics.bucket_start(timezone.localdate(), 'week')
+        add_row(self.account, 'CREDIT', 20, noon(monday - timedelta(days=14)))
+        add_row(self.account, 'CREDIT', 100, noon(monday - timedelta(days=7)))
+        add_row(self.account, 'DEBIT', 30, noon(monday - timedelta(days=2)))
+
+        body = self.analytics(bucket='week', start_date=(monday - timedelta(days=10)).isoformat())
+
+        self.assertEqual(body['start_date'], (monday - timedelta(days=14)).isoformat())
+        self.assertEqual([(row['period'], row['credits'], row['debits'], row['balance']) for row in body['series']], [
+            ((monday - timedelta(days=14)).isoformat(), '20.00', '0.00', '930.00'),
+            ((monday - timedelta(days=7)).isoformat(), '100.00', '30.00', '1000.00'),
+            (monday.isoformat(), '0.00', '0.00', '1000.00'),
+        ])
+        self.assertEqual(body['opening_balance'], '910.00')
+
+    def test_month_buckets(self):
+        this_month = timezone.localdate().replace(day=1)
+        last_month = previous_month(this_month)
+        add_row(self.account, 'CREDIT', 50, month_day(previous_month(last_month), 10))
+        add_row(self.account, 'DEBIT', 20, month_day(last_month, 5))
+        add_row(self.account, 'DEBIT', 5, month_day(last_month, 20), moves_balance=False)
+
+        body = self.analytics(bucket='month', start_date=previous_month(last_month).isoformat())
+
+        self.assertEqual([
+            (row['period'], row['credits'], row['debits'], row['debit_count'], row['net'], row['balance'])
+            for row in body['series']
+        ], [
+            (previous_month(last_month).isoformat(), '50.00', '0.00', 0, '50.00', '1020.00'),
+            (last_month.isoformat(), '0.00', '25.00', 2, '-25.00', '1000.00'),
+            (this_month.isoformat(), '0.00', '0.00', 0, '0.00', '1000.00'),
+        ])
+        self.assertEqual(body['end_date'], (next_month(this_month) - timedelta(days=1)).isoformat())
+
+
+class AnalyticsCacheTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.account = make_account()
+        self.client = APIClient()
+        self.client.force_authenticate(self.account.user)
+        caches['default'].clear()
+
+    def day_credits(self, days_ago):
+        response = self.client.get('/api/transactions/analytics/', {'bucket': 'day'})
+        self.assertEqual(response.status_code, 200)
+        day = (timezone.localdate() - timedelta(days=days_ago)).isoformat()
+        return next(row['credit_count'] for row in response.json()['series'] if row['period'] == day)
+
+    def test_deleting_a_transaction_drops_cached_totals(self):
+        add_transactions(self.account, 2, age=timedelta(days=3))
+        self.assertEqual(self.day_credits(3), 2)
+        doomed = Transaction.objects.using(self.account._state.db).filter(user=self.account.user).first()
+
+        response = self.client.delete(f'/api/transactions/{doomed.pk}/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.day_credits(3), 1)
+
+    def test_archiving_is_a_single_delete_and_keeps_totals(self):
+        add_transactions(self.account, 3, age=timedelta(days=400))
+        db = self.account._state.db
+
+        with CaptureQueriesContext(connections[db]) as queries:
+            self.assertEqual(archive_batch(db, hot_cutoff()), 3)
+        statements = [q['sql'].split(None, 1)[0] for q in queries if not q['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(statements, ['SELECT', 'INSERT', 'DELETE'])
+
+    def test_cached_window_restarts_instead_of_spanning_a_gap(self):
+        today = timezone.localdate()
+        self.day_credits(0)
+        far = {
+            'start_date': (today - timedelta(days=800)).isoformat(),
+            'end_date': (today - timedelta(days=700)).isoformat(),
+        }
+        self.assertEqual(self.client.get('/api/transactions/analytics/', far).status_code, 200)
+
+        window = caches['default'].get(analytics._cache_key(self.account.user_id, 'day'))
+        self.assertEqual((window['first'], window['stop']), (today - timedelta(days=800), today - timedelta(days=699)))
+        self.assertLessEqual(len(window['totals']), analytics.MAX_BUCKETS)
+
+    def test_current_bucket_is_extended_with_new_rows(self):
+        add_transactions(self.account, 2)
+        with mock.patch.object(analytics, 'SETTLE_TIME', timedelta(0)):
+            self.assertEqual(self.day_credits(0), 2)
+            key = analytics._open_cache_key(self.account.user_id, 'day')
+            settled = caches['default'].get(key)['until']
+
+            add_transactions(self.account, 1)
+            self.assertEqual(self.day_credits(0), 3)
+
+        state = caches['default'].get(key)
+        self.assertGreater(state['until'], settled)
+        self.assertEqual(state['totals'][2], 3)
+
+    def test_current_bucket_reads_unsettled_rows_live(self):
+        self.assertEqual(self.day_credits(0), 0)
+        add_transactions(self.account, 1)
+
+        self.assertEqual(self.day_credits(0), 1)
+        state = caches['default'].get(analytics._open_cache_key(self.account.user_id, 'day'))
+        self.assertEqual(state['totals'][2], 0)
+
+    @override_settings(
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+            'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'},
+        },
+        ANALYTICS_CACHE_ALIAS='shared',
+    )
+    def test_cache_alias_setting(self):
+        add_transactions(self.account, 1, age=timedelta(days=3))
+        self.day_credits(3)
+        key = analytics._cache_key(self.account.user_id, 'day')
+        self.assertIsNotNone(caches['shared'].get(key))
+        self.assertIsNone(caches['default'].get(key))
+
+        analytics.invalidate(self.account.user_id)
+        self.assertIsNone(caches['shared'].get(key))
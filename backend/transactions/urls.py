@@ -7,4 +7,7 @@ urlpatterns = [
     path('transactions/', views.transactions_view, name='transactions'),
     path('transactions/<int:transaction_id>/', views.transaction_detail, name='transaction_detail'),
     path('transactions/stats/', views.transaction_statistics, name='transaction_stats'),
+    path('transactions/analytics/', views.transaction_analytics, name='transaction_analytics'),
+    path('statements/', views.statements_view, name='statements'),
+    path('statements/<int:year>/<int:month>/', views.statement_detail, name='statement_detail'),
 ]
\ No newline at end of file
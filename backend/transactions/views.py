@@ -1,13 +1,25 @@
 # backend/transactions/views.py
-from decimal import Decimal
+from datetime import date, timedelta
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import Q
-from .models import Transaction
-from .serializers import TransactionSerializer, TransactionCreateSerializer
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from accounts.models import Account
+from mockbanking.dates import parse_date_param
+from mockbanking.money import Money
+from mockbanking.sharding import db_for_user
+from . import analytics
+from .archive import get_transaction, history, hot_cutoff
+from .models import ArchivedTransaction, MonthlyStatement, Transaction
+from .serializers import (
+    MonthlyStatementDetailSerializer,
+    MonthlyStatementSerializer,
+    TransactionCreateSerializer,
+    TransactionSerializer,
+)
 
 
 class TransactionPagination(PageNumberPagination):
@@ -20,36 +32,80 @@ class TransactionPagination(PageNumberPagination):
 @permission_classes([IsAuthenticated])
 def transactions_view(request):
     if request.method == 'GET':
-        # Get all transactions for the current user
-        transactions = Transaction.objects.filter(user=request.user)
+        db = db_for_user(request.user)
 
-        # Apply search filter if provided
-        search_query = request.query_params.get('search', None)
-        if search_query:
-            transactions = transactions.filter(
-                Q(description__icontains=search_query) |
-                Q(recipient_account_number__icontains=search_query) |
-                Q(sender_account_number__icontains=search_query)
-            )
+        # Optional date range (YYYY-MM-DD, inclusive)
+        try:
+            start_date = parse_date_param(request.query_params, 'start_date')
+            end_date = parse_date_param(request.query_params, 'end_date')
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Apply transaction type filter if provided
+        search_query = request.query_params.get('search', None)
         transaction_type = request.query_params.get('type', None)
-        if transaction_type and transaction_type in ['CREDIT', 'DEBIT']:
-            transactions = transactions.filter(transaction_type=transaction_type)
 
-        # Paginate results
+        def apply_filters(transactions):
+            # Apply search filter if provided
+            if search_query:
+                transactions = transactions.filter(
+                    Q(description__icontains=search_query) |
+                    Q(recipient_account_number__icontains=search_query) |
+                    Q(sender_account_number__icontains=search_query)
+                )
+
+            # Apply transaction type filter if provided
+            if transaction_type and transaction_type in ['CREDIT', 'DEBIT']:
+                transactions = transactions.filter(transaction_type=transaction_type)
+
+            if start_date:
+                transactions = transactions.filter(timestamp__gte=start_date)
+            if end_date:
+                transactions = transactions.filter(timestamp__lt=end_date + timedelta(days=1))
+            return transactions
+
+        hot = history(db, request.user, filters=apply_filters)
+        archived = apply_filters(ArchivedTransaction.objects.using(db).filter(user=request.user))
         paginator = TransactionPagination()
+
+        # Decided once for the whole query, never per page, so every page
+        # and the summary see the same rows: a start date inside the hot
+        # window can't match archived rows; otherwise the archive is used
+        # when it holds anything matching the filters.
+        if start_date and start_date >= hot_cutoff():
+            include_archive = False
+        else:
+            include_archive = archived.exists()
+
+        sources = [hot]
+        transactions = hot
+        if include_archive:
+            sources.append(archived)
+            transactions = history(db, request.user, include_archive=True, filters=apply_filters)
+
+        # Paginate results
         paginated_transactions = paginator.paginate_queryset(transactions, request)
 
         serializer = TransactionSerializer(paginated_transactions, many=True)
 
-        # Calculate summary statistics
-        total_transactions = transactions.count()
-        total_credits = transactions.filter(transaction_type='CREDIT').count()
-        total_debits = transactions.filter(transaction_type='DEBIT').count()
-
-        credit_amount = sum((t.amount for t in transactions.filter(transaction_type='CREDIT')), Decimal('0.00'))
-        debit_amount = sum((t.amount for t in transactions.filter(transaction_type='DEBIT')), Decimal('0.00'))
+        # Calculate summary statistics, one aggregate query per table
+        total_transactions = 0
+        total_credits = 0
+        total_debits = 0
+        credit_amount = Money(0)
+        debit_amount = Money(0)
+        for source in sources:
+            summary = source.order_by().aggregate(
+                count=Count('id'),
+                credits=Count('id', filter=Q(transaction_type='CREDIT')),
+                debits=Count('id', filter=Q(transaction_type='DEBIT')),
+                credit_amount=Sum('amount', filter=Q(transaction_type='CREDIT')),
+                debit_amount=Sum('amount', filter=Q(transaction_type='DEBIT')),
+            )
+            total_transactions += summary['count']
+            total_credits += summary['credits']
+            total_debits += summary['debits']
+            credit_amount += summary['credit_amount'] or 0
+            debit_amount += summary['debit_amount'] or 0
 
         response_data = {
             'transactions': serializer.data,
@@ -59,6 +115,7 @@ def transactions_view(request):
                 'total_debits': total_debits,
                 'total_credit_amount': credit_amount,
                 'total_debit_amount': debit_amount,
+                'includes_archive': include_archive,
             }
         }
 
@@ -78,8 +135,8 @@ def transactions_view(request):
 @permission_classes([IsAuthenticated])
 def transaction_detail(request, transaction_id):
     try:
-        transaction = Transaction.objects.get(id=transaction_id, user=request.user)
-    except Transaction.DoesNotExist:
+        transaction = get_transaction(db_for_user(request.user), request.user, transaction_id)
+    except ArchivedTransaction.DoesNotExist:
         return Response({
             'error': 'Transaction not found'
         }, status=status.HTTP_404_NOT_FOUND)
@@ -88,7 +145,13 @@ def transaction_detail(request, transaction_id):
         serializer = TransactionSerializer(transaction)
         return Response(serializer.data)
 
-    elif request.method == 'PUT':
+    # Archived history is read-only
+    if isinstance(transaction, ArchivedTransaction):
+        return Response({
+            'error': 'Archived transactions cannot be modified'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if request.method == 'PUT':
         # Only allow updating description for manual transactions
         # Transfers cannot be modified to maintain integrity
         if transaction.recipient_account_number or transaction.sender_account_number:
@@ -111,6 +174,7 @@ def transaction_detail(request, transaction_id):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         transaction.delete()
+        analytics.invalidate(transaction.user_id)
         return Response({
             'message': 'Transaction deleted successfully'
         }, status=status.HTTP_204_NO_CONTENT)
@@ -119,7 +183,8 @@ def transaction_detail(request, transaction_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def transaction_statistics(request):
-    transactions = Transaction.objects.filter(user=request.user)
+    db = db_for_user(request.user)
+    transactions = Transaction.objects.using(db).filter(user=request.user)
 
     # Monthly spending calculation (current month)
     from django.utils import timezone
@@ -132,7 +197,7 @@ def transaction_statistics(request):
         timestamp__year=current_year
     )
 
-    monthly_spending = sum((t.amount for t in monthly_debits), Decimal('0.00'))
+    monthly_spending = monthly_debits.aggregate(total=Sum('amount'))['total'] or Money(0)
 
     # Recent activity (last 5 transactions)
     recent_transactions = transactions[:5]
@@ -141,6 +206,84 @@ def transaction_statistics(request):
     return Response({
         'monthly_spending': monthly_spending,
         'recent_transactions': recent_serializer.data,
-        'total_transactions': transactions.count(),
+        'total_transactions': (
+            transactions.count() + ArchivedTransaction.objects.using(db).filter(user=request.user).count()
+        ),
     })
 
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def statements_view(request):
+    # Months with a generated statement; the line items come from statement_detail
+    statements = MonthlyStatement.objects.using(db_for_user(request.user)).filter(
+        user=request.user
+    ).defer('line_items')
+    serializer = MonthlyStatementSerializer(statements, many=True)
+    return Response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def statement_detail(request, year, month):
+    try:
+        statement = MonthlyStatement.objects.using(db_for_user(request.user)).get(
+            user=request.user, month=date(year, month, 1)
+        )
+    except (ValueError, MonthlyStatement.DoesNotExist):
+        return Response({
+            'error': 'Statement not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = MonthlyStatementDetailSerializer(statement)
+    return Response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def transaction_analytics(request):
+    bucket = request.query_params.get('bucket', 'day')
+    if bucket not in analytics.BUCKETS:
+        return Response({
+            'error': f"Invalid bucket, expected one of: {', '.join(analytics.BUCKETS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # Optional date range (YYYY-MM-DD, inclusive), widened to whole buckets
+    try:
+        start_date = parse_date_param(request.query_params, 'start_date')
+        end_date = parse_date_param(request.query_params, 'end_date')
+        top = max(1, min(int(request.query_params.get('top', 5)), 50))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    end = end_date.date() if end_date else timezone.localdate()
+    start = start_date.date() if start_date else end - timedelta(days=analytics.DEFAULT_SPAN[bucket] - 1)
+    if start > end:
+        return Response({'error': 'start_date must not be after end_date'}, status=status.HTTP_400_BAD_REQUEST)
+
+    first = analytics.bucket_start(start, bucket)
+    stop = analytics.bucket_after(analytics.bucket_start(end, bucket), bucket)
+    if len(analytics.bucket_starts(first, stop, bucket)) > analytics.MAX_BUCKETS:
+        return Response({
+            'error': f'Range too long, at most {analytics.MAX_BUCKETS} {bucket} buckets'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    db = db_for_user(request.user)
+    try:
+        account = Account.objects.using(db).get(user=request.user)
+    except Account.DoesNotExist:
+        return Response({
+            'error': 'Account not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    opening_balance, rows = analytics.series(db, request.user, bucket, first, stop, account.total_balance)
+
+    return Response({
+        'bucket': bucket,
+        'start_date': first,
+        'end_date': stop - timedelta(days=1),
+        'opening_balance': opening_balance,
+        'closing_balance': rows[-1]['balance'] if rows else opening_balance,
+        'series': rows,
+        'top_counterparties': analytics.top_counterparties(db, request.user, first, stop, top),
+    })
@@ -10,8 +10,9 @@ const Navbar = () => {
   const { logout, user } = useAuth();
   const [isDropdownOpen, setIsDropdownOpen] = useState(false);
 
-  const handleLogout = () => {
-    logout();
+  const handleLogout = async () => {
+    // Let the server revoke the tokens before leaving the page
+    await logout();
     navigate('/login');
   };
 
@@ -2,7 +2,7 @@
 
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import { accountAPI } from '../services/api';
+import { accountAPI, subscribeToEvents } from '../services/api';
 import { formatCurrency, formatDateTime, getUserData } from '../utils/auth';
 
 const Balance = () => {
@@ -15,6 +15,12 @@ const Balance = () => {
     fetchAccountBalance();
   }, []);
 
+  // Pick up incoming transfers without polling
+  useEffect(() => subscribeToEvents({
+    balance: ({ balance }) => setAccountData((prev) => (prev ? { ...prev, balance } : prev)),
+    resync: () => fetchAccountBalance(),
+  }), []);
+
   const fetchAccountBalance = async () => {
     setLoading(true);
     try {
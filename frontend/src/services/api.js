@@ -40,8 +40,10 @@ api.interceptors.response.use(
             refresh: refreshToken,
           });
 
-          const { access } = response.data;
+          // Refresh tokens are rotated: keep the new one, the old one is revoked
+          const { access, refresh } = response.data;
           localStorage.setItem('access_token', access);
+          if (refresh) localStorage.setItem('refresh_token', refresh);
 
           original.headers.Authorization = `Bearer ${access}`;
           return axios(original);
@@ -74,6 +76,11 @@ export const authAPI = {
     return response.data;
   },
 
+  logout: async (refresh) => {
+    const response = await api.post('/auth/logout/', { refresh });
+    return response.data;
+  },
+
   getProfile: async () => {
     const response = await api.get('/auth/profile/');
     return response.data;
@@ -131,5 +138,52 @@ export const transactionAPI = {
 };
 
 
+/* ===========================
+   Live updates (Server-Sent Events)
+=========================== */
+const EVENTS_RETRY_MS = 5000;
+
+// handlers: { balance, transaction, resync }; returns a function that closes the stream
+export const subscribeToEvents = (handlers) => {
+  if (typeof EventSource === 'undefined') return () => {};
+
+  let source = null;
+  let retryTimer = null;
+  let closed = false;
+
+  const connect = async (reconnecting) => {
+    if (closed || !localStorage.getItem('access_token')) return;
+    let ticket;
+    try {
+      // Goes through the interceptors, so an expired access token is refreshed first
+      ({ ticket } = (await api.post('/auth/stream-ticket/')).data);
+    } catch (error) {
+      retryTimer = setTimeout(() => connect(reconnecting), EVENTS_RETRY_MS);
+      return;
+    }
+    if (closed) return;
+
+    source = new EventSource(`${API_BASE_URL}/events/?ticket=${encodeURIComponent(ticket)}`);
+    Object.entries(handlers).forEach(([event, handler]) => {
+      source.addEventListener(event, (e) => handler(JSON.parse(e.data)));
+    });
+    // Events sent while disconnected are lost
+    if (reconnecting && handlers.resync) source.onopen = () => handlers.resync({});
+    // Tickets are single use, so the browser's own retry would be refused: start over with a new one
+    source.onerror = () => {
+      source.close();
+      source = null;
+      if (!closed) retryTimer = setTimeout(() => connect(true), EVENTS_RETRY_MS);
+    };
+  };
+
+  connect(false);
+  return () => {
+    closed = true;
+    clearTimeout(retryTimer);
+    if (source) source.close();
+  };
+};
+
 export const ApiService = { authAPI, accountAPI, transactionAPI };
 export default api;
@@ -62,7 +62,13 @@ export const AuthProvider = ({ children }) => {
     }
   };
 
-  const logout = () => {
+  const logout = async () => {
+    // Revoke the tokens server-side; log out locally even if that fails
+    try {
+      await ApiService.authAPI.logout(localStorage.getItem('refresh_token'));
+    } catch (error) {
+      // ignore
+    }
     localStorage.removeItem('access_token');
     localStorage.removeItem('refresh_token');
     localStorage.removeItem('user_data');